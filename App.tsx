@@ -131,7 +131,7 @@ function App() {
   const handleAdminLogin = async (password: string) => {
     try {
       const response = await api.login(password);
-      sessionStorage.setItem('admin_token', response.token);
+      api.saveSession(response);
       setIsAdmin(true);
       closeModal();
     } catch (error) {
@@ -1,4 +1,5 @@
 import os
+import sys
 import sqlite3
 from datetime import datetime, timedelta
 from functools import wraps
@@ -6,28 +7,94 @@ from functools import wraps
 from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.local import LocalProxy
 import jwt
 import uuid
-import requests
 import re
 from flask import send_from_directory, Response, stream_with_context
-import urllib.parse
+import io
+import csv
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.utils
+import time
+import random
 
 BASE_DIR = os.path.dirname(__file__)
-DB_PATH = os.path.join(BASE_DIR, "data.db")
+# Sibling modules are imported by name (PythonAnywhere loads app.py directly)
+if BASE_DIR not in sys.path:
+	sys.path.append(BASE_DIR)
+
+from app_logging import configure_logging, get_logger
+from http_client import get_client, CircuitOpenError
+from content_store import ContentStore
+from search_index import SearchIndex, SEARCHABLE
+import stats
+import change_feed
+from change_feed import ChangeFeed
+from publisher import SnapshotPublisher
+import content_views
+import bulk_io
+from rate_limit import RateLimiter, RATE_LIMIT_ENABLED
+import idempotency
+from idempotency import IdempotencyStore
+import profiler
+from profiler import ProfileStore, PROFILING, PROFILE_SAMPLE_RATE
+from backup import BackupManager, BackupError, BackupNotFound, BACKUP_DIR
+from health import HealthMonitor, HEALTH_PROBES
+from spool import Spool, SpoolFull
+from tenants import (
+	DEFAULT_TENANT, TENANT_MODE, Tenant, TenantMiddleware, TenantRegistry, parse_tenants, tenant_paths,
+)
+import auth_tokens
+import image_pipeline
+import events
+import bookings
+import link_scanner
+import notifications
+import ordering
+
+log = get_logger("app")
+
+DB_PATH = os.environ.get("DB_PATH") or os.path.join(BASE_DIR, "data.db")
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-me")
 JWT_ALGORITHM = "HS256"
 STATIC_REELS_DIR = os.path.join(BASE_DIR, "static", "reels")
+IMGBB_UPLOAD_URL = os.environ.get("IMGBB_UPLOAD_URL", "https://api.imgbb.com/1/upload")
+# Explicit Proxy for PythonAnywhere
+PA_PROXIES = {
+	"http": "http://proxy.server:3128",
+	"https": "http://proxy.server:3128"
+}
 os.makedirs(STATIC_REELS_DIR, exist_ok=True)
+# Static, content-hashed copies of the public read API (see publisher.py)
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR") or os.path.join(BASE_DIR, "static", "public")
+SNAPSHOT_PUBLISH = os.environ.get("SNAPSHOT_PUBLISH", "1").lower() in ("1", "true", "yes")
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get("SNAPSHOT_DEBOUNCE_SECONDS", "2"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(BASE_DIR, "profiles")
+# In-flight video transfers; private (not under static/), see spool.py
+SPOOL_DIR = os.environ.get("SPOOL_DIR") or os.path.join(BASE_DIR, "spool")
+# Temp names older versions wrote into static/reels ("<uuid4>_<name>")
+LEGACY_SPOOL_NAME_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_")
+CONTENT_PATH = os.path.join(BASE_DIR, "content.json")
+# Where the default tenant (the only one unless TENANT_MODE is set) keeps its data; see tenants.py
+DEFAULT_TENANT_PATHS = {
+	"root": BASE_DIR,
+	"db": DB_PATH,
+	"content": CONTENT_PATH,
+	"snapshots": SNAPSHOT_DIR,
+	"spool": SPOOL_DIR,
+	"backups": BACKUP_DIR,
+	"reels": STATIC_REELS_DIR,
+}
 
 
 def get_db():
 	db = getattr(g, "db", None)
 	if db is None:
-		db = sqlite3.connect(DB_PATH)
+		tenant = getattr(g, "tenant", None)
+		db = sqlite3.connect(tenant.db_path if tenant is not None else DB_PATH)
 		db.row_factory = sqlite3.Row
 		g.db = db
 	return db
@@ -85,9 +152,31 @@ def init_db():
 		)
 		"""
 	)
+	# Inquiry form fields that older databases didn't store
+	ensure_columns(cur, "inquiries", {
+		"event_date": "TEXT",
+		"contact_number": "TEXT",
+		"indoor_outdoor": "TEXT",
+		"event_type": "TEXT",
+	})
+	stats.init_schema(cur)
+	change_feed.init_schema(cur)
+	idempotency.init_schema(cur)
+	auth_tokens.init_schema(cur)
+	events.init_schema(cur)
+	bookings.init_schema(cur)
+	link_scanner.init_schema(cur)
 	db.commit()
 
 
+def ensure_columns(cur, table, columns):
+	"""Add any of ``columns`` ({name: type}) missing from ``table``."""
+	existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+	for name, decl in columns.items():
+		if name not in existing:
+			cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
 def ensure_default_admin():
 	db = get_db()
 	cur = db.cursor()
@@ -96,21 +185,26 @@ def ensure_default_admin():
 	if row and row[0] == 0:
 		admin_user = os.environ.get("ADMIN_USERNAME", "admin")
 		admin_pass = os.environ.get("ADMIN_PASSWORD", "admin")
-		print(f"DEBUG: Creating default admin with username='{admin_user}', password='{admin_pass}'")
 		hashed = generate_password_hash(admin_pass)
 		cur.execute(
 			"INSERT INTO admins (username, password) VALUES (?, ?)", (admin_user, hashed)
 		)
 		db.commit()
-		print(f"Created default admin user '{admin_user}'. Set ADMIN_PASSWORD env var to change it.")
+		log.info("created default admin user; set ADMIN_PASSWORD env var to change it", username=admin_user)
 
 
 def create_app():
+	configure_logging()
 	app = Flask(__name__)
 	app.config["SECRET_KEY"] = SECRET_KEY
 	# Allow frontend origins and Authorization header for JWT auth
 	# Allow frontend origins and Authorization header for JWT auth
-	CORS(app, resources={r"/api/*": {"origins": "*"}}, allow_headers=["Content-Type", "Authorization"])
+	CORS(
+		app,
+		resources={r"/api/*": {"origins": "*"}},
+		allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
+		expose_headers=["X-Content-Version"],
+	)
 
 	# Initialize Cloudinary
 	cloudinary_config = {
@@ -127,7 +221,7 @@ def create_app():
 		if not proxy.startswith("http"):
 			proxy = f"http://{proxy}"
 			
-		print(f"DEBUG: Found proxy: {proxy}")
+		log.info("outbound proxy configured", proxy=proxy)
 		# Set ALL variants to be safe
 		os.environ["HTTP_PROXY"] = proxy
 		os.environ["HTTPS_PROXY"] = proxy
@@ -136,82 +230,241 @@ def create_app():
 		
 		cloudinary_config["api_proxy"] = proxy
 	else:
-		print("DEBUG: No proxy environment variable found.")
+		log.info("no outbound proxy configured")
 
 	cloudinary.config(**cloudinary_config)
 
-	@app.route("/api/debug-connection", methods=["GET"])
-	def debug_connection():
-		results = {}
-		# Test Google
-		try:
-			r = requests.get("https://www.google.com", timeout=5)
-			results["google"] = f"Success: {r.status_code}"
-		except Exception as e:
-			results["google"] = f"Failed: {str(e)}"
-			
-		# Test Cloudinary
-		try:
-			r = requests.get("https://api.cloudinary.com/v1_1/ping", timeout=5)
-			results["cloudinary"] = f"Success: {r.status_code}"
-		except Exception as e:
-			results["cloudinary"] = f"Failed: {str(e)}"
-			
-		results["proxy_env"] = {
-			"http_proxy": os.environ.get("http_proxy"),
-			"HTTP_PROXY": os.environ.get("HTTP_PROXY"),
-			"https_proxy": os.environ.get("https_proxy"),
-			"HTTPS_PROXY": os.environ.get("HTTPS_PROXY")
-		}
-		return jsonify(results)
+	# Per-venue resources, resolved for the current request (see open_tenant below)
+	spool = LocalProxy(lambda: g.tenant.spool)
+
+	def spool_full_response(e):
+		log.warning("spool full", error=str(e))
+		resp = jsonify({"error": f"Server busy, try again shortly ({e})"})
+		resp.status_code = 503
+		resp.headers["Retry-After"] = "30"
+		return resp
 
-	# Initialize DB and default admin now (avoid using before_first_request)
-	with app.app_context():
-		init_db()
-		ensure_default_admin()
+	limiter = RateLimiter.from_env(DB_PATH) if RATE_LIMIT_ENABLED else None
+
+	# Rate-limit buckets are shared by all venues and live in the default database
+	if limiter is not None:
+		conn = sqlite3.connect(DB_PATH)
+		limiter.init_schema(conn.cursor())
+		conn.commit()
+		conn.close()
 
 	@app.teardown_appcontext
 	def _close_db(exc):
 		close_db(exc)
 
+	tenant_hosts = parse_tenants(os.environ.get("TENANTS")) if TENANT_MODE else {}
+	if TENANT_MODE:
+		app.wsgi_app = TenantMiddleware(app.wsgi_app, tenant_hosts)
+
+	@app.before_request
+	def bind_tenant():
+		"""Attach the request's venue (opened on first use) as g.tenant."""
+		tenant_id = request.environ.get("app.tenant", DEFAULT_TENANT)
+		if tenant_id is not None:
+			g.tenant = tenant_registry.acquire(tenant_id)
+			# Queued notifications need a flusher in every worker, also one forked after the venue was opened
+			g.tenant.notifier.ensure_started()
+
+	@app.teardown_request
+	def release_tenant(exc):
+		tenant = g.pop("tenant", None)
+		if tenant is not None:
+			tenant_registry.release(tenant)
+
+	@app.before_request
+	def admission_control():
+		"""Per-client rate limits and per-endpoint concurrency caps (fail fast, never queue)."""
+		if limiter is None or request.method == "OPTIONS" or request.endpoint is None:
+			return None
+		retry_after = limiter.check(request.endpoint, limiter.client_ip(request))
+		if retry_after:
+			resp = jsonify({"error": "Too many requests", "retry_after": retry_after})
+			resp.status_code = 429
+			resp.headers["Retry-After"] = str(retry_after)
+			return resp
+		if not limiter.caps.try_enter(request.endpoint):
+			log.warning("concurrency cap reached", endpoint=request.endpoint)
+			resp = jsonify({"error": "Server busy, try again shortly"})
+			resp.status_code = 503
+			resp.headers["Retry-After"] = "1"
+			return resp
+		g.admission_slot = request.endpoint
+		return None
+
+	@app.teardown_request
+	def release_admission_slot(exc):
+		endpoint = g.pop("admission_slot", None)
+		if endpoint is not None:
+			limiter.caps.leave(endpoint)
+
 	def create_token(admin_id):
 		payload = {
 			"admin_id": admin_id,
-			"exp": datetime.utcnow() + timedelta(hours=8),
+			# Admin ids repeat across venue databases: a token is only valid for its venue
+			"tenant": g.tenant.id,
+			"exp": datetime.utcnow() + timedelta(minutes=auth_tokens.ACCESS_TOKEN_MINUTES),
 		}
 		return jwt.encode(payload, app.config["SECRET_KEY"], algorithm=JWT_ALGORITHM)
 
-	def token_required(f):
-		@wraps(f)
-		def decorated(*args, **kwargs):
+	def session_response(admin_id, refresh_token=None):
+		"""Access token plus a refresh token (a new session unless one is passed in)."""
+		if refresh_token is None:
+			db = get_db()
+			refresh_token = auth_tokens.issue(db, app.config["SECRET_KEY"], admin_id)
+			db.commit()
+		return jsonify({
+			"token": create_token(admin_id),
+			"refresh_token": refresh_token,
+			"expires_in": auth_tokens.ACCESS_TOKEN_MINUTES * 60,
+		})
+
+	def authenticate(token=None):
+		"""Validate the Bearer token (or ``token``); returns an error response or None (sets g.admin)."""
+		if token is None:
 			auth = request.headers.get("Authorization", "")
 			if not auth.startswith("Bearer "):
 				return jsonify({"error": "Missing or invalid Authorization header"}), 401
 			token = auth.split(" ", 1)[1]
-			try:
-				data = jwt.decode(token, app.config["SECRET_KEY"], algorithms=[JWT_ALGORITHM])
-				admin_id = data.get("admin_id")
-				db = get_db()
-				cur = db.cursor()
-				cur.execute("SELECT id, username FROM admins WHERE id = ?", (admin_id,))
-				admin = cur.fetchone()
-				if not admin:
-					return jsonify({"error": "Invalid token"}), 401
-				g.admin = admin
-			except jwt.ExpiredSignatureError:
-				return jsonify({"error": "Token expired"}), 401
-			except Exception:
+		try:
+			data = jwt.decode(token, app.config["SECRET_KEY"], algorithms=[JWT_ALGORITHM])
+			if data.get("tenant", DEFAULT_TENANT) != g.tenant.id:
+				return jsonify({"error": "Invalid token"}), 401
+			admin_id = data.get("admin_id")
+			db = get_db()
+			cur = db.cursor()
+			cur.execute("SELECT id, username FROM admins WHERE id = ?", (admin_id,))
+			admin = cur.fetchone()
+			if not admin:
 				return jsonify({"error": "Invalid token"}), 401
+			g.admin = admin
+		except jwt.ExpiredSignatureError:
+			return jsonify({"error": "Token expired"}), 401
+		except Exception:
+			return jsonify({"error": "Invalid token"}), 401
+		return None
+
+	def token_required(f):
+		@wraps(f)
+		def decorated(*args, **kwargs):
+			error = authenticate()
+			if error is not None:
+				return error
 			return f(*args, **kwargs)
 
 		return decorated
 
+	profiles = ProfileStore(PROFILE_DIR)
+
+	if PROFILING:
+		# Hooks exist only when PROFILING is set, so a normal deployment pays nothing
+		@app.before_request
+		def start_profile():
+			if request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1":
+				if authenticate() is not None:
+					return None
+				mode = "on_demand"
+			elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+				mode = "sampled"
+			else:
+				return None
+			profile = profiler.start()
+			if profile is not None:
+				g.profile = (profile, mode, time.perf_counter())
+			return None
+
+		@app.after_request
+		def note_profile_status(resp):
+			if "profile" in g:
+				g.profile_status = resp.status_code
+			return resp
+
+		@app.teardown_request
+		def finish_profile(exc):
+			active = g.pop("profile", None)
+			if active is None:
+				return
+			profile, mode, started = active
+			profile.disable()
+			ms = (time.perf_counter() - started) * 1000
+			try:
+				profiles.save(profile, mode, request.endpoint, request.method, request.path,
+					g.pop("profile_status", 500), ms)
+			except OSError:
+				log.exception("failed to save profile")
+
+	@app.route("/admin/profiles", methods=["GET"])
+	@token_required
+	def list_profiles():
+		return jsonify({"enabled": PROFILING, "profiles": profiles.list()})
+
+	@app.route("/admin/profiles/<name>", methods=["GET"])
+	@token_required
+	def get_profile(name):
+		path = profiles.path(name)
+		if path is None:
+			return jsonify({"error": "Profile not found"}), 404
+		if request.args.get("format") == "text":
+			sort = request.args.get("sort", "cumulative")
+			if sort not in ("cumulative", "tottime", "calls"):
+				return jsonify({"error": "sort must be cumulative, tottime or calls"}), 400
+			return Response(profiles.summary(name, sort=sort), mimetype="text/plain")
+		return send_from_directory(PROFILE_DIR, name, as_attachment=True, mimetype="application/octet-stream")
+
+	idempotency_store = LocalProxy(lambda: g.tenant.idempotency_store)
+
+	def idempotent(f):
+		"""Honor an Idempotency-Key header on POST: replay the stored 2xx response instead of re-running.
+
+		Goes inside ``token_required``, so only authenticated callers claim or replay admin keys.
+		"""
+		@wraps(f)
+		def decorated(*args, **kwargs):
+			key = request.headers.get("Idempotency-Key")
+			if request.method != "POST" or not key:
+				return f(*args, **kwargs)
+			if len(key) > idempotency.MAX_KEY_LENGTH:
+				return jsonify({"error": "Idempotency-Key too long"}), 400
+			# Keys are per caller: another client (or nobody) can't replay an admin's response
+			caller = f"admin:{g.admin['id']}" if g.get("admin") is not None else "anonymous"
+			scope = f"{request.method} {request.path} {caller}"
+			req_hash = idempotency.request_hash(request.method, request.path, request.get_data(), caller)
+			state, stored = idempotency_store.claim(scope, key, req_hash)
+			if state == "replay":
+				resp = Response(stored["body"], status=stored["status"], content_type=stored["content_type"])
+				resp.headers["Idempotent-Replayed"] = "true"
+				return resp
+			if state == "in_progress":
+				resp = jsonify({"error": "A request with this Idempotency-Key is still in progress"})
+				resp.status_code = 409
+				resp.headers["Retry-After"] = "1"
+				return resp
+			if state == "mismatch":
+				return jsonify({"error": "Idempotency-Key was already used with a different request"}), 422
+
+			try:
+				resp = app.make_response(f(*args, **kwargs))
+			except BaseException:
+				idempotency_store.release(scope, key)
+				raise
+			if 200 <= resp.status_code < 300 and not resp.is_streamed:
+				idempotency_store.complete(scope, key, resp.status_code, resp.content_type, resp.get_data())
+			else:
+				# Nothing happened that a retry could duplicate; let the client try again
+				idempotency_store.release(scope, key)
+			return resp
+
+		return decorated
+
 	@app.route("/login", methods=["POST"])
 	def login():
 		data = request.get_json() or {}
 		username = data.get("username")
 		password = data.get("password")
-		print(f"DEBUG: Login attempt for username='{username}', password='{password}'")
 		if not username or not password:
 			return jsonify({"error": "username and password required"}), 400
 		db = get_db()
@@ -223,21 +476,56 @@ def create_app():
 		admin_id = row[0]
 		stored_hash = row[1]
 		password_ok = check_password_hash(stored_hash, password)
-		print(f"DEBUG: Stored hash='{stored_hash}', password_ok={password_ok}")
 		if not password_ok:
+			log.warning("failed login", username=username)
 			return jsonify({"error": "Invalid credentials"}), 401
-		token = create_token(admin_id)
-		return jsonify({"token": token})
+		return session_response(admin_id)
+
+	@app.route("/api/token/refresh", methods=["POST"])
+	def api_token_refresh():
+		data = request.get_json() or {}
+		db = get_db()
+		try:
+			admin_id, new_refresh = auth_tokens.rotate(db, app.config["SECRET_KEY"], data.get("refresh_token"))
+		except auth_tokens.TokenError as e:
+			db.rollback()
+			return jsonify({"error": str(e)}), 401
+		if db.execute("SELECT 1 FROM admins WHERE id = ?", (admin_id,)).fetchone() is None:
+			db.rollback()
+			return jsonify({"error": "Invalid refresh token"}), 401
+		db.commit()
+		return session_response(admin_id, new_refresh)
+
+	@app.route("/api/token/revoke", methods=["POST"])
+	def api_token_revoke():
+		"""Logout: revoke this session's refresh tokens, or with ``all`` (admin token) every session."""
+		data = request.get_json() or {}
+		db = get_db()
+		if data.get("all"):
+			error = authenticate()
+			if error is not None:
+				return error
+			count = auth_tokens.revoke_all(db, g.admin["id"])
+			db.commit()
+			return jsonify({"ok": True, "revoked": count})
+		if not isinstance(data.get("refresh_token"), str) or not data["refresh_token"]:
+			return jsonify({"error": "refresh_token required"}), 400
+		auth_tokens.revoke(db, app.config["SECRET_KEY"], data["refresh_token"])
+		db.commit()
+		return jsonify({"ok": True})
 
 	@app.route("/admin/events", methods=["GET"])
 	@token_required
 	def list_events():
-		db = get_db()
-		cur = db.cursor()
-		cur.execute("SELECT id, title, description, date, metadata, created_at FROM events ORDER BY created_at DESC")
-		rows = cur.fetchall()
-		events = [dict(row) for row in rows]
-		return jsonify({"events": events})
+		try:
+			result = events.query(get_db(), request.args)
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		return jsonify(result)
+
+	def event_fields(data):
+		"""(date, metadata) in stored form; raises ValueError for unusable input."""
+		return events.normalize_date(data.get("date")), events.normalize_metadata(data.get("metadata"))
 
 	@app.route("/admin/events", methods=["POST"])
 	@token_required
@@ -245,8 +533,10 @@ def create_app():
 		data = request.get_json() or {}
 		title = data.get("title")
 		description = data.get("description")
-		date = data.get("date")
-		metadata = data.get("metadata")
+		try:
+			date, metadata = event_fields(data)
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
 		db = get_db()
 		cur = db.cursor()
 		cur.execute(
@@ -262,8 +552,10 @@ def create_app():
 		data = request.get_json() or {}
 		title = data.get("title")
 		description = data.get("description")
-		date = data.get("date")
-		metadata = data.get("metadata")
+		try:
+			date, metadata = event_fields(data)
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
 		db = get_db()
 		cur = db.cursor()
 		cur.execute(
@@ -287,54 +579,160 @@ def create_app():
 	def list_inquiries():
 		db = get_db()
 		cur = db.cursor()
-		cur.execute("SELECT id, name, email, message, created_at FROM inquiries ORDER BY created_at DESC")
+		cur.execute(
+			"SELECT id, name, email, message, event_date, contact_number, indoor_outdoor, event_type, created_at "
+			"FROM inquiries ORDER BY created_at DESC"
+		)
 		rows = cur.fetchall()
 		items = [dict(row) for row in rows]
 		return jsonify({"inquiries": items})
 
+	@app.route("/admin/stats", methods=["GET"])
+	@token_required
+	def admin_stats():
+		try:
+			result = stats.range_stats(get_db(), request.args.get("from"), request.args.get("to"))
+		except ValueError as e:
+			return jsonify({"error": f"Invalid date range: {e}"}), 400
+		return jsonify(result)
+
+	def content_collection(name):
+		"""content.json key for an export/import target given as a resource slug (or "reels")."""
+		if name == "reels":
+			return "reels"
+		return resource_map.get(name)
+
+	@app.route("/admin/export/<table>", methods=["GET"])
+	@token_required
+	def admin_export(table):
+		fmt = request.args.get("format", "csv")
+		if fmt not in bulk_io.FORMATS:
+			return jsonify({"error": f"format must be one of: {', '.join(bulk_io.FORMATS)}"}), 400
+		compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+
+		if table in bulk_io.TABLES:
+			db_path = g.tenant.db_path
+
+			def generate():
+				# Own connection: the request's g.db is closed before the body finishes streaming
+				conn = sqlite3.connect(db_path, timeout=10)
+				try:
+					columns, rows = bulk_io.iter_table(conn, table)
+					yield from bulk_io.export_stream(columns, rows, fmt, compress)
+				finally:
+					conn.close()
+			body = generate()
+		else:
+			key = content_collection(table)
+			if key is None:
+				return jsonify({"error": "Unknown table"}), 404
+			columns, rows = bulk_io.iter_items(read_content().get(key, []))
+			body = bulk_io.export_stream(columns, rows, fmt, compress)
+
+		filename = f"{table}.{fmt}" + (".gz" if compress else "")
+		resp = Response(stream_with_context(body), mimetype="application/gzip" if compress else bulk_io.FORMATS[fmt])
+		resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+		return resp
+
+	@app.route("/admin/import/<table>", methods=["POST"])
+	@token_required
+	def admin_import(table):
+		upload = request.files.get("file")
+		if upload is not None:
+			stream, filename = upload.stream, upload.filename
+		else:
+			stream, filename = request.stream, ""
+		fmt = request.args.get("format") or bulk_io.guess_format(filename)
+		on_conflict = request.args.get("on_conflict", "abort")
+		batch_size = request.args.get("batch_size", bulk_io.DEFAULT_BATCH, type=int)
+		if fmt not in bulk_io.FORMATS or on_conflict not in bulk_io.ON_CONFLICT or batch_size < 1:
+			return jsonify({"error": "Invalid format, on_conflict or batch_size"}), 400
+
+		try:
+			if upload is None:
+				# Request bodies can't seek: buffer just enough to sniff gzip
+				stream = io.BufferedReader(stream)
+			records = bulk_io.read_records(bulk_io.open_text(stream), fmt)
+			if table in bulk_io.TABLES:
+				report = bulk_io.import_rows(get_db(), table, records, batch_size, on_conflict)
+			else:
+				key = content_collection(table)
+				if key is None:
+					return jsonify({"error": "Unknown table"}), 404
+				with edit_content() as data:
+					items = data.setdefault(key, [])
+					report = bulk_io.merge_items(items, records, on_conflict, table)
+					if report.imported:
+						write_content(data)
+		except (bulk_io.BulkImportError, UnicodeDecodeError, OSError, csv.Error) as e:
+			return jsonify({"error": f"Import failed: {e}"}), 400
+		result = report.as_dict()
+		log.info("bulk import finished", **{k: v for k, v in result.items() if k != "errors"})
+		return jsonify(result), 200 if not report.rejected else 207
+
 	# ===== Booking API =====
 	@app.route("/api/bookings", methods=["GET"])
 	def get_bookings():
-		date = request.args.get("date")
-		db = get_db()
-		cur = db.cursor()
-		if date:
-			cur.execute("SELECT * FROM bookings WHERE date = ?", (date,))
-		else:
-			cur.execute("SELECT * FROM bookings ORDER BY date, time_slot")
-		rows = cur.fetchall()
-		return jsonify([dict(row) for row in rows])
+		return jsonify(bookings.list_bookings(get_db(), request.args.get("date")))
 
 	@app.route("/api/bookings", methods=["POST"])
 	@token_required
+	@idempotent
 	def create_booking():
 		data = request.get_json() or {}
-		date = data.get("date")
-		time_slot = data.get("time_slot")
-		if not date or not time_slot:
-			return jsonify({"error": "Date and time_slot required"}), 400
-		
-		db = get_db()
-		cur = db.cursor()
-		# Check if exists
-		cur.execute("SELECT id FROM bookings WHERE date = ? AND time_slot = ?", (date, time_slot))
-		if cur.fetchone():
+		try:
+			booking_id = bookings.create(get_db(), data.get("date"), data.get("time_slot"))
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		except bookings.SlotTaken:
 			return jsonify({"error": "Slot already booked"}), 409
-			
-		cur.execute("INSERT INTO bookings (date, time_slot) VALUES (?, ?)", (date, time_slot))
-		db.commit()
-		return jsonify({"ok": True, "id": cur.lastrowid}), 201
+		return jsonify({"ok": True, "id": booking_id}), 201
+
+	@app.route("/api/bookings/<int:booking_id>", methods=["PUT"])
+	@token_required
+	def update_booking(booking_id):
+		data = request.get_json() or {}
+		try:
+			booking = bookings.update(get_db(), booking_id, data.get("date"), data.get("time_slot"))
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		except bookings.SlotTaken:
+			return jsonify({"error": "Slot already booked"}), 409
+		if booking is None:
+			return jsonify({"error": "Not found"}), 404
+		return jsonify(booking)
 
 	@app.route("/api/bookings/<int:booking_id>", methods=["DELETE"])
 	@token_required
 	def delete_booking(booking_id):
-		db = get_db()
-		cur = db.cursor()
-		cur.execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
-		db.commit()
+		bookings.delete(get_db(), booking_id)
 		return jsonify({"ok": True})
 
+	def build_inquiry_message(name, contact_number, date, indoor_outdoor, event_type, email, message):
+		msg_body = f"*New Inquiry via Website*\n\n*Name:* {name}"
+		if contact_number:
+			msg_body += f"\n*Phone:* {contact_number}"
+		if date:
+			msg_body += f"\n*Date:* {date}"
+		if indoor_outdoor:
+			msg_body += f"\n*Service:* {indoor_outdoor}"
+		if event_type:
+			msg_body += f"\n*Type:* {event_type}"
+		if email:
+			msg_body += f"\n*Email:* {email}"
+		
+		msg_body += f"\n*Message:* {message}"
+		return msg_body
+
+	def deliver_notification(channel, method, url, kwargs):
+		# Synchronous, so a provider failure (error status included) reaches the Notifier
+		get_client(channel).request(method, url, **kwargs).raise_for_status()
+
+	# Per-channel immediate/digest delivery with provider rate limits (see notifications.py)
+	notifier = LocalProxy(lambda: g.tenant.notifier)
+
 	@app.route("/api/inquiry", methods=["POST"])
+	@idempotent
 	def public_inquiry():
 		data = request.get_json() or {}
 		name = data.get("name")
@@ -349,118 +747,17 @@ def create_app():
 		db = get_db()
 		cur = db.cursor()
 		cur.execute(
-			"INSERT INTO inquiries (name, email, message) VALUES (?, ?, ?)",
-			(name, email or "", message),
+			"INSERT INTO inquiries (name, email, message, event_date, contact_number, indoor_outdoor, event_type) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(name, email or "", message, date, contact_number, indoor_outdoor, event_type),
 		)
 		db.commit()
 		inquiry_id = cur.lastrowid
 
-		# Construct Message
-		msg_body = f"*New Inquiry via Website*\n\n*Name:* {name}"
-		if contact_number:
-			msg_body += f"\n*Phone:* {contact_number}"
-		if date:
-			msg_body += f"\n*Date:* {date}"
-		if indoor_outdoor:
-			msg_body += f"\n*Service:* {indoor_outdoor}"
-		if event_type:
-			msg_body += f"\n*Type:* {event_type}"
-		if email:
-			msg_body += f"\n*Email:* {email}"
-		
-		msg_body += f"\n*Message:* {message}"
-
-		# Send Notification
-		# Option 1: Twilio (User Preferred - Reliable & Standard)
-		# Requires TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER in env
-		try:
-			import requests
-			
-			# Twilio
-			twilio_sid = os.environ.get("TWILIO_ACCOUNT_SID")
-			twilio_token = os.environ.get("TWILIO_AUTH_TOKEN")
-			# Default Twilio Sandbox number if not specified
-			twilio_from = os.environ.get("TWILIO_FROM_NUMBER", "whatsapp:+14155238886")
-			phone = "919978634999"
-
-			if twilio_sid and twilio_token:
-				url = f"https://api.twilio.com/2010-04-01/Accounts/{twilio_sid}/Messages.json"
-				auth = (twilio_sid, twilio_token)
-				data = {
-					"From": twilio_from,
-					"To": f"whatsapp:+{phone}",
-					"Body": msg_body
-				}
-				requests.post(url, data=data, auth=auth, timeout=10)
-				print(f"DEBUG: Sent WhatsApp notification via Twilio")
-
-			# Option 2: WhatsApp Cloud API (Official)
-			elif os.environ.get("WHATSAPP_CLOUD_NUMBER_ID"):
-				wa_id = os.environ.get("WHATSAPP_CLOUD_NUMBER_ID")
-				wa_token = os.environ.get("WHATSAPP_CLOUD_TOKEN")
-				url = f"https://graph.facebook.com/v17.0/{wa_id}/messages"
-				headers = {"Authorization": f"Bearer {wa_token}", "Content-Type": "application/json"}
-				payload = {
-					"messaging_product": "whatsapp", "to": "919978634999", "type": "text",
-					"text": {"body": msg_body}
-				}
-				requests.post(url, json=payload, headers=headers, timeout=10)
-				print(f"DEBUG: Sent WhatsApp Cloud API notification")
-
-			# Option 3: Discord Webhook (Free & Easy)
-			elif os.environ.get("DISCORD_WEBHOOK_URL"):
-				discord_url = os.environ.get("DISCORD_WEBHOOK_URL")
-				payload = {"content": f"🎉 **New Inquiry**\n{msg_body}"}
-				requests.post(discord_url, json=payload, timeout=10)
-				print(f"DEBUG: Sent Discord notification")
-
-			# Option 4: Telegram (Free & Reliable)
-			elif os.environ.get("TELEGRAM_BOT_TOKEN"):
-				tg_token = os.environ.get("TELEGRAM_BOT_TOKEN")
-				tg_chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-				url = f"https://api.telegram.org/bot{tg_token}/sendMessage"
-				payload = {"chat_id": tg_chat_id, "text": msg_body, "parse_mode": "Markdown"}
-				requests.post(url, json=payload, timeout=10)
-				print(f"DEBUG: Sent Telegram notification")
-
-			# Option 5: CallMeBot (Legacy)
-			elif os.environ.get("WHATSAPP_BOT_API_KEY"):
-				import urllib.parse
-				phone = "919978634999"
-				api_key = os.environ.get("WHATSAPP_BOT_API_KEY")
-				encoded_text = urllib.parse.quote(msg_body)
-				url = f"https://api.callmebot.com/whatsapp.php?phone={phone}&text={encoded_text}&apikey={api_key}"
-				requests.get(url, timeout=10)
-				print(f"DEBUG: Sent WhatsApp notification via CallMeBot")
-				
-			# Option 6: Fonoster (User Preferred)
-			elif os.environ.get("FONOSTER_ACCESS_KEY_ID"):
-				access_key_id = os.environ.get("FONOSTER_ACCESS_KEY_ID")
-				access_key_secret = os.environ.get("FONOSTER_ACCESS_KEY_SECRET")
-				project_id = os.environ.get("FONOSTER_PROJECT_ID") # Optional depending on setup
-				
-				# Note: This is a generic implementation. Fonoster's specific API endpoint and payload 
-				# structure might vary based on the specific integration (e.g., Twilio adapter via Fonoster).
-				# Assuming a standard HTTP request to a configured endpoint or using their SDK logic if available.
-				# Since we are using requests, we will assume a direct API call.
-				
-				# Placeholder for Fonoster API endpoint - User needs to verify specific endpoint
-				url = "https://api.fonoster.com/v1/messages" 
-				auth = (access_key_id, access_key_secret)
-				payload = {
-					"from": "919978634999", # Sender ID or Number
-					"to": "919978634999",
-					"text": msg_body
-				}
-				
-				# requests.post(url, json=payload, auth=auth, timeout=10)
-				print(f"DEBUG: Sent WhatsApp notification via Fonoster (Simulated - Verify Endpoint)")
-
-			else:
-				print("DEBUG: No notification credentials found.")
-				
-		except Exception as e:
-			print(f"ERROR: Failed to send notification: {e}")
+		msg_body = build_inquiry_message(name, contact_number, date, indoor_outdoor, event_type, email, message)
+		if TENANT_MODE:
+			msg_body += f"\n*Venue:* {g.tenant.id}"
+		notifier.notify(msg_body, inquiry_id)
 
 		return jsonify({"ok": True, "id": inquiry_id}), 201
 
@@ -478,40 +775,26 @@ def create_app():
 			sys.path.append(os.path.dirname(__file__))
 			from default_data import DEFAULT_DATA
 
-	CONTENT_PATH = os.path.join(BASE_DIR, "content.json")
+	content_store = LocalProxy(lambda: g.tenant.content_store)
+	search_index = LocalProxy(lambda: g.tenant.search_index)
+	changes = LocalProxy(lambda: g.tenant.changes)
 
 	def read_content():
-		if not os.path.exists(CONTENT_PATH):
-			print("DEBUG: content.json not found, creating from defaults")
-			with open(CONTENT_PATH, "w", encoding="utf-8") as f:
-				json.dump(DEFAULT_DATA, f, ensure_ascii=False, indent=2)
-			return DEFAULT_DATA
-		
-		with open(CONTENT_PATH, "r", encoding="utf-8") as f:
-			try:
-				data = json.load(f)
-			except json.JSONDecodeError:
-				print("DEBUG: content.json corrupted, resetting")
-				data = {}
-		
-		# Auto-seed ONLY if key is missing completely
-		needs_save = False
-		for key, default_items in DEFAULT_DATA.items():
-			if key not in data:
-				print(f"DEBUG: Key '{key}' missing in content.json, auto-seeding")
-				data[key] = default_items
-				needs_save = True
-		
-		if needs_save:
-			with open(CONTENT_PATH, "w", encoding="utf-8") as f:
-				json.dump(data, f, ensure_ascii=False, indent=2)
-				
-		return data
+		# Shared cached document: callers must not mutate it (use edit_content)
+		return content_store.read()
+
+	def edit_content():
+		return content_store.edit()
 
 	def write_content(data):
-		print(f"DEBUG: Writing content to {CONTENT_PATH}")
-		with open(CONTENT_PATH, "w", encoding="utf-8") as f:
-			json.dump(data, f, ensure_ascii=False, indent=2)
+		content_store.write(data)
+
+	def read_ordered():
+		"""The document with ordered collections sorted by position, built once per content version."""
+		return content_store.derived("ordered", ordering.in_order)
+
+	def json_response(body, status=200):
+		return Response(body, status=status, mimetype="application/json")
 
 	resource_map = {
 		"indoor-decorations": "indoorDecorations",
@@ -521,37 +804,229 @@ def create_app():
 		"cakes": "cakes",
 		"gallery": "galleryItems",
 		"addons": "addons",
-		"bookings": "bookings"
 		# "reels" REMOVED from generic map to prevent auto-seed issues
+		# "bookings" live in SQLite only (see bookings.py and the Booking API routes)
 	}
 
+	def render_public_views(data):
+		"""Payloads of the public GET endpoints, keyed by snapshot name."""
+		data = ordering.in_order(data)
+		views = {
+			"content": dict(data),
+			"reels": {"reels": data.get("reels", [])},
+		}
+		for resource, mapped in resource_map.items():
+			views[resource] = {mapped: data.get(mapped, [])}
+		for name in content_views.VIEWS:
+			views[f"content-{name}"] = content_views.project(data, view=name)
+		return views
+
+	def open_tenant(tenant_id):
+		"""Open a venue's stores, bring its database schema up to date and start its helpers."""
+		paths = tenant_paths(tenant_id, DEFAULT_TENANT_PATHS)
+		os.makedirs(os.path.dirname(paths["db"]), exist_ok=True)
+		os.makedirs(paths["reels"], exist_ok=True)
+		tenant = Tenant(tenant_id, paths)
+
+		store = tenant.content_store = ContentStore(paths["content"], DEFAULT_DATA)
+		tenant.on_close(store.close)
+		tenant.search_index = SearchIndex(paths["db"])
+		tenant.changes = ChangeFeed(paths["db"])
+		tenant.idempotency_store = IdempotencyStore(paths["db"])
+		tenant.backups = BackupManager(paths["db"], store, paths["backups"])
+		tenant.scanner = link_scanner.LinkScanner(paths["db"])
+		tenant.on_close(tenant.scanner.close)
+		tenant.busy_while(lambda: tenant.scanner.scanning)
+		tenant.spool = Spool(paths["spool"])
+		tenant.spool.reap(paths["reels"], pattern=LEGACY_SPOOL_NAME_RE)
+		tenant.spool.start_janitor()
+		tenant.on_close(tenant.spool.close)
+		# Provider credentials are shared by all venues, so their rate buckets live in the main database
+		tenant.notifier = notifications.Notifier.from_env(deliver_notification, paths["db"], rate_db_path=DB_PATH)
+		tenant.on_close(tenant.notifier.close)
+
+		with app.app_context():
+			g.tenant = tenant
+			init_db()
+			ensure_default_admin()
+			tenant.search_index.init_schema()
+			# Fold bookings kept in content.json by older versions into the table, once
+			if "bookings" in store.read():
+				with edit_content() as data:
+					if "bookings" in data:
+						moved = bookings.migrate_legacy(get_db(), data.pop("bookings"))
+						write_content(data)
+						log.info("migrated content.json bookings to the database", tenant=tenant_id, added=moved)
+			# Number items saved before collections had positions, in their current order
+			with edit_content() as data:
+				numbered = ordering.assign_missing(data)
+				if numbered:
+					write_content(data)
+					log.info("assigned content positions", tenant=tenant_id, items=numbered)
+
+		store.add_listener(tenant.search_index.apply_change)
+		store.add_listener(tenant.changes.record_content_change)
+		if SNAPSHOT_PUBLISH:
+			publisher = SnapshotPublisher(paths["snapshots"], store, render_public_views, SNAPSHOT_DEBOUNCE_SECONDS)
+			store.add_listener(publisher.schedule)
+			tenant.on_close(publisher.close)
+			publisher.publish_if_stale()
+		return tenant
+
+	tenant_registry = TenantRegistry(open_tenant)
+	if not TENANT_MODE:
+		# Single venue: set it up at startup, as before
+		tenant_registry.release(tenant_registry.acquire(DEFAULT_TENANT))
+
+	# ===== Backups (see backup.py; restore is CLI-only) =====
+	backups = LocalProxy(lambda: g.tenant.backups)
+
+	@app.route("/admin/backups", methods=["GET"])
+	@token_required
+	def list_backups():
+		return jsonify({"backups": backups.list()})
+
+	@app.route("/admin/backups", methods=["POST"])
+	@token_required
+	def create_backup():
+		label = (request.get_json(silent=True) or {}).get("label")
+		try:
+			manifest = backups.create(label=label)
+		except (BackupError, OSError, sqlite3.Error) as e:
+			log.exception("backup failed")
+			return jsonify({"error": f"Backup failed: {e}"}), 500
+		return jsonify(manifest), 201
+
+	@app.route("/admin/backups/<name>/verify", methods=["POST"])
+	@token_required
+	def verify_backup(name):
+		try:
+			backups.verify(name)
+		except BackupNotFound:
+			return jsonify({"error": "Backup not found"}), 404
+		except BackupError as e:
+			return jsonify({"ok": False, "error": str(e)}), 409
+		return jsonify({"ok": True, "name": name})
+
+	# ===== Media link health (see link_scanner.py) =====
+	scanner = LocalProxy(lambda: g.tenant.scanner)
+
+	@app.route("/admin/link-health", methods=["GET"])
+	@token_required
+	def link_health():
+		report = scanner.report(content_store.read(), include_ok=request.args.get("all") == "1")
+		report["last_scan"] = scanner.last_scan
+		report["scanning"] = scanner.scanning
+		return jsonify(report)
+
+	@app.route("/admin/link-health/scan", methods=["POST"])
+	@token_required
+	def scan_links():
+		# Runs in the background (one at a time per worker); GET /admin/link-health shows the results
+		if not scanner.scan_in_background(content_store.read, force=request.args.get("force") == "1"):
+			return jsonify({"error": "A link scan is already running", "scanning": True, "started": False}), 409
+		return jsonify({"scanning": True, "started": True}), 202
+
+	# ===== Health (see health.py; probes run in the background, routes only read the cache) =====
+	# Checks cover the venues open in this worker
+	def check_database():
+		for tenant in tenant_registry.open_tenants():
+			conn = sqlite3.connect(tenant.db_path, timeout=2)
+			try:
+				conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+			finally:
+				conn.close()
+		return "ok"
+
+	def check_content():
+		return {tenant.id: (tenant.content_store.read() and tenant.content_store.fingerprint)
+			for tenant in tenant_registry.open_tenants()}
+
+	def check_spool():
+		return {tenant.id: tenant.spool.stats() for tenant in tenant_registry.open_tenants()}
+
+	monitor = HealthMonitor({"sqlite": check_database, "content_store": check_content, "spool": check_spool})
+	if HEALTH_PROBES:
+		monitor.ensure_started()
+
+	def health_snapshot():
+		if HEALTH_PROBES:
+			monitor.ensure_started()
+		else:
+			monitor.run_checks()
+		return monitor.snapshot()
+
+	@app.route("/healthz", methods=["GET"])
+	def healthz():
+		return jsonify({"status": "ok", "uptime": round(time.time() - monitor.started_at, 1)})
+
+	@app.route("/readyz", methods=["GET"])
+	def readyz():
+		snapshot = health_snapshot()
+		body = {
+			"status": "ready" if snapshot["ready"] else "not ready",
+			"checks": {name: {k: r[k] for k in ("ok", "ms", "age")} for name, r in snapshot["checks"].items()},
+			"providers": {name: {k: r[k] for k in ("ok", "ms", "age", "circuit")}
+				for name, r in snapshot["providers"].items()},
+		}
+		return jsonify(body), 200 if snapshot["ready"] else 503
+
+	def provider_results(names, ok_format, fail_format):
+		providers = health_snapshot()["providers"]
+		results = {}
+		for name in names:
+			r = providers.get(name)
+			if r is None:
+				results[name] = "Not probed yet"
+			else:
+				results[name] = (ok_format if r["ok"] else fail_format).format(r["detail"]) + f" [{r['age']}s ago]"
+		return results
+
+	@app.route("/api/debug-connection", methods=["GET"])
+	@token_required
+	def debug_connection():
+		results = provider_results(["google", "cloudinary"], "Success: {}", "Failed: {}")
+		results["proxy_env"] = {
+			"http_proxy": os.environ.get("http_proxy"),
+			"HTTP_PROXY": os.environ.get("HTTP_PROXY"),
+			"https_proxy": os.environ.get("https_proxy"),
+			"HTTPS_PROXY": os.environ.get("HTTPS_PROXY")
+		}
+		return jsonify(results)
+
+	@app.route("/api/debug-connectivity", methods=["GET"])
+	@token_required
+	def api_debug_connectivity():
+		return jsonify(provider_results(["google", "cobalt", "instagram"], "OK ({})", "FAIL: {}"))
+
 	# ===== Dedicated Reels API (To fix persistence issues) =====
 	@app.route("/api/reels", methods=["GET"])
 	def get_reels():
-		print("DEBUG: Fetching reels specifically")
-		data = read_content()
 		# Return empty list if key missing, DO NOT AUTO-SEED from defaults here
-		return jsonify({"reels": data.get("reels", [])})
+		body = content_store.derived("reels", lambda data: json.dumps({"reels": read_ordered().get("reels", [])}))
+		return json_response(body)
 
 	@app.route("/api/reels", methods=["POST"])
 	@token_required
+	@idempotent
 	def create_reel():
-		print("DEBUG: Creating new reel")
 		payload = request.get_json() or {}
-		data = read_content()
-		
-		# Ensure 'reels' key exists
-		if "reels" not in data:
-			data["reels"] = []
+		with edit_content() as data:
+			# Ensure 'reels' key exists
+			if "reels" not in data:
+				data["reels"] = []
+				
+			items = data["reels"]
+			# Robust ID generation
+			max_id = max([it.get("id", 0) for it in items], default=0)
+			payload["id"] = max_id + 1
+			if not ordering.valid_key(payload.get("position")):
+				payload["position"] = ordering.next_position(items)
 			
-		items = data["reels"]
-		# Robust ID generation
-		max_id = max([it.get("id", 0) for it in items], default=0)
-		payload["id"] = max_id + 1
-		
-		items.append(payload)
-		data["reels"] = items
-		write_content(data)
+			items.append(payload)
+			data["reels"] = items
+			write_content(data)
+		log.info("reel created", reel_id=payload["id"])
 		
 		return jsonify(payload), 201
 
@@ -567,44 +1042,111 @@ def create_app():
 	@app.route("/api/reels/<int:reel_id>", methods=["DELETE"])
 	@token_required
 	def delete_reel(reel_id):
-		print(f"DEBUG: Deleting reel {reel_id}")
-		data = read_content()
-		items = data.get("reels", [])
-		
-		initial_len = len(items)
-		# Filter out the item
-		items = [it for it in items if str(it.get("id")) != str(reel_id)]
-		
-		if len(items) == initial_len:
-			return jsonify({"error": "Reel not found"}), 404
+		log.debug("deleting reel", reel_id=reel_id)
+		with edit_content() as data:
+			items = data.get("reels", [])
+			
+			initial_len = len(items)
+			# Filter out the item
+			items = [it for it in items if str(it.get("id")) != str(reel_id)]
 			
-		data["reels"] = items
-		write_content(data)
+			if len(items) == initial_len:
+				return jsonify({"error": "Reel not found"}), 404
+				
+			data["reels"] = items
+			write_content(data)
 		return jsonify({"ok": True})
 
 
 	@app.route("/api/reels/<int:reel_id>", methods=["PUT"])
 	@token_required
 	def update_reel(reel_id):
-		print(f"DEBUG: Updating reel {reel_id}")
-		data = read_content()
-		items = data.get("reels", [])
-		
-		idx = find_item_by_id(items, reel_id)
-		if idx is None:
-			return jsonify({"error": "Reel not found"}), 404
-			
+		log.debug("updating reel", reel_id=reel_id)
 		payload = request.get_json() or {}
-		payload["id"] = reel_id # Ensure ID is preserved
-		items[idx] = payload
-		
-		data["reels"] = items
-		write_content(data)
+		with edit_content() as data:
+			items = data.get("reels", [])
+			
+			idx = find_item_by_id(items, reel_id)
+			if idx is None:
+				return jsonify({"error": "Reel not found"}), 404
+				
+			payload["id"] = reel_id # Ensure ID is preserved
+			if not ordering.valid_key(payload.get("position")) and "position" in items[idx]:
+				payload["position"] = items[idx]["position"]
+			items[idx] = payload
+			
+			data["reels"] = items
+			write_content(data)
 		return jsonify(payload)
 
 	@app.route("/api/content", methods=["GET"])
 	def api_get_content():
-		return jsonify(read_content())
+		# Read the version first: content can only be newer, so deltas from it never miss a change
+		version = ChangeFeed.latest(get_db())
+		try:
+			view = request.args.get("view") or None
+			sections = content_views.parse_names(request.args.get("sections"))
+			fields = content_views.parse_names(request.args.get("fields"))
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		if view is None and sections is None and fields is None:
+			body = content_store.derived("content", lambda data: json.dumps(read_ordered()))
+		else:
+			key = f"content:{view}:{','.join(sections or ())}:{','.join(fields or ())}"
+			try:
+				body = content_store.derived(
+					key, lambda data: json.dumps(content_views.project(read_ordered(), view, sections, fields))
+				)
+			except ValueError as e:
+				return jsonify({"error": str(e)}), 400
+		resp = json_response(body)
+		resp.headers["X-Content-Version"] = str(version)
+		return resp
+
+	@app.route("/api/content/changes", methods=["GET"])
+	def api_content_changes():
+		since = request.args.get("since", type=int)
+		if since is None:
+			return jsonify({"error": "since (integer version) is required"}), 400
+		# Long-poll: ?wait=SECONDS holds the request until something changes (bounded, see change_feed.py)
+		changes.wait(get_db(), since, request.args.get("wait", 0, type=float))
+		return jsonify(changes.content_delta(get_db(), since, read_content))
+
+	@app.route("/api/changes", methods=["GET"])
+	def api_changes():
+		since = request.args.get("since", type=int)
+		if since is None:
+			return jsonify({"error": "since (integer version) is required"}), 400
+		# Inquiry events only for admins; a bad or missing token just hides them
+		include_private = "Authorization" in request.headers and authenticate() is None
+		collections = [c for c in request.args.get("collections", "").split(",") if c]
+		changes.wait(get_db(), since, request.args.get("wait", 0, type=float))
+		return jsonify(changes.events(get_db(), since, collections, include_private))
+
+	@app.route("/api/search", methods=["GET"])
+	def api_search():
+		q = request.args.get("q", "").strip()
+		if not q:
+			return jsonify({"error": "q is required"}), 400
+		# search() clamps both to their valid ranges
+		limit = request.args.get("limit", 20, type=int)
+		offset = request.args.get("offset", 0, type=int)
+		collections = None
+		if request.args.get("collection"):
+			slugs = {slug: key for key, slug in SEARCHABLE.items()}
+			collections = [slugs.get(c, c) for c in request.args.get("collection").split(",")]
+
+		data = read_content()
+		search_index.ensure_current(data, content_store.fingerprint)
+		result = search_index.search(q, collections=collections, limit=limit, offset=offset)
+
+		# Attach the current item so the frontend can render cards directly
+		for hit in result["results"]:
+			items = data.get(hit["collection"], [])
+			idx = find_item_by_id(items, hit["id"])
+			hit["item"] = items[idx] if idx is not None else None
+		result["query"] = q
+		return jsonify(result)
 
 	@app.route("/api/debug-headers", methods=["GET", "POST"])
 	def api_debug_headers():
@@ -612,32 +1154,6 @@ def create_app():
 		headers = {k: v for k, v in request.headers.items()}
 		return jsonify({"headers": headers, "remote_addr": request.remote_addr})
 
-	@app.route("/api/debug-connectivity", methods=["GET"])
-	def api_debug_connectivity():
-		results = {}
-		
-		# Test 1: Google (Usually whitelisted)
-		try:
-			r = requests.get("https://www.google.com", timeout=5)
-			results["google"] = f"OK ({r.status_code})"
-		except Exception as e:
-			results["google"] = f"FAIL: {str(e)}"
-			
-		# Test 2: Cobalt (Alternative API)
-		try:
-			r = requests.get("https://api.cobalt.tools", timeout=5)
-			results["cobalt"] = f"OK ({r.status_code})"
-		except Exception as e:
-			results["cobalt"] = f"FAIL: {str(e)}"
-			
-		# Test 3: Instagram (Direct check)
-		try:
-			r = requests.get("https://www.instagram.com", timeout=5)
-			results["instagram"] = f"OK ({r.status_code})"
-		except Exception as e:
-			results["instagram"] = f"FAIL: {str(e)}"
-
-		return jsonify(results)
 
 	@app.route("/api/login", methods=["POST"])
 	def api_login():
@@ -660,8 +1176,7 @@ def create_app():
 			stored_hash = row[1]
 			if not check_password_hash(stored_hash, password):
 				return jsonify({"error": "Invalid credentials"}), 401
-			token = create_token(admin_id)
-			return jsonify({"token": token})
+			return session_response(admin_id)
 
 		# No username: try to find any admin that matches the password
 		cur.execute("SELECT id, password FROM admins")
@@ -670,8 +1185,7 @@ def create_app():
 			admin_id = row[0]
 			stored_hash = row[1]
 			if check_password_hash(stored_hash, password):
-				token = create_token(admin_id)
-				return jsonify({"token": token})
+				return session_response(admin_id)
 
 		# Also allow matching against ADMIN_PASSWORD env var for convenience
 		env_pass = os.environ.get("ADMIN_PASSWORD")
@@ -681,8 +1195,7 @@ def create_app():
 			cur.execute("SELECT id FROM admins WHERE username = ?", (admin_user,))
 			row = cur.fetchone()
 			admin_id = row[0] if row else 1
-			token = create_token(admin_id)
-			return jsonify({"token": token})
+			return session_response(admin_id)
 
 		return jsonify({"error": "Invalid credentials"}), 401
 
@@ -694,6 +1207,55 @@ def create_app():
 
 	# api_collection and api_item moved to end of file to prevent route shadowing
 
+	def cloudinary_video_upload_request():
+		"""Signed direct-upload URL and form fields for a Cloudinary video upload."""
+		cloud_name = os.environ.get("CLOUDINARY_CLOUD_NAME")
+		api_key = os.environ.get("CLOUDINARY_API_KEY")
+		api_secret = os.environ.get("CLOUDINARY_API_SECRET")
+		
+		timestamp = int(time.time())
+		params_to_sign = {"timestamp": timestamp}
+		signature = cloudinary.utils.api_sign_request(params_to_sign, api_secret)
+		
+		payload = {
+			"api_key": api_key,
+			"timestamp": timestamp,
+			"signature": signature
+		}
+		return f"https://api.cloudinary.com/v1_1/{cloud_name}/video/upload", payload
+
+	class UploadFailed(Exception):
+		pass
+
+	def imgbb_upload(filename, data, content_type):
+		"""Upload one image to ImgBB and return its display URL (raises UploadFailed)."""
+		resp = get_client("imgbb").post(
+			IMGBB_UPLOAD_URL,
+			files={"image": (filename, data, content_type)},
+			params={"key": os.environ.get("IMGBB_API_KEY")},
+		)
+		return imgbb_result(resp)
+
+	def imgbb_result(resp):
+		if resp.status_code != 200:
+			log.error("ImgBB upload failed", status=resp.status_code, body=resp.text[:500])
+			raise UploadFailed(f"Failed to upload to external provider: {resp.text}")
+		result = resp.json()
+		if not result.get("success"):
+			raise UploadFailed("External provider reported failure")
+		# Return the direct display URL
+		return result["data"]["url"]
+
+	def image_variants(file):
+		"""Variants for an uploaded image, or None to upload the original as-is."""
+		data = file.read()
+		if image_pipeline.handles(file.content_type):
+			try:
+				return data, image_pipeline.build_variants(data)
+			except image_pipeline.ImageError as e:
+				log.warning("image pipeline skipped, uploading original", error=str(e))
+		return data, None
+
 	@app.route("/api/upload", methods=["POST"])
 	@token_required
 	def upload_file():
@@ -709,96 +1271,59 @@ def create_app():
 			
 			if is_video:
 				# Upload video to Cloudinary using direct Request (Bypassing SDK to force Proxy)
-				import time
-				import cloudinary.utils
-				
-				# Save temporarily
-				filename = f"{uuid.uuid4()}_{file.filename}"
-				filepath = os.path.join(STATIC_REELS_DIR, filename)
-				file.save(filepath)
-				
-				try:
-					# Prepare Direct Upload
-					cloud_name = os.environ.get("CLOUDINARY_CLOUD_NAME")
-					api_key = os.environ.get("CLOUDINARY_API_KEY")
-					api_secret = os.environ.get("CLOUDINARY_API_SECRET")
+				# Spooled temporarily; the spool removes the file however this block exits
+				with spool.transfer(file.filename, request.content_length) as spooled:
+					file.save(spooled)
+					spooled.close()
+					upload_url, payload = cloudinary_video_upload_request()
+					log.debug("starting direct Cloudinary upload", filename=file.filename, bytes=spooled.bytes)
 					
-					timestamp = int(time.time())
-					params_to_sign = {"timestamp": timestamp}
-					signature = cloudinary.utils.api_sign_request(params_to_sign, api_secret)
-					
-					payload = {
-						"api_key": api_key,
-						"timestamp": timestamp,
-						"signature": signature
-					}
-					
-					# Explicit Proxy for PythonAnywhere
-					proxies = {
-						"http": "http://proxy.server:3128",
-						"https": "http://proxy.server:3128"
-					}
-					
-					print(f"DEBUG: Starting direct upload to Cloudinary for {filename}")
-					
-					with open(filepath, "rb") as f:
-						files = {"file": f}
-						upload_url = f"https://api.cloudinary.com/v1_1/{cloud_name}/video/upload"
-						
+					with open(spooled.path, "rb") as f:
+						files = {"file": (file.filename, f)}
 						# Force proxy usage
-						resp = requests.post(upload_url, data=payload, files=files, proxies=proxies, timeout=600)
+						resp = get_client("cloudinary").post(upload_url, data=payload, files=files, proxies=PA_PROXIES)
 						
 					if resp.status_code != 200:
-						print(f"Cloudinary Direct Upload Failed: {resp.text}")
+						log.error("Cloudinary direct upload failed", status=resp.status_code, body=resp.text[:500])
 						return jsonify({"error": f"Cloudinary Upload Failed: {resp.text}"}), 500
 						
 					result = resp.json()
 					cloudinary_url = result.get("secure_url")
 					return jsonify({"url": cloudinary_url})
 
-				finally:
-					# Clean up
-					if os.path.exists(filepath):
-						os.remove(filepath)
-
 			else:
 				# Image upload (ImgBB)
 				api_key = os.environ.get("IMGBB_API_KEY")
 				if not api_key:
 					return jsonify({"error": "Server configuration error: Missing IMGBB_API_KEY"}), 500
 
-				# ImgBB API expects 'image' field
-				files = {"image": (file.filename, file.read(), file.content_type)}
-				params = {"key": api_key}
-				resp = requests.post("https://api.imgbb.com/1/upload", files=files, params=params)
-				
-				if resp.status_code != 200:
-					print(f"ImgBB Error: {resp.text}")
-					return jsonify({"error": f"Failed to upload to external provider: {resp.text}"}), 502
-				
-				result = resp.json()
-				if not result.get("success"):
-					return jsonify({"error": "External provider reported failure"}), 502
-					
-				# Return the direct display URL
-				return jsonify({"url": result["data"]["url"]})
-
+				data, variants = image_variants(file)
+				if variants is None:
+					return jsonify({"url": imgbb_upload(file.filename, data, file.content_type)})
+				uploaded = image_pipeline.upload_all(variants, imgbb_upload, uuid.uuid4().hex[:12])
+				return jsonify(image_pipeline.describe(uploaded))
+
+		except UploadFailed as e:
+			return jsonify({"error": str(e)}), 502
+		except SpoolFull as e:
+			return spool_full_response(e)
+		except CircuitOpenError as e:
+			log.warning("upload provider unavailable", error=str(e))
+			return jsonify({"error": f"Upload provider temporarily unavailable: {str(e)}"}), 503
 		except Exception as e:
-			print(f"Upload exception: {e}")
-			import traceback
-			traceback.print_exc()
+			log.exception("upload failed")
 			return jsonify({"error": f"Internal upload error: {str(e)}"}), 500
 
 	@app.route("/api/settings", methods=["POST"])
 	@token_required
 	def update_settings():
 		payload = request.get_json() or {}
-		data = read_content()
-		# Merge settings
-		current_settings = data.get("settings", {})
-		current_settings.update(payload)
-		data["settings"] = current_settings
-		write_content(data)
+		with edit_content() as data:
+			# Merge settings
+			current_settings = data.get("settings", {})
+			current_settings.update(payload)
+			data["settings"] = current_settings
+			write_content(data)
 		return jsonify(current_settings)
 
 	@app.route("/api/fetch-reel", methods=["POST"])
@@ -811,73 +1336,71 @@ def create_app():
 
 		# Clean URL (remove query params) to improve success rate
 		clean_url = url.split("?")[0]
-		print(f"DEBUG: Cleaned URL: {clean_url}")
 
 		# METHOD 1: Cobalt API (Primary - Best for Server Environments)
 		try:
-			print(f"DEBUG: Attempting Cobalt API for {clean_url}")
+			log.debug("attempting Cobalt API", url=clean_url)
 			headers = {
 				"Accept": "application/json",
 				"Content-Type": "application/json",
 				"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 			}
 			cobalt_payload = {"url": clean_url}
-			cobalt_resp = requests.post("https://api.cobalt.tools/api/json", json=cobalt_payload, headers=headers, timeout=15)
+			cobalt_resp = get_client("cobalt").post("https://api.cobalt.tools/api/json", json=cobalt_payload, headers=headers)
 			
 			if cobalt_resp.status_code == 200:
 				c_data = cobalt_resp.json()
 				download_link = c_data.get("url")
 				
 				if download_link:
-					print(f"DEBUG: Cobalt success. Downloading video...")
-					c_video = requests.get(download_link, stream=True)
-					
-					filename = f"{uuid.uuid4()}_cobalt.mp4"
-					filepath = os.path.join(STATIC_REELS_DIR, filename)
-					
-					with open(filepath, 'wb') as f:
-						for chunk in c_video.iter_content(chunk_size=8192):
-							f.write(chunk)
-							
-					# Upload to Cloudinary
-					upload_result = cloudinary.uploader.upload(filepath, resource_type="video")
+					log.debug("Cobalt resolved download link, downloading video")
+					# Spooled temporarily; removed even when the download or Cloudinary upload raises
+					with spool.transfer("cobalt.mp4") as spooled:
+						with get_client("cobalt_media").get(download_link, stream=True) as c_video:
+							for chunk in c_video.iter_content(chunk_size=65536):
+								spooled.write(chunk)
+						spooled.close()
+
+						# Upload to Cloudinary
+						upload_result = get_client("cloudinary").guard(
+							cloudinary.uploader.upload, spooled.path, resource_type="video"
+						)
 					cloudinary_url = upload_result.get("secure_url")
 					thumbnail_url = cloudinary_url.rsplit('.', 1)[0] + '.jpg'
-					
-					if os.path.exists(filepath):
-						os.remove(filepath)
 						
 					return jsonify({"url": cloudinary_url, "thumbnail": thumbnail_url, "embedUrl": url})
 			else:
-				print(f"DEBUG: Cobalt failed {cobalt_resp.status_code}: {cobalt_resp.text}")
+				log.warning("Cobalt request failed", status=cobalt_resp.status_code, body=cobalt_resp.text[:500])
 					
 		except Exception as e:
-			print(f"Cobalt API failed: {e}")
+			log.warning("Cobalt API failed", error=str(e))
 
 		# METHOD 2: yt-dlp REMOVED (Caused rate-limit errors and delay on PythonAnywhere)
 		# If Cobalt fails, we go straight to Link Fallback (Client-side Embed).
 
 		# FINAL FALLBACK: Link Only (Iframe)
-		print("DEBUG: Download failed. Using fallback link.")
-		return jsonify({
+		log.info("reel download failed, using fallback link", url=url)
+		return jsonify(reel_fallback(url))
+
+	def reel_fallback(url):
+		return {
 			"url": url, 
 			"thumbnail": "https://images.unsplash.com/photo-1611162617474-5b21e879e113?q=80&w=400", 
 			"embedUrl": url,
 			"fallback": True
-		})
+		}
 
 	@app.route("/static/reels/<path:filename>")
 	def serve_reel(filename):
-		return send_from_directory(STATIC_REELS_DIR, filename)
+		return send_from_directory(g.tenant.paths["reels"], filename)
 
-	@app.route("/api/<resource>", methods=["POST", "GET"])
+	@app.route("/api/<resource>", methods=["GET"])
 	def api_collection(resource):
 		mapped = resource_map.get(resource)
 		if not mapped:
 			return jsonify({"error": "Unknown resource"}), 404
-		data = read_content()
 		if request.method == "GET":
-			items = data.get(mapped, [])
+			items = read_ordered().get(mapped, [])
 			# Generic filtering support (e.g. ?date=2023-10-27)
 			args = request.args
 			if args:
@@ -886,19 +1409,25 @@ def create_app():
 					if all(str(item.get(k)) == v for k, v in args.items())
 				]
 			return jsonify({mapped: items})
-		# POST -> create (protected)
-		auth = token_required(lambda: None)
-		resp = auth()
-		if isinstance(resp, tuple) and resp[1] >= 400:
-			return resp
+
+	@app.route("/api/<resource>", methods=["POST"])
+	@token_required
+	@idempotent
+	def api_create_item(resource):
+		mapped = resource_map.get(resource)
+		if not mapped:
+			return jsonify({"error": "Unknown resource"}), 404
 		payload = request.get_json() or {}
-		items = data.get(mapped, [])
-		# assign id
-		max_id = max([it.get("id", 0) for it in items], default=0)
-		payload["id"] = max_id + 1
-		items.append(payload)
-		data[mapped] = items
-		write_content(data)
+		with edit_content() as data:
+			items = data.get(mapped, [])
+			# assign id
+			max_id = max([it.get("id", 0) for it in items], default=0)
+			payload["id"] = max_id + 1
+			if not ordering.valid_key(payload.get("position")):
+				payload["position"] = ordering.next_position(items)
+			items.append(payload)
+			data[mapped] = items
+			write_content(data)
 		return jsonify(payload), 201
 
 	@app.route("/api/<resource>/<int:item_id>", methods=["PUT", "DELETE"]) 
@@ -911,24 +1440,48 @@ def create_app():
 		resp = auth()
 		if isinstance(resp, tuple) and resp[1] >= 400:
 			return resp
-		data = read_content()
-		items = data.get(mapped, [])
-		idx = find_item_by_id(items, item_id)
-		if idx is None:
-			return jsonify({"error": "Not found"}), 404
-		if request.method == "DELETE":
-			items.pop(idx)
+		payload = (request.get_json() or {}) if request.method == "PUT" else None
+		with edit_content() as data:
+			items = data.get(mapped, [])
+			idx = find_item_by_id(items, item_id)
+			if idx is None:
+				return jsonify({"error": "Not found"}), 404
+			if request.method == "DELETE":
+				items.pop(idx)
+				data[mapped] = items
+				write_content(data)
+				return jsonify({"ok": True})
+			# PUT -> update
+			payload["id"] = item_id
+			if not ordering.valid_key(payload.get("position")) and "position" in items[idx]:
+				payload["position"] = items[idx]["position"]
+			items[idx] = payload
 			data[mapped] = items
 			write_content(data)
-			return jsonify({"ok": True})
-		# PUT -> update
-		payload = request.get_json() or {}
-		payload["id"] = item_id
-		items[idx] = payload
-		data[mapped] = items
-		write_content(data)
 		return jsonify(payload)
 
+	@app.route("/api/<resource>/<int:item_id>/move", methods=["POST"])
+	@token_required
+	def api_move_item(resource, item_id):
+		"""Reorder one item: ``?before=<id>`` places it before that item, no ``before`` places it last."""
+		mapped = content_collection(resource)
+		if not mapped:
+			return jsonify({"error": "Unknown resource"}), 404
+		before = request.args.get("before")
+		if before is not None and not before.isdigit():
+			return jsonify({"error": "before must be an item id"}), 400
+		with edit_content() as data:
+			items = data.get(mapped, [])
+			try:
+				item = ordering.move(items, item_id, int(before) if before is not None else None)
+			except KeyError:
+				return jsonify({"error": f"Item {before} not found"}), 400
+			if item is None:
+				return jsonify({"error": "Not found"}), 404
+			data[mapped] = items
+			write_content(data)
+		return jsonify(item)
+
 	return app
 
 
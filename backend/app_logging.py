@@ -0,0 +1,183 @@
+"""Structured, non-blocking logging for the Flask backend.
+
+Request handlers only ever enqueue a record; a QueueListener thread does the
+formatting and stdout I/O. Configure with env vars:
+
+    LOG_LEVEL        DEBUG / INFO / WARNING ... (default INFO)
+    LOG_FORMAT       json (default) or text
+    LOG_SAMPLE_RATE  fraction of DEBUG/INFO records kept (default 1.0)
+    LOG_QUEUE_SIZE   max pending records before new ones are dropped (default 10000)
+
+Usage:
+    from app_logging import get_logger
+    log = get_logger(__name__)
+    log.info("reel created", reel_id=3)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+_listener = None
+_loggers = {}
+_debug_enabled = False
+
+
+class JsonFormatter(logging.Formatter):
+	def format(self, record):
+		entry = {
+			"ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+			"level": record.levelname,
+			"logger": record.name,
+			"msg": record.getMessage(),
+		}
+		fields = getattr(record, "fields", None)
+		if fields:
+			entry.update(fields)
+		if record.exc_text:
+			entry["exc"] = record.exc_text
+		return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+	def format(self, record):
+		line = super().format(record)
+		fields = getattr(record, "fields", None)
+		if fields:
+			line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+		return line
+
+
+class SamplingFilter(logging.Filter):
+	"""Keeps a random fraction of DEBUG/INFO records; WARNING and above always pass."""
+
+	def __init__(self, rate):
+		super().__init__()
+		self.rate = rate
+
+	def filter(self, record):
+		if record.levelno >= logging.WARNING or self.rate >= 1.0:
+			return True
+		return random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+	"""QueueHandler that drops records instead of blocking when the queue is full."""
+
+	dropped = 0
+
+	def prepare(self, record):
+		# Render the message and traceback here so the record is safe to hand
+		# to another thread, but leave the JSON/text formatting to the listener.
+		record = logging.makeLogRecord(record.__dict__)
+		record.msg = record.getMessage()
+		record.args = None
+		if record.exc_info:
+			record.exc_text = logging.Formatter().formatException(record.exc_info)
+			record.exc_info = None
+		return record
+
+	def enqueue(self, record):
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			DroppingQueueHandler.dropped += 1
+
+
+def _noop(*args, **kwargs):
+	pass
+
+
+class StructLogger:
+	"""Thin wrapper that turns keyword arguments into structured fields.
+
+	``debug`` is bound to a no-op when DEBUG is disabled, so disabled debug
+	calls cost one empty function call and never build a record.
+	"""
+
+	def __init__(self, name):
+		self._logger = logging.getLogger(name)
+		self._bind()
+
+	def _bind(self):
+		self.debug = self._debug if _debug_enabled else _noop
+
+	def _log(self, level, msg, fields, exc_info=False):
+		if self._logger.isEnabledFor(level):
+			self._logger.log(level, msg, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+	def _debug(self, msg, **fields):
+		self._log(logging.DEBUG, msg, fields)
+
+	def info(self, msg, **fields):
+		self._log(logging.INFO, msg, fields)
+
+	def warning(self, msg, **fields):
+		self._log(logging.WARNING, msg, fields)
+
+	def error(self, msg, **fields):
+		self._log(logging.ERROR, msg, fields)
+
+	def exception(self, msg, **fields):
+		self._log(logging.ERROR, msg, fields, exc_info=True)
+
+
+def get_logger(name):
+	logger = _loggers.get(name)
+	if logger is None:
+		logger = _loggers[name] = StructLogger(name)
+	return logger
+
+
+def configure_logging(level=None, fmt=None, sample_rate=None, queue_size=None):
+	"""Install the queue handler on the root logger (idempotent)."""
+	global _listener, _debug_enabled
+
+	level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+	fmt = fmt or os.environ.get("LOG_FORMAT", "json")
+	if sample_rate is None:
+		sample_rate = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))
+	if queue_size is None:
+		queue_size = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+	if _listener is not None:
+		_listener.stop()
+
+	stream = logging.StreamHandler(sys.stdout)
+	if fmt == "text":
+		stream.setFormatter(TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+	else:
+		stream.setFormatter(JsonFormatter())
+
+	q = queue.Queue(maxsize=queue_size)
+	handler = DroppingQueueHandler(q)
+	handler.addFilter(SamplingFilter(sample_rate))
+
+	root = logging.getLogger()
+	for h in list(root.handlers):
+		if isinstance(h, logging.handlers.QueueHandler):
+			root.removeHandler(h)
+	root.addHandler(handler)
+	root.setLevel(level)
+
+	_listener = logging.handlers.QueueListener(q, stream, respect_handler_level=False)
+	_listener.start()
+
+	_debug_enabled = root.isEnabledFor(logging.DEBUG)
+	for logger in _loggers.values():
+		logger._bind()
+
+
+def shutdown_logging():
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		_listener = None
+
+
+atexit.register(shutdown_logging)
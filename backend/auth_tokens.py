@@ -0,0 +1,114 @@
+"""Rotating refresh tokens for admin sessions.
+
+Login (one password hash check) returns a short-lived access JWT plus an
+opaque refresh token. ``/api/token/refresh`` trades a refresh token for a new
+pair with one indexed lookup and one HMAC, so sessions stay alive without
+re-running the password KDF.
+
+Only an HMAC of each refresh token is stored. Every refresh token is
+single-use: presenting one that was already rotated is treated as theft and
+revokes its whole family (every token descended from the same login).
+"""
+import hashlib
+import hmac
+import os
+import random
+import secrets
+import time
+
+ACCESS_TOKEN_MINUTES = int(os.environ.get("ACCESS_TOKEN_MINUTES", "15"))
+REFRESH_TOKEN_DAYS = int(os.environ.get("REFRESH_TOKEN_DAYS", "14"))
+
+SCHEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS refresh_tokens (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		admin_id INTEGER NOT NULL,
+		token_hash TEXT NOT NULL UNIQUE,
+		family TEXT NOT NULL,
+		expires_at REAL NOT NULL,
+		revoked_at REAL,
+		created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+	)
+	""",
+	"CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family)",
+	"CREATE INDEX IF NOT EXISTS idx_refresh_tokens_admin ON refresh_tokens (admin_id)",
+]
+
+
+class TokenError(Exception):
+	"""The refresh token is unknown, expired, revoked or reused."""
+
+
+def init_schema(cur):
+	for ddl in SCHEMA:
+		cur.execute(ddl)
+
+
+def _digest(secret_key, token):
+	return hmac.new(secret_key.encode("utf-8"), token.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def issue(conn, secret_key, admin_id, family=None):
+	"""New refresh token for ``admin_id`` (a new family unless rotating); caller commits."""
+	token = secrets.token_urlsafe(32)
+	now = time.time()
+	conn.execute(
+		"INSERT INTO refresh_tokens (admin_id, token_hash, family, expires_at) VALUES (?, ?, ?, ?)",
+		(admin_id, _digest(secret_key, token), family or secrets.token_hex(8), now + REFRESH_TOKEN_DAYS * 86400),
+	)
+	if random.random() < 0.01:
+		conn.execute("DELETE FROM refresh_tokens WHERE expires_at < ?", (now,))
+	return token
+
+
+def rotate(conn, secret_key, token):
+	"""Consume ``token`` and return (admin_id, replacement token); raises TokenError. Caller commits."""
+	if not isinstance(token, str) or not token:
+		raise TokenError("Invalid refresh token")
+	now = time.time()
+	row = conn.execute(
+		"SELECT id, admin_id, family, expires_at, revoked_at FROM refresh_tokens WHERE token_hash = ?",
+		(_digest(secret_key, token),),
+	).fetchone()
+	if row is None:
+		raise TokenError("Invalid refresh token")
+	token_id, admin_id, family, expires_at, revoked_at = row
+	if revoked_at is not None:
+		# Already used once: someone else holds a copy, end every session of this login
+		conn.execute(
+			"UPDATE refresh_tokens SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL", (now, family)
+		)
+		conn.commit()
+		raise TokenError("Refresh token reused; session revoked")
+	if expires_at < now:
+		raise TokenError("Refresh token expired")
+	cur = conn.execute(
+		"UPDATE refresh_tokens SET revoked_at = ? WHERE id = ? AND revoked_at IS NULL", (now, token_id)
+	)
+	if cur.rowcount != 1:
+		# Lost a race with a concurrent refresh of the same token
+		raise TokenError("Refresh token already used")
+	return admin_id, issue(conn, secret_key, admin_id, family)
+
+
+def revoke(conn, secret_key, token):
+	"""Revoke the family ``token`` belongs to (logout); returns whether it was known."""
+	if not isinstance(token, str) or not token:
+		return False
+	row = conn.execute(
+		"SELECT family FROM refresh_tokens WHERE token_hash = ?", (_digest(secret_key, token),)
+	).fetchone()
+	if row is None:
+		return False
+	conn.execute(
+		"UPDATE refresh_tokens SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL", (time.time(), row[0])
+	)
+	return True
+
+
+def revoke_all(conn, admin_id):
+	cur = conn.execute(
+		"UPDATE refresh_tokens SET revoked_at = ? WHERE admin_id = ? AND revoked_at IS NULL", (time.time(), admin_id)
+	)
+	return cur.rowcount
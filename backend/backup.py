@@ -0,0 +1,291 @@
+"""Online backups of data.db and content.json.
+
+``data.db`` is copied with SQLite's online backup API ``BACKUP_PAGES_PER_STEP``
+pages at a time, pausing ``BACKUP_STEP_SLEEP`` seconds after each step (in
+the progress callback: the API's own ``sleep`` argument only applies when a
+step finds the database busy), so bookings and inquiries keep committing while a
+backup runs (a write during the copy makes SQLite restart it; see
+``copy_database`` for how that is bounded). ``content.json`` is copied under the content store's lock, so the
+snapshot is never half of an edit. Each backup is a directory
+
+    backups/20250101T093000Z-1a2b3c/
+        data.db
+        content.json
+        manifest.json     # sha256 + size of every file, integrity check result
+
+written under a temporary name and renamed when complete. Retention keeps the
+``BACKUP_KEEP_LAST`` newest backups plus the newest of each of the last
+``BACKUP_KEEP_DAILY`` days. ``restore`` refuses a backup whose checksums don't
+match and takes a safety backup of the current state first.
+
+    python backup.py [--tenant ID] create | list | verify NAME | restore NAME --yes | prune
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+
+from app_logging import get_logger
+from tenants import DEFAULT_TENANT, tenant_paths
+
+log = get_logger("backup")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKUP_DIR = os.environ.get("BACKUP_DIR") or os.path.join(BASE_DIR, "backups")
+BACKUP_PAGES_PER_STEP = int(os.environ.get("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.environ.get("BACKUP_STEP_SLEEP", "0.01"))
+BACKUP_MAX_RESTARTS = int(os.environ.get("BACKUP_MAX_RESTARTS", "5"))
+BACKUP_KEEP_LAST = int(os.environ.get("BACKUP_KEEP_LAST", "7"))
+BACKUP_KEEP_DAILY = int(os.environ.get("BACKUP_KEEP_DAILY", "30"))
+
+DB_FILE = "data.db"
+CONTENT_FILE = "content.json"
+MANIFEST_FILE = "manifest.json"
+_NAME_RE = re.compile(r"^\d{8}T\d{6}Z-[0-9a-f]{6}$")
+
+
+class BackupError(Exception):
+	"""The backup is unknown, incomplete or fails verification."""
+
+
+class BackupNotFound(BackupError):
+	pass
+
+
+def sha256_file(path):
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+class _Restarted(Exception):
+	pass
+
+
+def copy_database(src_path, dst_path, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP,
+		max_restarts=BACKUP_MAX_RESTARTS):
+	"""Page-stepped online copy of ``src_path``; returns the copy's ``PRAGMA quick_check`` result.
+
+	Every commit by another connection restarts a stepped copy, so under a
+	steady stream of writes it might never finish; after ``max_restarts`` the
+	rest is copied in one step (a read lock held for one pass over the file).
+	"""
+	seen = {"remaining": None, "restarts": 0}
+
+	def progress(status, remaining, total):
+		if seen["remaining"] is not None and remaining > seen["remaining"]:
+			seen["restarts"] += 1
+			if seen["restarts"] > max_restarts:
+				raise _Restarted()
+		seen["remaining"] = remaining
+		if remaining and sleep:
+			# Runs between steps, with no lock held on the source: writers get their turn here
+			time.sleep(sleep)
+
+	src = sqlite3.connect(src_path, timeout=30)
+	dst = sqlite3.connect(dst_path)
+	try:
+		try:
+			src.backup(dst, pages=pages, progress=progress)
+		except _Restarted:
+			log.info("backup kept restarting under writes, finishing in one step", restarts=seen["restarts"])
+			src.backup(dst, pages=-1)
+		return dst.execute("PRAGMA quick_check").fetchone()[0]
+	finally:
+		dst.close()
+		src.close()
+
+
+class BackupManager:
+	def __init__(self, db_path, content_store, directory=BACKUP_DIR,
+			keep_last=BACKUP_KEEP_LAST, keep_daily=BACKUP_KEEP_DAILY):
+		self.db_path = db_path
+		self.content_store = content_store
+		self.directory = directory
+		self.keep_last = keep_last
+		self.keep_daily = keep_daily
+		os.makedirs(directory, exist_ok=True)
+
+	def _path(self, name):
+		if not _NAME_RE.match(name or ""):
+			raise BackupNotFound(f"invalid backup name: {name}")
+		path = os.path.join(self.directory, name)
+		if not os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+			raise BackupNotFound(f"backup not found: {name}")
+		return path
+
+	def manifest(self, name):
+		with open(os.path.join(self._path(name), MANIFEST_FILE), encoding="utf-8") as f:
+			return json.load(f)
+
+	def list(self):
+		"""Manifests of complete backups, newest first."""
+		result = []
+		for name in sorted(os.listdir(self.directory), reverse=True):
+			if not _NAME_RE.match(name):
+				continue
+			try:
+				result.append(self.manifest(name))
+			except (BackupError, OSError, json.JSONDecodeError):
+				continue
+		return result
+
+	def create(self, label=None):
+		"""Take a backup and apply retention; returns its manifest."""
+		started = time.time()
+		name = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(started))}-{os.urandom(3).hex()}"
+		tmp = os.path.join(self.directory, f".tmp-{name}")
+		os.makedirs(tmp)
+		try:
+			check = copy_database(self.db_path, os.path.join(tmp, DB_FILE))
+			if check != "ok":
+				raise BackupError(f"database copy failed quick_check: {check}")
+			with self.content_store.lock():
+				fingerprint = self.content_store.fingerprint
+				shutil.copyfile(self.content_store.path, os.path.join(tmp, CONTENT_FILE))
+			files = {
+				filename: {"sha256": sha256_file(os.path.join(tmp, filename)),
+					"bytes": os.path.getsize(os.path.join(tmp, filename))}
+				for filename in (DB_FILE, CONTENT_FILE)
+			}
+			manifest = {
+				"name": name,
+				"label": label,
+				"created_at": started,
+				"seconds": round(time.time() - started, 3),
+				"content_fingerprint": fingerprint,
+				"quick_check": check,
+				"files": files,
+			}
+			with open(os.path.join(tmp, MANIFEST_FILE), "w", encoding="utf-8") as f:
+				json.dump(manifest, f, indent=2)
+				f.flush()
+				os.fsync(f.fileno())
+			os.rename(tmp, os.path.join(self.directory, name))
+		except BaseException:
+			shutil.rmtree(tmp, ignore_errors=True)
+			raise
+		log.info("backup created", name=name, seconds=manifest["seconds"],
+			bytes=sum(f["bytes"] for f in files.values()))
+		self.prune()
+		return manifest
+
+	def verify(self, name):
+		"""Manifest of ``name`` after checking every file's checksum (raises BackupError)."""
+		path = self._path(name)
+		manifest = self.manifest(name)
+		for filename, expected in manifest["files"].items():
+			full = os.path.join(path, filename)
+			if not os.path.isfile(full):
+				raise BackupError(f"{name}: {filename} is missing")
+			if sha256_file(full) != expected["sha256"]:
+				raise BackupError(f"{name}: {filename} checksum mismatch")
+		return manifest
+
+	def restore(self, name):
+		"""Verify ``name``, back up the current state, then copy the backup over the live data."""
+		path = self._path(name)
+		manifest = self.verify(name)
+		with open(os.path.join(path, CONTENT_FILE), encoding="utf-8") as f:
+			try:
+				content = json.load(f)
+			except json.JSONDecodeError as e:
+				raise BackupError(f"{name}: content.json is not valid JSON: {e}")
+		safety = self.create(label=f"before restore of {name}")
+		# Copying into the live database takes its write lock for the duration, not file replacement,
+		# so open connections in running workers see the restored data
+		copy_database(os.path.join(path, DB_FILE), self.db_path)
+		with self.content_store.edit():
+			self.content_store.write(content)
+		log.info("backup restored", name=name, safety_backup=safety["name"])
+		return manifest
+
+	def prune(self):
+		"""Apply retention; returns the removed backup names."""
+		names = sorted((n for n in os.listdir(self.directory) if _NAME_RE.match(n)), reverse=True)
+		keep = set(names[:self.keep_last])
+		days = []
+		for name in names:
+			day = name[:8]
+			if day not in days:
+				days.append(day)
+				if len(days) <= self.keep_daily:
+					keep.add(name)
+		removed = [n for n in names if n not in keep]
+		for name in removed:
+			shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+		# Leftovers of interrupted runs
+		cutoff = time.time() - 86400
+		for entry in os.listdir(self.directory):
+			full = os.path.join(self.directory, entry)
+			if entry.startswith(".tmp-") and os.path.getmtime(full) < cutoff:
+				shutil.rmtree(full, ignore_errors=True)
+		if removed:
+			log.info("old backups removed", removed=len(removed))
+		return removed
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	parser.add_argument("--tenant", default=DEFAULT_TENANT, help="venue to operate on (multi-venue deployments)")
+	sub = parser.add_subparsers(dest="command", required=True)
+	create = sub.add_parser("create", help="take a backup now (safe while the site is running)")
+	create.add_argument("--label")
+	sub.add_parser("list", help="show backups, newest first")
+	verify = sub.add_parser("verify", help="check a backup's checksums")
+	verify.add_argument("name")
+	restore = sub.add_parser("restore", help="verify a backup and restore it over the live data")
+	restore.add_argument("name")
+	restore.add_argument("--yes", action="store_true", help="confirm overwriting the live data")
+	sub.add_parser("prune", help="apply the retention policy")
+	args = parser.parse_args(argv)
+
+	from change_feed import ChangeFeed
+	from content_store import ContentStore
+	from default_data import DEFAULT_DATA
+
+	paths = tenant_paths(args.tenant, {
+		"db": os.environ.get("DB_PATH") or os.path.join(BASE_DIR, "data.db"),
+		"content": os.path.join(BASE_DIR, "content.json"),
+		"backups": BACKUP_DIR,
+	})
+	if not os.path.isfile(paths["db"]):
+		parser.error(f"no data for tenant {args.tenant!r} ({paths['db']})")
+	db_path = paths["db"]
+	store = ContentStore(paths["content"], DEFAULT_DATA)
+	manager = BackupManager(db_path, store, paths["backups"])
+	try:
+		if args.command == "create":
+			print(json.dumps(manager.create(args.label), indent=2))
+		elif args.command == "list":
+			for m in manager.list():
+				size = sum(f["bytes"] for f in m["files"].values())
+				print(f"{m['name']}  {size:>12} bytes  {m.get('label') or ''}")
+		elif args.command == "verify":
+			manager.verify(args.name)
+			print(f"{args.name}: ok")
+		elif args.command == "restore":
+			if not args.yes:
+				parser.error("restore overwrites data.db and content.json; pass --yes to confirm")
+			# Keep delta sync/SSE clients informed; search and snapshots catch up from the fingerprint
+			store.add_listener(ChangeFeed(db_path).record_content_change)
+			manager.restore(args.name)
+			print(f"restored {args.name}")
+		elif args.command == "prune":
+			for name in manager.prune():
+				print(f"removed {name}")
+	except BackupError as e:
+		print(f"error: {e}", file=sys.stderr)
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,113 @@
+"""Data access for bookings (the SQLite ``bookings`` table is the only store).
+
+A slot is one (date, time_slot) pair; the unique index makes "is this slot
+free?" and the insert a single atomic step, so two admins can't double-book.
+Bookings that older versions kept in content.json are folded in once by
+``migrate_legacy``.
+"""
+import re
+import sqlite3
+
+from app_logging import get_logger
+
+log = get_logger("bookings")
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+COLUMNS = "id, date, time_slot, created_at"
+
+
+class SlotTaken(Exception):
+	pass
+
+
+def init_schema(cur):
+	try:
+		cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_slot ON bookings (date, time_slot)")
+	except sqlite3.IntegrityError:
+		# Pre-existing double bookings: keep them, index without the constraint
+		log.warning("duplicate booking slots found, slot uniqueness not enforced by the database")
+		cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_date_slot ON bookings (date, time_slot)")
+
+
+def validate(date, time_slot):
+	if not date or not time_slot:
+		raise ValueError("Date and time_slot required")
+	if not _DATE_RE.match(str(date)):
+		raise ValueError("date must be YYYY-MM-DD")
+
+
+def list_bookings(db, date=None):
+	if date:
+		rows = db.execute(f"SELECT {COLUMNS} FROM bookings WHERE date = ? ORDER BY time_slot", (date,))
+	else:
+		rows = db.execute(f"SELECT {COLUMNS} FROM bookings ORDER BY date, time_slot")
+	return [dict(row) for row in rows]
+
+
+def get(db, booking_id):
+	row = db.execute(f"SELECT {COLUMNS} FROM bookings WHERE id = ?", (booking_id,)).fetchone()
+	return dict(row) if row else None
+
+
+def _slot_taken(db, date, time_slot, exclude_id=None):
+	row = db.execute(
+		"SELECT id FROM bookings WHERE date = ? AND time_slot = ? AND id IS NOT ?", (date, time_slot, exclude_id)
+	).fetchone()
+	return row is not None
+
+
+def create(db, date, time_slot):
+	"""Insert and commit; returns the new id (raises ValueError / SlotTaken)."""
+	validate(date, time_slot)
+	# The explicit check covers databases where the unique index couldn't be built
+	if _slot_taken(db, date, time_slot):
+		raise SlotTaken()
+	try:
+		cur = db.execute("INSERT INTO bookings (date, time_slot) VALUES (?, ?)", (date, time_slot))
+	except sqlite3.IntegrityError:
+		db.rollback()
+		raise SlotTaken()
+	db.commit()
+	return cur.lastrowid
+
+
+def update(db, booking_id, date, time_slot):
+	"""Move a booking to another slot; returns the row or None if it doesn't exist."""
+	validate(date, time_slot)
+	if get(db, booking_id) is None:
+		return None
+	if _slot_taken(db, date, time_slot, exclude_id=booking_id):
+		raise SlotTaken()
+	try:
+		db.execute("UPDATE bookings SET date = ?, time_slot = ? WHERE id = ?", (date, time_slot, booking_id))
+	except sqlite3.IntegrityError:
+		db.rollback()
+		raise SlotTaken()
+	db.commit()
+	return get(db, booking_id)
+
+
+def delete(db, booking_id):
+	cur = db.execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
+	db.commit()
+	return cur.rowcount > 0
+
+
+def migrate_legacy(db, items):
+	"""Insert content.json bookings that aren't in the table yet; returns how many were added."""
+	added = 0
+	for item in items or []:
+		if not isinstance(item, dict):
+			continue
+		date, time_slot = item.get("date"), item.get("time_slot") or item.get("timeSlot")
+		try:
+			validate(date, time_slot)
+		except ValueError:
+			log.warning("skipping unusable legacy booking", booking=item)
+			continue
+		if _slot_taken(db, date, time_slot):
+			continue
+		db.execute("INSERT INTO bookings (date, time_slot) VALUES (?, ?)", (date, time_slot))
+		added += 1
+	db.commit()
+	return added
@@ -0,0 +1,389 @@
+"""Streaming export and batched bulk import for the SQLite tables and content collections.
+
+Exports are generators (rows are fetched ``EXPORT_FETCH`` at a time and
+encoded chunk by chunk, optionally through an on-the-fly gzip stream), so
+memory stays flat however large the table. Imports validate each row and
+load them with ``executemany`` in transactions of ``batch_size`` rows;
+rejected rows are reported with their line number instead of aborting the
+whole load.
+
+CLI (run from the backend folder; uses DB_PATH / content.json like the app):
+
+    python bulk_io.py export inquiries --format csv --gzip > inquiries.csv.gz
+    python bulk_io.py import bookings bookings.ndjson --on-conflict ignore
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+import events
+from change_feed import ChangeFeed
+
+EXPORT_FETCH = 1000
+DEFAULT_BATCH = 5000
+MAX_REPORTED_ERRORS = 50
+
+# Tables that may be exported/imported, with the fields an imported row must carry
+TABLES = {
+	"inquiries": ("name",),
+	"bookings": ("date", "time_slot"),
+	"events": (),
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# "replace" is an upsert on id (see upsert_clause), not INSERT OR REPLACE: REPLACE's implicit delete
+# skips the AFTER DELETE triggers that keep the stats rollups and change_log in step
+ON_CONFLICT = {"abort": "INSERT", "ignore": "INSERT OR IGNORE", "replace": "INSERT"}
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class BulkImportError(ValueError):
+	"""The file as a whole can't be imported (bad header, unknown table...)."""
+
+
+# ----- export -----
+
+def iter_table(conn, table):
+	"""(columns, row generator) for a whole table, in primary-key order."""
+	if table not in TABLES:
+		raise KeyError(table)
+	cur = conn.execute(f"SELECT * FROM {table} ORDER BY rowid")
+	columns = [d[0] for d in cur.description]
+
+	def rows():
+		while True:
+			batch = cur.fetchmany(EXPORT_FETCH)
+			if not batch:
+				return
+			for row in batch:
+				yield tuple(row)
+
+	return columns, rows()
+
+
+def iter_items(items):
+	"""(columns, row generator) for a content collection; nested values become JSON in CSV."""
+	columns = []
+	for item in items:
+		for key in item:
+			if key not in columns:
+				columns.append(key)
+	return columns, (tuple(item.get(c) for c in columns) for item in items)
+
+
+def encode_csv(columns, rows):
+	buf = io.StringIO()
+	writer = csv.writer(buf)
+	writer.writerow(columns)
+	for i, row in enumerate(rows, 1):
+		writer.writerow([json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v for v in row])
+		if i % EXPORT_FETCH == 0:
+			yield buf.getvalue().encode("utf-8")
+			buf.seek(0)
+			buf.truncate()
+	if buf.tell():
+		yield buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(columns, rows):
+	chunk = []
+	for row in rows:
+		chunk.append(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+		if len(chunk) >= EXPORT_FETCH:
+			yield ("\n".join(chunk) + "\n").encode("utf-8")
+			chunk = []
+	if chunk:
+		yield ("\n".join(chunk) + "\n").encode("utf-8")
+
+
+def gzip_stream(chunks, level=6):
+	compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+	for chunk in chunks:
+		out = compressor.compress(chunk)
+		if out:
+			yield out
+	yield compressor.flush()
+
+
+def export_stream(columns, rows, fmt="csv", compress=False):
+	if fmt not in FORMATS:
+		raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+	chunks = encode_csv(columns, rows) if fmt == "csv" else encode_ndjson(columns, rows)
+	return gzip_stream(chunks) if compress else chunks
+
+
+# ----- import -----
+
+def open_text(fileobj):
+	"""Binary file-like -> text stream, transparently gunzipping."""
+	if hasattr(fileobj, "peek"):
+		head = fileobj.peek(2)[:2]
+	else:
+		pos = fileobj.tell()
+		head = fileobj.read(2)
+		fileobj.seek(pos)
+	if head == b"\x1f\x8b":
+		fileobj = gzip.GzipFile(fileobj=fileobj)
+	return io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+
+
+def read_records(text, fmt):
+	"""Yield (line number, dict) from CSV or NDJSON; unparseable lines yield (line, error)."""
+	if fmt == "csv":
+		reader = csv.DictReader(text)
+		for record in reader:
+			if None in record:
+				yield reader.line_num, ValueError("more values than header columns")
+			else:
+				yield reader.line_num, record
+	elif fmt == "ndjson":
+		for line_num, line in enumerate(text, 1):
+			if not line.strip():
+				continue
+			try:
+				record = json.loads(line)
+			except json.JSONDecodeError as e:
+				yield line_num, ValueError(f"invalid JSON: {e.msg}")
+				continue
+			yield line_num, record if isinstance(record, dict) else ValueError("expected a JSON object")
+	else:
+		raise BulkImportError(f"format must be one of: {', '.join(FORMATS)}")
+
+
+def guess_format(filename, default="csv"):
+	name = (filename or "").lower()
+	if name.endswith(".gz"):
+		name = name[:-3]
+	if name.endswith((".ndjson", ".jsonl")):
+		return "ndjson"
+	if name.endswith(".csv"):
+		return "csv"
+	return default
+
+
+def table_columns(conn, table):
+	return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def clean_row(table, record, columns):
+	"""Validated column -> value dict for one imported record (raises ValueError)."""
+	unknown = [k for k in record if k not in columns]
+	if unknown:
+		raise ValueError(f"unknown column: {unknown[0]}")
+	row = {k: (None if v == "" else v) for k, v in record.items()}
+	for field in TABLES[table]:
+		if row.get(field) in (None, ""):
+			raise ValueError(f"{field} is required")
+	if row.get("id") is not None:
+		try:
+			row["id"] = int(row["id"])
+		except (TypeError, ValueError):
+			raise ValueError("id must be an integer")
+	if table == "bookings" and not _DATE_RE.match(str(row["date"])):
+		raise ValueError("date must be YYYY-MM-DD")
+	if table == "events" and "date" in row:
+		row["date"] = events.normalize_date(row["date"])
+	for key, value in row.items():
+		if isinstance(value, (list, dict)):
+			row[key] = json.dumps(value, ensure_ascii=False)
+	return row
+
+
+class ImportReport:
+	def __init__(self, table):
+		self.table = table
+		self.imported = 0
+		self.rejected = 0
+		self.errors = []
+		self.started = time.perf_counter()
+
+	def reject(self, line, error):
+		self.rejected += 1
+		if len(self.errors) < MAX_REPORTED_ERRORS:
+			self.errors.append({"line": line, "error": str(error)})
+
+	def as_dict(self):
+		seconds = time.perf_counter() - self.started
+		return {
+			"table": self.table,
+			"imported": self.imported,
+			"rejected": self.rejected,
+			"errors": self.errors,
+			"seconds": round(seconds, 3),
+			"rows_per_second": round(self.imported / seconds) if seconds > 0 else None,
+		}
+
+
+def upsert_clause(keys):
+	"""``ON CONFLICT(id) DO UPDATE`` for rows carrying an id: fires the table's update triggers."""
+	if "id" not in keys:
+		return ""
+	updates = ", ".join(f"{key} = excluded.{key}" for key in keys if key != "id")
+	return f" ON CONFLICT(id) DO UPDATE SET {updates}" if updates else " ON CONFLICT(id) DO NOTHING"
+
+
+def import_rows(conn, table, records, batch_size=DEFAULT_BATCH, on_conflict="abort"):
+	"""Load (line, record) pairs into ``table``: one executemany + commit per batch.
+
+	Rows in a batch share the column set of its first row; a row with a
+	different set starts a new batch. A batch that fails as a whole (e.g. a
+	constraint violation under ``abort``) is rolled back and counted as rejected.
+	Under ``replace`` a row whose id exists updates that row; a clash on any
+	other unique key (e.g. a booked slot) still rejects the batch.
+	"""
+	if table not in TABLES:
+		raise BulkImportError(f"unknown table: {table}")
+	if on_conflict not in ON_CONFLICT:
+		raise BulkImportError(f"on_conflict must be one of: {', '.join(ON_CONFLICT)}")
+	columns = table_columns(conn, table)
+	report = ImportReport(table)
+	batch, batch_keys, batch_lines = [], None, []
+
+	def flush():
+		if not batch:
+			return
+		cols = ", ".join(batch_keys)
+		sql = f"{ON_CONFLICT[on_conflict]} INTO {table} ({cols}) VALUES ({', '.join('?' * len(batch_keys))})"
+		if on_conflict == "replace":
+			sql += upsert_clause(batch_keys)
+		try:
+			with conn:
+				conn.executemany(sql, batch)
+			report.imported += len(batch)
+		except sqlite3.DatabaseError as e:
+			for line in batch_lines:
+				report.reject(line, e)
+		batch.clear()
+		batch_lines.clear()
+
+	for line, record in records:
+		if isinstance(record, Exception):
+			report.reject(line, record)
+			continue
+		try:
+			row = clean_row(table, record, columns)
+		except ValueError as e:
+			report.reject(line, e)
+			continue
+		keys = tuple(row)
+		if keys != batch_keys or len(batch) >= batch_size:
+			flush()
+			batch_keys = keys
+		batch.append(tuple(row.values()))
+		batch_lines.append(line)
+	flush()
+	return report
+
+
+def merge_items(items, records, on_conflict="abort", name="content"):
+	"""Apply imported records to a content collection (list of dicts) in place; returns a report."""
+	report = ImportReport(name)
+	by_id = {str(it.get("id")): i for i, it in enumerate(items)}
+	next_id = max([it.get("id", 0) for it in items if isinstance(it.get("id"), int)], default=0) + 1
+	for line, record in records:
+		if isinstance(record, Exception):
+			report.reject(line, record)
+			continue
+		item = {}
+		for key, value in record.items():
+			# CSV exports carry nested values as JSON strings
+			if isinstance(value, str) and value[:1] in ("[", "{"):
+				try:
+					value = json.loads(value)
+				except json.JSONDecodeError:
+					pass
+			item[key] = value
+		raw_id = item.get("id")
+		if raw_id in (None, ""):
+			item["id"] = next_id
+		else:
+			try:
+				item["id"] = int(raw_id)
+			except (TypeError, ValueError):
+				report.reject(line, "id must be an integer")
+				continue
+		key = str(item["id"])
+		if key in by_id:
+			if on_conflict == "abort":
+				report.reject(line, f"id {key} already exists")
+				continue
+			if on_conflict == "ignore":
+				continue
+			items[by_id[key]] = item
+		else:
+			by_id[key] = len(items)
+			items.append(item)
+		next_id = max(next_id, item["id"] + 1)
+		report.imported += 1
+	return report
+
+
+# ----- CLI -----
+
+def _content_store():
+	from content_store import ContentStore
+	from default_data import DEFAULT_DATA
+	return ContentStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "content.json"), DEFAULT_DATA)
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	sub = parser.add_subparsers(dest="command", required=True)
+	exp = sub.add_parser("export", help="write a table or content collection to stdout")
+	exp.add_argument("table", help="inquiries, bookings, events or a content key such as cakes")
+	exp.add_argument("--format", choices=FORMATS, default="csv")
+	exp.add_argument("--gzip", action="store_true")
+	imp = sub.add_parser("import", help="load a CSV/NDJSON file (optionally .gz)")
+	imp.add_argument("table")
+	imp.add_argument("path")
+	imp.add_argument("--format", choices=FORMATS)
+	imp.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+	imp.add_argument("--on-conflict", choices=ON_CONFLICT, default="abort")
+	args = parser.parse_args(argv)
+
+	db_path = os.environ.get("DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.db")
+	conn = sqlite3.connect(db_path, timeout=30)
+	try:
+		if args.command == "export":
+			if args.table in TABLES:
+				columns, rows = iter_table(conn, args.table)
+			else:
+				data = _content_store().read()
+				if not isinstance(data.get(args.table), list):
+					parser.error(f"unknown table or collection: {args.table}")
+				columns, rows = iter_items(data[args.table])
+			for chunk in export_stream(columns, rows, args.format, args.gzip):
+				sys.stdout.buffer.write(chunk)
+			return 0
+
+		fmt = args.format or guess_format(args.path)
+		with open(args.path, "rb") as f:
+			records = read_records(open_text(f), fmt)
+			if args.table in TABLES:
+				report = import_rows(conn, args.table, records, args.batch_size, args.on_conflict)
+			else:
+				store = _content_store()
+				# Keep delta sync/SSE clients informed; search and snapshots catch up from the fingerprint
+				store.add_listener(ChangeFeed(db_path).record_content_change)
+				with store.edit() as data:
+					if not isinstance(data.get(args.table), list):
+						parser.error(f"unknown table or collection: {args.table}")
+					report = merge_items(data[args.table], records, args.on_conflict, args.table)
+					if report.imported:
+						store.write(data)
+		print(json.dumps(report.as_dict(), indent=2))
+		return 0 if not report.rejected else 1
+	finally:
+		conn.close()
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,230 @@
+"""Append-only change log and the change events / content deltas built on it.
+
+Every content write, booking insert/update/delete and inquiry insert lands in
+``change_log`` as (collection, item_id, op) with a monotonically increasing
+``seq``. Content changes are recorded by a ContentStore listener, bookings
+and inquiries by triggers, so every worker sees the same sequence.
+
+``GET /api/changes?since=N`` returns the events themselves (``collection``,
+``id``, ``op``, ``version``), bookings and inquiries included; inquiries
+only with an admin token. ``GET /api/content/changes?since=N`` returns the
+changed content items instead. Both can ``&wait=S`` up to ``CHANGES_WAIT_MAX``
+seconds for a change, detected with ``PRAGMA data_version`` (it changes
+whenever another connection commits), so a waiting client costs one cheap
+pragma per poll. A waiting request still occupies a sync worker, so at most
+``CHANGES_MAX_WAITERS`` requests per process wait; set it well below the
+worker's thread count. Further requests answer at once, as a plain poll.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("change_feed")
+
+CHANGE_LOG_RETAIN = int(os.environ.get("CHANGE_LOG_RETAIN", "10000"))
+CHANGES_POLL_SECONDS = float(os.environ.get("CHANGES_POLL_SECONDS", "0.25"))
+CHANGES_WAIT_MAX = float(os.environ.get("CHANGES_WAIT_MAX", "10"))
+# Per process, not per deployment; keep it well below the worker's thread count
+CHANGES_MAX_WAITERS = int(os.environ.get("CHANGES_MAX_WAITERS", "1"))
+# Delta requests touching more items than this are told to resync in full
+DELTA_MAX_CHANGES = int(os.environ.get("DELTA_MAX_CHANGES", "1000"))
+CHANGES_MAX_EVENTS = int(os.environ.get("CHANGES_MAX_EVENTS", "200"))
+# Only listed for admins
+PRIVATE_COLLECTIONS = {"inquiries"}
+
+SCHEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS change_log (
+		seq INTEGER PRIMARY KEY AUTOINCREMENT,
+		collection TEXT NOT NULL,
+		item_id TEXT,
+		op TEXT NOT NULL,
+		created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+	)
+	""",
+	f"""
+	CREATE TRIGGER IF NOT EXISTS change_log_prune AFTER INSERT ON change_log BEGIN
+		DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_RETAIN};
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS bookings_change_ai AFTER INSERT ON bookings BEGIN
+		INSERT INTO change_log (collection, item_id, op) VALUES ('bookings', NEW.id, 'insert');
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS bookings_change_au AFTER UPDATE ON bookings BEGIN
+		INSERT INTO change_log (collection, item_id, op) VALUES ('bookings', NEW.id, 'update');
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS bookings_change_ad AFTER DELETE ON bookings BEGIN
+		INSERT INTO change_log (collection, item_id, op) VALUES ('bookings', OLD.id, 'delete');
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS inquiries_change_ai AFTER INSERT ON inquiries BEGIN
+		INSERT INTO change_log (collection, item_id, op) VALUES ('inquiries', NEW.id, 'insert');
+	END
+	""",
+]
+
+
+def init_schema(cur):
+	for ddl in SCHEMA:
+		cur.execute(ddl)
+
+
+def diff_content(old, new):
+	"""(collection, item_id, op) for every item that differs between two documents."""
+	changes = []
+	old = old or {}
+	for key in sorted(set(old) | set(new)):
+		before, after = old.get(key), new.get(key)
+		if before == after:
+			continue
+		if not isinstance(after, list) or not isinstance(before, (list, type(None))):
+			# Non-list sections (settings) change as a whole
+			changes.append((key, None, "update"))
+			continue
+		before_by_id = {str(it.get("id")): it for it in before or [] if isinstance(it, dict)}
+		after_by_id = {str(it.get("id")): it for it in after if isinstance(it, dict)}
+		for item_id, item in after_by_id.items():
+			if item_id not in before_by_id:
+				changes.append((key, item_id, "insert"))
+			elif before_by_id[item_id] != item:
+				changes.append((key, item_id, "update"))
+		for item_id in before_by_id:
+			if item_id not in after_by_id:
+				changes.append((key, item_id, "delete"))
+	return changes
+
+
+class ChangeFeed:
+	def __init__(self, db_path):
+		self.db_path = db_path
+		self._waiters = threading.BoundedSemaphore(CHANGES_MAX_WAITERS) if CHANGES_MAX_WAITERS > 0 else None
+
+	def _connect(self):
+		conn = sqlite3.connect(self.db_path, timeout=10)
+		conn.row_factory = sqlite3.Row
+		return conn
+
+	def record_content_change(self, old, new, fingerprint=None):
+		"""ContentStore listener."""
+		changes = diff_content(old, new)
+		if not changes:
+			return
+		conn = self._connect()
+		try:
+			with conn:
+				conn.executemany(
+					"INSERT INTO change_log (collection, item_id, op) VALUES (?, ?, ?)", changes
+				)
+		finally:
+			conn.close()
+
+	@staticmethod
+	def latest(conn):
+		row = conn.execute("SELECT MAX(seq) FROM change_log").fetchone()
+		return row[0] or 0
+
+	@staticmethod
+	def oldest(conn):
+		row = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()
+		return row[0] or 0
+
+	@staticmethod
+	def since(conn, seq, limit, collections=None):
+		sql = "SELECT seq, collection, item_id, op FROM change_log WHERE seq > ?"
+		params = [seq]
+		if collections:
+			sql += f" AND collection IN ({','.join('?' * len(collections))})"
+			params.extend(collections)
+		sql += " ORDER BY seq LIMIT ?"
+		params.append(limit)
+		return conn.execute(sql, params).fetchall()
+
+	def events(self, conn, since, collections=None, include_private=False, limit=CHANGES_MAX_EVENTS):
+		"""Change events after version ``since``, at most ``limit`` (``more`` says whether others follow).
+
+		``version`` is the last seq looked at, private rows included, so a
+		client that passes it back as ``since`` never sees an event twice.
+		"""
+		latest = self.latest(conn)
+		if since > latest or since < self.oldest(conn) - 1:
+			return {"version": latest, "resync": True}
+		rows = self.since(conn, since, limit + 1)
+		more = len(rows) > limit
+		rows = rows[:limit]
+		events = [
+			{"collection": row["collection"], "id": row["item_id"], "op": row["op"], "version": row["seq"]}
+			for row in rows
+			if (include_private or row["collection"] not in PRIVATE_COLLECTIONS)
+			and (not collections or row["collection"] in collections)
+		]
+		version = rows[-1]["seq"] if rows else since
+		return {"version": version, "resync": False, "more": more, "events": events}
+
+	def content_delta(self, conn, since, read_content):
+		"""Items added/updated/deleted after version ``since``.
+
+		The version is fixed before the document is read, and each touched item
+		is resolved against that (possibly newer) document, so replaying a delta
+		is idempotent and never skips a change: present -> upserted, absent -> deleted.
+		"""
+		latest = self.latest(conn)
+		if since > latest or since < self.oldest(conn) - 1:
+			return {"version": latest, "resync": True}
+		rows = conn.execute(
+			"SELECT DISTINCT collection, item_id FROM change_log WHERE seq > ? AND seq <= ? LIMIT ?",
+			(since, latest, DELTA_MAX_CHANGES + 1),
+		).fetchall()
+		if len(rows) > DELTA_MAX_CHANGES:
+			return {"version": latest, "resync": True}
+
+		data = read_content()
+		changes = {}
+		for row in rows:
+			collection, item_id = row["collection"], row["item_id"]
+			if collection not in data:
+				continue
+			section = data[collection]
+			if item_id is None or not isinstance(section, list):
+				changes[collection] = {"replace": section}
+				continue
+			entry = changes.setdefault(collection, {"upserted": [], "deleted": []})
+			if "replace" in entry:
+				continue
+			item = next((it for it in section if str(it.get("id")) == item_id), None)
+			if item is None:
+				entry["deleted"].append(item_id)
+			else:
+				entry["upserted"].append(item)
+		return {"version": latest, "resync": False, "changes": changes}
+
+	def wait(self, conn, since, timeout):
+		"""Block until the log moves past ``since`` or ``timeout`` elapses; True if it did.
+
+		Returns at once when every waiter slot of this process is taken.
+		"""
+		if timeout <= 0 or self.latest(conn) > since:
+			return self.latest(conn) > since
+		if self._waiters is None or not self._waiters.acquire(blocking=False):
+			return False
+		try:
+			deadline = time.monotonic() + min(timeout, CHANGES_WAIT_MAX)
+			data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+			while time.monotonic() < deadline:
+				time.sleep(CHANGES_POLL_SECONDS)
+				current = conn.execute("PRAGMA data_version").fetchone()[0]
+				if current != data_version:
+					data_version = current
+					if self.latest(conn) > since:
+						return True
+			return False
+		finally:
+			self._waiters.release()
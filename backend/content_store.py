@@ -0,0 +1,220 @@
+"""content.json storage shared safely between gunicorn workers.
+
+Every worker keeps the parsed document (and anything derived from it, such as
+serialized responses) in memory and only re-reads the file when the shared
+version moves. The version is a 64-bit counter in a small mmap'd sidecar file
+(``content.json.version``) that writers bump after each atomic replace; the
+file's mtime/size are checked too, so manual edits are picked up as well.
+
+Writers serialize on an exclusive ``flock`` of ``content.json.lock``, so
+read-modify-write cycles from different workers can't overwrite each other:
+
+    with store.edit() as data:      # locked, private copy
+        data["reels"].append(reel)
+        store.write(data)
+
+``read()`` returns the shared cached document; treat it as read-only.
+Listeners registered with ``add_listener(fn)`` are called as
+``fn(old, new, fingerprint)`` after every write, still under the lock.
+"""
+import copy
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+	import fcntl
+except ImportError:  # Windows dev server: single process, the thread lock is enough
+	fcntl = None
+
+from app_logging import get_logger
+
+log = get_logger("content_store")
+
+_COUNTER = struct.Struct("<Q")
+# Bound on memoized entries per content version (keys can come from query strings)
+DERIVED_MAX_ENTRIES = int(os.environ.get("CONTENT_DERIVED_MAX", "256"))
+
+
+class ContentStore:
+	def __init__(self, path, defaults=None):
+		self.path = path
+		self.defaults = defaults or {}
+		self._rlock = threading.RLock()
+		self._depth = 0
+		# Opened per process (see _lock_file): flock on a description shared across a fork excludes nothing
+		self._lock_fd = None
+		self._lock_pid = None
+		self._version_map = self._open_counter(path + ".version")
+		self._cache_key = None
+		self._data = None
+		# (document, {name: value}) swapped as one object, so a value is cached with the data it came from
+		self._derived = (None, {})
+		self._listeners = []
+
+	@staticmethod
+	def _open_counter(path):
+		fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+		try:
+			if os.fstat(fd).st_size < _COUNTER.size:
+				os.ftruncate(fd, _COUNTER.size)
+			return mmap.mmap(fd, _COUNTER.size)
+		finally:
+			os.close(fd)
+
+	# ----- cross-process coordination -----
+
+	@property
+	def version(self):
+		return _COUNTER.unpack_from(self._version_map, 0)[0]
+
+	def _bump_version(self):
+		version = self.version + 1
+		_COUNTER.pack_into(self._version_map, 0, version)
+		return version
+
+	def _lock_file(self):
+		# Caller holds _rlock. A store opened before a pre-fork server forked gets its own fd in each worker.
+		if self._lock_pid != os.getpid():
+			if self._lock_fd is not None:
+				os.close(self._lock_fd)
+			self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+			self._lock_pid = os.getpid()
+		return self._lock_fd
+
+	@contextmanager
+	def lock(self):
+		"""Exclusive across threads and processes; re-entrant within a thread."""
+		with self._rlock:
+			lock_fd = self._lock_file()
+			if self._depth == 0 and fcntl is not None:
+				fcntl.flock(lock_fd, fcntl.LOCK_EX)
+			self._depth += 1
+			try:
+				yield
+			finally:
+				self._depth -= 1
+				if self._depth == 0 and fcntl is not None:
+					fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+	@property
+	def fingerprint(self):
+		"""Identifies the on-disk content version (for indexes kept outside this process)."""
+		return ":".join(str(part) for part in self._current_key())
+
+	def close(self):
+		"""Release the lock file and version map (the store is unusable afterwards)."""
+		if self._lock_fd is not None:
+			os.close(self._lock_fd)
+			self._lock_fd = None
+		self._version_map.close()
+
+	def add_listener(self, fn):
+		self._listeners.append(fn)
+
+	def _current_key(self):
+		try:
+			st = os.stat(self.path)
+		except FileNotFoundError:
+			return (self.version, None, None)
+		return (self.version, st.st_mtime_ns, st.st_size)
+
+	# ----- reads -----
+
+	def read(self):
+		"""Cached parsed document, refreshed only when the version moves."""
+		key = self._current_key()
+		if key != self._cache_key or self._data is None:
+			with self.lock():
+				self._refresh()
+		return self._data
+
+	def _refresh(self):
+		# Caller holds the lock.
+		key = self._current_key()
+		if key == self._cache_key and self._data is not None:
+			return
+
+		if not os.path.exists(self.path):
+			log.info("content.json not found, creating from defaults")
+			self._write_file(self.defaults)
+			self._bump_version()
+			key = self._current_key()
+			data = copy.deepcopy(self.defaults)
+		else:
+			with open(self.path, "r", encoding="utf-8") as f:
+				try:
+					data = json.load(f)
+				except json.JSONDecodeError:
+					log.error("content.json corrupted, resetting")
+					data = {}
+
+			# Auto-seed ONLY if key is missing completely
+			missing = [k for k in self.defaults if k not in data]
+			for k in missing:
+				log.info("content key missing, auto-seeding", key=k)
+				data[k] = copy.deepcopy(self.defaults[k])
+			if missing:
+				self._write_file(data)
+				self._bump_version()
+				key = self._current_key()
+
+		self._data = data
+		self._cache_key = key
+		self._derived = (data, {})
+
+	def derived(self, name, build):
+		"""Memoize ``build(data)`` for the current content version (e.g. a serialized response)."""
+		self.read()
+		# One attribute read: a write landing now can't pair the old document with the new cache
+		data, cache = self._derived
+		if name in cache:
+			return cache[name]
+		value = build(data)
+		if len(cache) < DERIVED_MAX_ENTRIES:
+			cache[name] = value
+		return value
+
+	# ----- writes -----
+
+	@contextmanager
+	def edit(self):
+		"""Hold the write lock and yield a private, fresh copy of the document."""
+		with self.lock():
+			self._refresh()
+			yield copy.deepcopy(self._data)
+
+	def write(self, data):
+		with self.lock():
+			log.debug("writing content", path=self.path)
+			old = self._data
+			self._write_file(data)
+			self._bump_version()
+			self._data = data
+			self._cache_key = self._current_key()
+			self._derived = (data, {})
+			fingerprint = self.fingerprint
+			for fn in self._listeners:
+				try:
+					fn(old, data, fingerprint)
+				except Exception:
+					log.exception("content write listener failed", listener=getattr(fn, "__name__", repr(fn)))
+
+	def _write_file(self, data):
+		# Atomic replace so readers in other workers never see a half-written file
+		directory = os.path.dirname(os.path.abspath(self.path))
+		fd, tmp = tempfile.mkstemp(prefix=".content-", suffix=".json", dir=directory)
+		try:
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False, indent=2)
+				f.flush()
+				os.fsync(f.fileno())
+			os.replace(tmp, self.path)
+		except BaseException:
+			if os.path.exists(tmp):
+				os.remove(tmp)
+			raise
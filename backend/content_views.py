@@ -0,0 +1,80 @@
+"""Section selection and field projection for ``/api/content``.
+
+``GET /api/content?view=cards`` returns the named lightweight view,
+``?sections=cakes,reels`` limits the response to those sections and
+``?fields=id,title`` keeps only those keys in each item. The parameters
+combine (the view is applied first); with none of them the full document is
+returned unchanged.
+"""
+import re
+
+# view name -> {section: fields kept per item (None = whole section)}
+# Sections missing from a view are left out of it.
+VIEWS = {
+	"cards": {
+		"indoorDecorations": ["id", "title", "category", "image", "imageVariants"],
+		"outdoorDecorations": ["id", "title", "category", "image", "imageVariants"],
+		"indoorPlans": ["id", "name", "price", "hours"],
+		"outdoorPlans": ["id", "name", "price", "hours"],
+		"cakes": ["id", "name", "flavor", "price", "image", "imageVariants"],
+		"galleryItems": ["id", "title", "category", "image", "imageVariants"],
+		"reels": None,
+		"settings": None,
+	},
+}
+
+# Never part of a public response
+PRIVATE_SECTIONS = {"bookings"}
+
+MAX_FIELDS = 32
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,63}$")
+
+
+def parse_names(value):
+	"""Comma-separated query value -> sorted, de-duplicated tuple (None if absent)."""
+	if value is None:
+		return None
+	names = sorted({part.strip() for part in value.split(",") if part.strip()})
+	bad = [n for n in names if not _NAME_RE.match(n)]
+	if bad:
+		raise ValueError(f"invalid name: {bad[0]}")
+	return tuple(names)
+
+
+def _keep(item, fields):
+	if not isinstance(item, dict):
+		return item
+	return {k: item[k] for k in fields if k in item}
+
+
+def _project_section(section, fields):
+	if fields is None:
+		return section
+	if isinstance(section, list):
+		return [_keep(item, fields) for item in section]
+	if isinstance(section, dict):
+		return _keep(section, fields)
+	return section
+
+
+def project(data, view=None, sections=None, fields=None):
+	"""Build the response document; raises ValueError for an unknown view or too many fields."""
+	if view is not None and view not in VIEWS:
+		raise ValueError(f"unknown view: {view} (available: {', '.join(sorted(VIEWS))})")
+	if fields is not None:
+		if len(fields) > MAX_FIELDS:
+			raise ValueError(f"at most {MAX_FIELDS} fields")
+		if "id" not in fields:
+			fields = ("id",) + tuple(fields)
+
+	spec = VIEWS[view] if view else {key: None for key in data if key not in PRIVATE_SECTIONS}
+	if sections is not None:
+		spec = {key: spec[key] for key in sections if key in spec}
+
+	result = {}
+	for key, view_fields in spec.items():
+		if key not in data:
+			continue
+		section = _project_section(data[key], view_fields)
+		result[key] = _project_section(section, fields)
+	return result
@@ -0,0 +1,172 @@
+"""Schema migration and query helpers for the ``events`` table.
+
+``date`` is normalized to ISO 8601 (``YYYY-MM-DD`` or ``YYYY-MM-DDTHH:MM``)
+so range filters and ordering are plain string comparisons on an index.
+Frequently filtered ``metadata`` keys are exposed as VIRTUAL generated
+columns (JSON1 ``json_extract``) with their own indexes; any other key can
+still be filtered, just without an index.
+"""
+import json
+import re
+from datetime import date, datetime
+
+from app_logging import get_logger
+
+log = get_logger("events")
+
+# generated column -> JSON path inside metadata
+METADATA_COLUMNS = {
+	"meta_type": "$.type",
+	"meta_status": "$.status",
+	"meta_venue": "$.venue",
+	"meta_indoor_outdoor": "$.indoor_outdoor",
+}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+SORTS = {
+	"date": "date ASC, id ASC",
+	"-date": "date DESC, id DESC",
+	"created_at": "created_at ASC, id ASC",
+	"-created_at": "created_at DESC, id DESC",
+}
+COLUMNS = "id, title, description, date, metadata, created_at"
+
+_META_KEY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,63}$")
+_DATE_FORMATS = (
+	"%Y-%m-%d",
+	"%Y-%m-%dT%H:%M",
+	"%Y-%m-%dT%H:%M:%S",
+	"%Y-%m-%d %H:%M",
+	"%Y-%m-%d %H:%M:%S",
+	"%d/%m/%Y",
+	"%d-%m-%Y",
+	"%d.%m.%Y",
+	"%b %d, %Y",
+	"%B %d, %Y",
+	"%d %b %Y",
+	"%d %B %Y",
+)
+
+
+def normalize_date(value):
+	"""ISO form of a user-supplied event date; None stays None, unknown formats raise ValueError."""
+	if value is None or value == "":
+		return None
+	text = str(value).strip()
+	for fmt in _DATE_FORMATS:
+		try:
+			parsed = datetime.strptime(text, fmt)
+		except ValueError:
+			continue
+		if parsed.hour or parsed.minute or parsed.second or "%H" in fmt:
+			return parsed.strftime("%Y-%m-%dT%H:%M")
+		return parsed.date().isoformat()
+	raise ValueError(f"unrecognized date: {text}")
+
+
+def normalize_metadata(value):
+	"""Stored form of metadata: objects are serialized, strings must be valid JSON."""
+	if value is None or value == "":
+		return None
+	if isinstance(value, (dict, list)):
+		return json.dumps(value, ensure_ascii=False)
+	try:
+		json.loads(value)
+	except (TypeError, ValueError):
+		raise ValueError("metadata must be a JSON object")
+	return value
+
+
+def init_schema(cur):
+	existing = {row[1] for row in cur.execute("PRAGMA table_xinfo(events)")}
+	for column, path in METADATA_COLUMNS.items():
+		if column not in existing:
+			# Only VIRTUAL generated columns can be added to an existing table
+			cur.execute(
+				f"ALTER TABLE events ADD COLUMN {column} TEXT GENERATED ALWAYS AS "
+				f"(CASE WHEN json_valid(metadata) THEN json_extract(metadata, '{path}') END) VIRTUAL"
+			)
+		cur.execute(f"CREATE INDEX IF NOT EXISTS idx_events_{column} ON events ({column}, date)")
+	cur.execute("CREATE INDEX IF NOT EXISTS idx_events_date ON events (date)")
+	_normalize_existing(cur)
+
+
+def _normalize_existing(cur):
+	"""Rewrite dates SQLite can't already order as ISO (cheap no-op once migrated)."""
+	rows = cur.execute(
+		"SELECT id, date FROM events WHERE date IS NOT NULL AND date != '' "
+		"AND (date(date) IS NULL OR date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*')"
+	).fetchall()
+	for event_id, raw in rows:
+		try:
+			cur.execute("UPDATE events SET date = ? WHERE id = ?", (normalize_date(raw), event_id))
+		except ValueError:
+			log.warning("event date left unnormalized", event_id=event_id, date=raw)
+
+
+def _day_bound(value, name):
+	try:
+		return normalize_date(value)
+	except ValueError:
+		raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def query(db, args):
+	"""Filtered, paginated events for the admin API; raises ValueError on bad parameters.
+
+	Supported args: ``from`` / ``to`` (inclusive days), ``upcoming=1``,
+	``meta.<key>=<value>`` (repeatable), ``sort`` and ``limit`` / ``offset``.
+	"""
+	where, params = [], []
+	start = _day_bound(args.get("from"), "from")
+	end = _day_bound(args.get("to"), "to")
+	if start:
+		where.append("date >= ?")
+		params.append(start)
+	if end:
+		# Inclusive: 2024-05-01 also matches 2024-05-01T18:00
+		where.append("date < ?")
+		params.append(end[:10] + "~")
+	upcoming = args.get("upcoming", "").lower() in ("1", "true", "yes")
+	if upcoming:
+		where.append("date >= ?")
+		params.append(date.today().isoformat())
+
+	by_path = {path: column for column, path in METADATA_COLUMNS.items()}
+	for name in args:
+		if not name.startswith("meta."):
+			continue
+		key = name[5:]
+		if not _META_KEY_RE.match(key):
+			raise ValueError(f"invalid metadata key: {key}")
+		column = by_path.get(f"$.{key}")
+		values = args.getlist(name) if hasattr(args, "getlist") else [args[name]]
+		# Query strings are text; cast so numeric JSON values still match
+		target = column or f"(CASE WHEN json_valid(metadata) THEN CAST(json_extract(metadata, '$.{key}') AS TEXT) END)"
+		where.append(f"{target} IN ({', '.join('?' * len(values))})")
+		params.extend(values)
+
+	sort = args.get("sort") or ("date" if (start or end or upcoming) else "-created_at")
+	if sort not in SORTS:
+		raise ValueError(f"sort must be one of: {', '.join(SORTS)}")
+	try:
+		limit = min(int(args.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+		offset = int(args.get("offset", 0))
+	except ValueError:
+		raise ValueError("limit and offset must be integers")
+	if limit < 1 or offset < 0:
+		raise ValueError("limit must be positive and offset not negative")
+
+	clause = f" WHERE {' AND '.join(where)}" if where else ""
+	total = db.execute(f"SELECT COUNT(*) FROM events{clause}", params).fetchone()[0]
+	rows = db.execute(
+		f"SELECT {COLUMNS} FROM events{clause} ORDER BY {SORTS[sort]} LIMIT ? OFFSET ?",
+		params + [limit, offset],
+	).fetchall()
+	return {
+		"events": [dict(row) for row in rows],
+		"total": total,
+		"limit": limit,
+		"offset": offset,
+	}
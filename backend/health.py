@@ -0,0 +1,143 @@
+"""Background health probes for ``/healthz`` and ``/readyz``.
+
+A daemon thread re-runs every check each ``HEALTH_PROBE_INTERVAL`` seconds:
+outbound providers are probed concurrently (one GET each through the shared
+``http_client`` clients, no retries, ``HEALTH_PROBE_TIMEOUT``) and local dependencies such as SQLite
+and the content store are checked in-process. Results are cached with their
+timestamps, so the endpoints only read memory and cost nothing on the request
+path however often a monitor polls them.
+
+Readiness depends on the local checks only: a provider outage degrades
+uploads or reel fetching but shouldn't take the site out of rotation, so
+providers are reported without failing ``/readyz``. Results older than
+``HEALTH_STALE_AFTER`` seconds (the probe thread died or is stuck) count as
+failed. Probe outcomes feed the providers' circuit breakers like any other
+call, so a provider that is down is noticed before a user request hits it.
+With ``HEALTH_PROBES=0`` no thread is started and the local checks
+run on each ``/readyz`` request instead (providers are then not probed).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_logging import get_logger
+from http_client import get_client, circuit_states
+
+log = get_logger("health")
+
+HEALTH_PROBES = os.environ.get("HEALTH_PROBES", "1").lower() in ("1", "true", "yes")
+HEALTH_PROBE_INTERVAL = float(os.environ.get("HEALTH_PROBE_INTERVAL", "60"))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", "5"))
+HEALTH_STALE_AFTER = float(os.environ.get("HEALTH_STALE_AFTER", str(HEALTH_PROBE_INTERVAL * 3)))
+
+# provider (http_client name) -> URL probed with a plain GET
+PROVIDER_PROBES = {
+	"google": "https://www.google.com",
+	"cloudinary": "https://api.cloudinary.com/v1_1/ping",
+	"cobalt": "https://api.cobalt.tools",
+	"instagram": "https://www.instagram.com",
+}
+
+
+def _timed(fn):
+	started = time.monotonic()
+	try:
+		detail = fn()
+		ok = True
+	except Exception as e:
+		detail = str(e) or repr(e)
+		ok = False
+	return {
+		"ok": ok,
+		"detail": detail,
+		"ms": round((time.monotonic() - started) * 1000, 1),
+		"checked_at": time.time(),
+	}
+
+
+def _probe_provider(name, url):
+	return get_client(name).get(url, retry=False, deadline=HEALTH_PROBE_TIMEOUT).status_code
+
+
+class HealthMonitor:
+	def __init__(self, checks, providers=PROVIDER_PROBES, interval=HEALTH_PROBE_INTERVAL,
+			stale_after=HEALTH_STALE_AFTER):
+		"""``checks`` maps a name to a callable that raises on failure (its return value is the detail)."""
+		self.checks = checks
+		self.providers = providers
+		self.interval = interval
+		self.stale_after = stale_after
+		self.started_at = time.time()
+		self._results = {"checks": {}, "providers": {}}
+		self._lock = threading.Lock()
+		self._pool = None
+		self._thread = None
+		self._pid = None
+
+	def run_checks(self):
+		"""Run the local checks now (cheap; no network)."""
+		checks = {name: _timed(fn) for name, fn in self.checks.items()}
+		with self._lock:
+			self._results = dict(self._results, checks=checks)
+		return checks
+
+	def run_once(self):
+		"""Run every check and probe now and replace the cached results."""
+		if self._pool is None:
+			self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.providers)), thread_name_prefix="health-probe")
+		jobs = {name: self._pool.submit(_timed, lambda n=name, u=url: _probe_provider(n, u))
+			for name, url in self.providers.items()}
+		# Local results are published before the (slower) provider probes finish
+		checks = self.run_checks()
+		providers = {name: job.result() for name, job in jobs.items()}
+		with self._lock:
+			self._results = dict(self._results, providers=providers)
+		failed = [name for name, r in {**checks, **providers}.items() if not r["ok"]]
+		if failed:
+			log.warning("health checks failing", failed=failed)
+
+	def _loop(self):
+		while True:
+			try:
+				self.run_once()
+			except Exception:
+				log.exception("health probe round failed")
+			time.sleep(self.interval)
+
+	def ensure_started(self):
+		"""Start the probe thread (again after a fork: threads don't survive into worker processes)."""
+		if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+			return
+		with self._lock:
+			if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+				return
+			if self._pid != os.getpid():
+				# An inherited pool's workers are gone too
+				self._pool = None
+			self._pid = os.getpid()
+			self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+			self._thread.start()
+
+	def _fresh(self, result, now):
+		return dict(result, ok=result["ok"] and now - result["checked_at"] <= self.stale_after,
+			age=round(now - result["checked_at"], 1))
+
+	def snapshot(self):
+		"""Cached results with ages; stale results are reported as failed."""
+		now = time.time()
+		with self._lock:
+			results = self._results
+		checks = {name: self._fresh(r, now) for name, r in results["checks"].items()}
+		providers = {name: self._fresh(r, now) for name, r in results["providers"].items()}
+		circuits = circuit_states()
+		for name, result in providers.items():
+			result["circuit"] = circuits.get(name, "closed")
+		# Not probed yet (just started): not ready
+		ready = bool(checks) and len(checks) == len(self.checks) and all(r["ok"] for r in checks.values())
+		return {
+			"ready": ready,
+			"uptime": round(now - self.started_at, 1),
+			"checks": checks,
+			"providers": providers,
+		}
@@ -0,0 +1,212 @@
+"""Shared outbound HTTP clients, one per external provider.
+
+Each provider gets its own keep-alive ``requests.Session`` (so TLS handshakes
+through the PythonAnywhere proxy are reused), consistent connect/read
+timeouts, an overall deadline, retries with full jitter and a circuit breaker
+that fails fast while the provider is down.
+
+Usage:
+    from http_client import get_client, CircuitOpenError
+    resp = get_client("cobalt").post(url, json=payload)
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app_logging import get_logger
+
+log = get_logger("http_client")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# connect/read are per-attempt socket timeouts, deadline bounds all attempts
+# (including backoff sleeps) together.
+DEFAULTS = {
+	"connect_timeout": 5,
+	"read_timeout": 15,
+	"deadline": 30,
+	"retries": 2,
+	"backoff": 0.5,
+	"backoff_cap": 4,
+	"pool_size": 10,
+	"failure_threshold": 5,
+	"reset_timeout": 30,
+}
+
+PROVIDERS = {
+	"cloudinary": {"read_timeout": 600, "deadline": 900, "retries": 1},
+	"imgbb": {"read_timeout": 60, "deadline": 120},
+	"cobalt": {"read_timeout": 15, "deadline": 20, "retries": 1},
+	"cobalt_media": {"read_timeout": 60, "deadline": 300, "retries": 1},
+	"twilio": {"read_timeout": 10, "deadline": 15},
+	"whatsapp_cloud": {"read_timeout": 10, "deadline": 15},
+	"discord": {"read_timeout": 10, "deadline": 15},
+	"telegram": {"read_timeout": 10, "deadline": 15},
+	"callmebot": {"read_timeout": 10, "deadline": 15},
+	"google": {"read_timeout": 5, "deadline": 5, "retries": 0},
+	"instagram": {"read_timeout": 5, "deadline": 5, "retries": 0},
+}
+
+
+class CircuitOpenError(requests.RequestException):
+	"""Raised without touching the network while a provider's circuit is open."""
+
+
+class CircuitBreaker:
+	"""Closed -> open after ``failure_threshold`` consecutive failures.
+
+	After ``reset_timeout`` seconds one trial call is let through (half-open);
+	its outcome closes or re-opens the circuit.
+	"""
+
+	def __init__(self, name, failure_threshold, reset_timeout):
+		self.name = name
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.failures = 0
+		self.opened_at = None
+		self.trial_in_flight = False
+		self._lock = threading.Lock()
+
+	@property
+	def state(self):
+		if self.opened_at is None:
+			return "closed"
+		if time.monotonic() - self.opened_at >= self.reset_timeout:
+			return "half-open"
+		return "open"
+
+	def before_call(self):
+		with self._lock:
+			state = self.state
+			if state == "closed":
+				return
+			if state == "half-open" and not self.trial_in_flight:
+				self.trial_in_flight = True
+				return
+			retry_in = max(0, self.reset_timeout - (time.monotonic() - self.opened_at))
+			raise CircuitOpenError(f"circuit open for {self.name}, retry in {retry_in:.0f}s")
+
+	def record_success(self):
+		with self._lock:
+			self.failures = 0
+			self.opened_at = None
+			self.trial_in_flight = False
+
+	def record_failure(self):
+		with self._lock:
+			self.failures += 1
+			if self.trial_in_flight or self.failures >= self.failure_threshold:
+				if self.opened_at is None or self.trial_in_flight:
+					log.warning("circuit opened", provider=self.name, failures=self.failures)
+				self.opened_at = time.monotonic()
+			self.trial_in_flight = False
+
+
+class ProviderClient:
+	def __init__(self, name, **options):
+		self.name = name
+		self.options = dict(DEFAULTS, **options)
+		self.breaker = CircuitBreaker(name, self.options["failure_threshold"], self.options["reset_timeout"])
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.options["pool_size"], max_retries=0)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+
+	def _sleep_backoff(self, attempt, remaining):
+		# Full jitter: uniform(0, min(cap, base * 2^attempt))
+		ceiling = min(self.options["backoff_cap"], self.options["backoff"] * (2 ** attempt))
+		delay = random.uniform(0, ceiling)
+		if delay >= remaining:
+			return False
+		time.sleep(delay)
+		return True
+
+	def request(self, method, url, retry=None, deadline=None, **kwargs):
+		"""Send a request through the breaker with timeouts, deadline and retries.
+
+		Non-idempotent methods are only retried when the connection could not be
+		established (so nothing was sent), unless ``retry=True`` is passed.
+		``deadline`` shortens the provider's deadline for this call (e.g. probes).
+		"""
+		method = method.upper()
+		opts = self.options
+		if deadline is not None:
+			opts = dict(opts, deadline=min(deadline, opts["deadline"]))
+		self.breaker.before_call()
+
+		started = time.monotonic()
+		attempt = 0
+		while True:
+			remaining = opts["deadline"] - (time.monotonic() - started)
+			if remaining <= 0:
+				self.breaker.record_failure()
+				raise requests.Timeout(f"{self.name}: deadline of {opts['deadline']}s exceeded")
+			kwargs["timeout"] = (min(opts["connect_timeout"], remaining), min(opts["read_timeout"], remaining))
+			can_retry = attempt < opts["retries"]
+			try:
+				resp = self.session.request(method, url, **kwargs)
+			except requests.RequestException as e:
+				safe = retry or method in IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+				if retry is False or not (can_retry and safe):
+					self.breaker.record_failure()
+					raise
+				log.debug("retrying outbound request", provider=self.name, attempt=attempt, error=str(e))
+			else:
+				safe = retry or method in IDEMPOTENT_METHODS
+				if resp.status_code not in RETRY_STATUSES or retry is False or not (can_retry and safe):
+					if resp.status_code < 500:
+						self.breaker.record_success()
+					else:
+						self.breaker.record_failure()
+					return resp
+				log.debug("retrying outbound request", provider=self.name, attempt=attempt, status=resp.status_code)
+				resp.close()
+
+			remaining = opts["deadline"] - (time.monotonic() - started)
+			if not self._sleep_backoff(attempt, remaining):
+				self.breaker.record_failure()
+				raise requests.Timeout(f"{self.name}: deadline of {opts['deadline']}s exceeded")
+			attempt += 1
+
+	def get(self, url, **kwargs):
+		return self.request("GET", url, **kwargs)
+
+	def head(self, url, **kwargs):
+		return self.request("HEAD", url, **kwargs)
+
+	def post(self, url, **kwargs):
+		return self.request("POST", url, **kwargs)
+
+	def guard(self, fn, *args, **kwargs):
+		"""Run a non-``requests`` call (e.g. the Cloudinary SDK) under this provider's breaker."""
+		self.breaker.before_call()
+		try:
+			result = fn(*args, **kwargs)
+		except Exception:
+			self.breaker.record_failure()
+			raise
+		self.breaker.record_success()
+		return result
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+	client = _clients.get(name)
+	if client is None:
+		with _clients_lock:
+			client = _clients.get(name)
+			if client is None:
+				client = _clients[name] = ProviderClient(name, **PROVIDERS.get(name, {}))
+	return client
+
+
+def circuit_states():
+	return {name: client.breaker.state for name, client in _clients.items()}
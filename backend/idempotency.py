@@ -0,0 +1,124 @@
+"""Idempotency-Key support for POSTs with side effects.
+
+The first request with a given key claims it (a row with no response yet),
+runs, and stores its successful response. A retry with the same key and
+payload gets the stored response back without running the view again; a
+retry while the first attempt is still running gets 409, and reusing a key
+for a different payload gets 422. Failed attempts release the key so the
+client can retry for real. Keys expire after ``IDEMPOTENCY_TTL_SECONDS``.
+Keys are scoped to the caller (an admin, or anonymous on public routes), so
+one caller can never replay another's response.
+
+A claim is a lease: one still without a response after
+``IDEMPOTENCY_LEASE_SECONDS`` (its worker was killed mid-request) is treated
+as abandoned and the next retry takes it over. Keep the lease longer than the
+slowest idempotent request.
+"""
+import hashlib
+import os
+import random
+import sqlite3
+import time
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "60"))
+MAX_KEY_LENGTH = 255
+
+SCHEMA = """
+	CREATE TABLE IF NOT EXISTS idempotency_keys (
+		scope TEXT NOT NULL,
+		key TEXT NOT NULL,
+		request_hash TEXT NOT NULL,
+		status INTEGER,
+		content_type TEXT,
+		body BLOB,
+		created_at REAL NOT NULL,
+		claimed_at REAL,
+		PRIMARY KEY (scope, key)
+	) WITHOUT ROWID
+"""
+
+
+def init_schema(cur):
+	cur.execute(SCHEMA)
+	columns = {row[1] for row in cur.execute("PRAGMA table_info(idempotency_keys)")}
+	if "claimed_at" not in columns:
+		cur.execute("ALTER TABLE idempotency_keys ADD COLUMN claimed_at REAL")
+
+
+def request_hash(method, path, body, caller=""):
+	digest = hashlib.sha256()
+	for part in (method.encode(), path.encode(), caller.encode(), body or b""):
+		digest.update(part)
+		digest.update(b"\0")
+	return digest.hexdigest()
+
+
+class IdempotencyStore:
+	def __init__(self, db_path, ttl=IDEMPOTENCY_TTL_SECONDS, lease=IDEMPOTENCY_LEASE_SECONDS):
+		self.db_path = db_path
+		self.ttl = ttl
+		self.lease = lease
+
+	def _connect(self):
+		return sqlite3.connect(self.db_path, timeout=10)
+
+	def claim(self, scope, key, req_hash):
+		"""("new", None) if this request owns the key, else ("replay" | "in_progress" | "mismatch", row)."""
+		now = time.time()
+		conn = self._connect()
+		try:
+			with conn:
+				conn.execute(
+					"DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND created_at < ?",
+					(scope, key, now - self.ttl),
+				)
+				if random.random() < 0.01:
+					conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - self.ttl,))
+				cur = conn.execute(
+					"INSERT OR IGNORE INTO idempotency_keys (scope, key, request_hash, created_at, claimed_at) "
+					"VALUES (?, ?, ?, ?, ?)",
+					(scope, key, req_hash, now, now),
+				)
+				if cur.rowcount:
+					return "new", None
+				# Take over an abandoned claim (same payload, no response, lease expired)
+				cur = conn.execute(
+					"UPDATE idempotency_keys SET claimed_at = ? WHERE scope = ? AND key = ? AND request_hash = ? "
+					"AND status IS NULL AND COALESCE(claimed_at, created_at) < ?",
+					(now, scope, key, req_hash, now - self.lease),
+				)
+				if cur.rowcount:
+					return "new", None
+				row = conn.execute(
+					"SELECT request_hash, status, content_type, body FROM idempotency_keys WHERE scope = ? AND key = ?",
+					(scope, key),
+				).fetchone()
+		finally:
+			conn.close()
+		if row[0] != req_hash:
+			return "mismatch", row
+		if row[1] is None:
+			return "in_progress", row
+		return "replay", {"status": row[1], "content_type": row[2], "body": row[3]}
+
+	def complete(self, scope, key, status, content_type, body):
+		conn = self._connect()
+		try:
+			with conn:
+				conn.execute(
+					"UPDATE idempotency_keys SET status = ?, content_type = ?, body = ? WHERE scope = ? AND key = ?",
+					(status, content_type, body, scope, key),
+				)
+		finally:
+			conn.close()
+
+	def release(self, scope, key):
+		conn = self._connect()
+		try:
+			with conn:
+				conn.execute(
+					"DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status IS NULL", (scope, key)
+				)
+		finally:
+			conn.close()
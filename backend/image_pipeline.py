@@ -0,0 +1,154 @@
+"""Responsive image variants for uploads.
+
+An uploaded photo is decoded once, rotated upright from its EXIF orientation,
+stripped of metadata and encoded as WebP (and AVIF when Pillow supports it)
+at each of ``IMAGE_WIDTHS`` no wider than the original. Resizing and encoding
+run in a thread pool (Pillow releases the GIL for both), and the variants are
+uploaded in parallel. The result is recorded on the item as ``imageVariants``,
+a ``format -> srcset`` map, with ``image`` pointing at the largest WebP.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+	from PIL import Image, ImageOps, features
+except ImportError:  # pipeline disabled, uploads go through unchanged
+	Image = None
+
+from app_logging import get_logger
+
+log = get_logger("image_pipeline")
+
+IMAGE_WIDTHS = tuple(sorted(int(w) for w in os.environ.get("IMAGE_WIDTHS", "320,640,1024,1600").split(",")))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMAGE_UPLOAD_CONCURRENCY = int(os.environ.get("IMAGE_UPLOAD_CONCURRENCY", "4"))
+IMAGE_MAX_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", str(50_000_000)))
+# Formats Pillow can't decode (HEIC without a plugin) or that lose animation are passed through
+PASSTHROUGH_TYPES = {"image/gif", "image/svg+xml"}
+
+# format -> (Pillow format, mime type, save options)
+ENCODINGS = {
+	"avif": ("AVIF", "image/avif", {"quality": 55, "speed": 6}),
+	"webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+
+_encode_pool = None
+_upload_pool = None
+_pools_lock = threading.Lock()
+
+
+class ImageError(ValueError):
+	"""The upload is not an image the pipeline can process."""
+
+
+def available_formats():
+	if Image is None:
+		return []
+	return [name for name in ENCODINGS if features.check(name)]
+
+
+def enabled():
+	return Image is not None and os.environ.get("IMAGE_PIPELINE", "1").lower() in ("1", "true", "yes")
+
+
+def handles(content_type):
+	return (
+		enabled()
+		and (content_type or "").startswith("image/")
+		and content_type not in PASSTHROUGH_TYPES
+		and bool(available_formats())
+	)
+
+
+def _pools():
+	global _encode_pool, _upload_pool
+	if _upload_pool is not None:
+		return _encode_pool, _upload_pool
+	with _pools_lock:
+		# Concurrent first uploads: only one of them creates the pools
+		if _upload_pool is None:
+			_encode_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image-encode")
+			_upload_pool = ThreadPoolExecutor(max_workers=IMAGE_UPLOAD_CONCURRENCY, thread_name_prefix="image-upload")
+	return _encode_pool, _upload_pool
+
+
+def decode(data):
+	"""Decoded, upright, metadata-free image in RGB/RGBA."""
+	Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+	try:
+		img = Image.open(io.BytesIO(data))
+		img = ImageOps.exif_transpose(img)
+		img.load()
+	except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+		raise ImageError(f"Image too large: {e}")
+	except (OSError, SyntaxError) as e:
+		raise ImageError(f"Unsupported image: {e}")
+	if img.mode not in ("RGB", "RGBA"):
+		img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+	img.info = {}
+	return img
+
+
+def target_widths(width):
+	widths = [w for w in IMAGE_WIDTHS if w < width]
+	# Always include the original width (capped at the largest target) as the top variant
+	widths.append(min(width, IMAGE_WIDTHS[-1]))
+	return sorted(set(widths))
+
+
+def _encode(img, width, formats):
+	if width < img.width:
+		height = max(1, round(img.height * width / img.width))
+		img = img.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+	out = []
+	for name in formats:
+		pil_format, mime, options = ENCODINGS[name]
+		buf = io.BytesIO()
+		img.save(buf, pil_format, **options)
+		out.append({"format": name, "mime": mime, "width": width, "height": img.height, "data": buf.getvalue()})
+	return out
+
+
+def build_variants(data):
+	"""All variants of ``data`` (raises ImageError), smallest first within each format."""
+	img = decode(data)
+	formats = available_formats()
+	encode_pool, _ = _pools()
+	jobs = [encode_pool.submit(_encode, img, width, formats) for width in target_widths(img.width)]
+	variants = [v for job in jobs for v in job.result()]
+	log.debug("image variants built", source_bytes=len(data), variants=len(variants),
+		variant_bytes=sum(len(v["data"]) for v in variants))
+	return variants
+
+
+def variant_filename(stem, variant):
+	return f"{stem}-{variant['width']}w.{variant['format']}"
+
+
+def upload_all(variants, upload, stem):
+	"""Upload every variant in parallel with ``upload(filename, data, mime) -> url``; fails if any fails."""
+	_, upload_pool = _pools()
+	jobs = [
+		(variant, upload_pool.submit(upload, variant_filename(stem, variant), variant["data"], variant["mime"]))
+		for variant in variants
+	]
+	return [(variant, job.result()) for variant, job in jobs]
+
+
+def describe(uploaded):
+	"""Response/item fields for uploaded (variant, url) pairs."""
+	srcsets = {}
+	largest = {}
+	for variant, url in sorted(uploaded, key=lambda pair: pair[0]["width"]):
+		srcsets.setdefault(variant["format"], []).append(f"{url} {variant['width']}w")
+		largest[variant["format"]] = (variant, url)
+	# WebP is the universally supported fallback for <img src>
+	primary_variant, primary_url = largest.get("webp") or next(iter(largest.values()))
+	return {
+		"url": primary_url,
+		"width": primary_variant["width"],
+		"height": primary_variant["height"],
+		"imageVariants": {fmt: ", ".join(entries) for fmt, entries in srcsets.items()},
+	}
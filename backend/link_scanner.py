@@ -0,0 +1,316 @@
+"""Link-health scanner for the media URLs referenced by content.json.
+
+Every http(s) URL in the catalogue (images, thumbnails, videos, setup media,
+``imageVariants`` srcsets, settings) is checked with a HEAD request (falling
+back to a one-byte ranged GET for hosts that reject HEAD) from a bounded
+thread pool sharing one keep-alive session. Results are cached in the
+``link_checks`` table with the response's ETag / Last-Modified:
+
+* a URL checked OK less than ``LINK_CACHE_SECONDS`` ago is not requested;
+* older ones are revalidated with If-None-Match / If-Modified-Since, so an
+  unchanged asset costs a 304 and no body.
+
+The report lists broken (error or status >= 400) and slow (over
+``LINK_SLOW_MS``) URLs per content item.
+
+    python link_scanner.py [--force] [--all] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app_logging import get_logger
+
+log = get_logger("link_scanner")
+
+LINK_SCAN_WORKERS = int(os.environ.get("LINK_SCAN_WORKERS", "8"))
+LINK_TIMEOUT = float(os.environ.get("LINK_TIMEOUT", "10"))
+LINK_SLOW_MS = float(os.environ.get("LINK_SLOW_MS", "2000"))
+LINK_CACHE_SECONDS = float(os.environ.get("LINK_CACHE_SECONDS", str(6 * 3600)))
+# Pages rather than assets (and they block automated requests)
+LINK_SKIP_HOSTS = {h.strip() for h in os.environ.get(
+	"LINK_SKIP_HOSTS", "instagram.com,www.instagram.com").split(",") if h.strip()}
+# Source links kept for reference, not rendered
+SKIP_FIELDS = {"originalUrl"}
+HEAD_UNSUPPORTED = {403, 405, 501}
+USER_AGENT = "memorable-events-link-check/1.0"
+
+SCHEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS link_checks (
+		url TEXT PRIMARY KEY,
+		status INTEGER,
+		ok INTEGER NOT NULL,
+		ms REAL,
+		error TEXT,
+		etag TEXT,
+		last_modified TEXT,
+		content_type TEXT,
+		checked_at REAL NOT NULL
+	)
+	""",
+]
+
+_SRCSET_URL_RE = re.compile(r"(https?://\S+)(?:\s+\d+[wx])?")
+
+
+def init_schema(cur):
+	for ddl in SCHEMA:
+		cur.execute(ddl)
+
+
+def _urls_in(value):
+	if "," in value and " " in value:
+		# srcset: "url 320w, url 640w"
+		return [m.group(1).rstrip(",") for m in _SRCSET_URL_RE.finditer(value)]
+	return [value] if value.startswith(("http://", "https://")) else []
+
+
+def collect(data):
+	"""{url: [location, ...]} for every media URL in the document.
+
+	A location is ``{"section", "id", "title", "field"}``; ``field`` is the
+	path inside the item, e.g. ``setups.1.src`` or ``imageVariants.webp``.
+	"""
+	found = {}
+
+	def walk(value, section, item, path):
+		if isinstance(value, dict):
+			for key, child in value.items():
+				if key not in SKIP_FIELDS:
+					walk(child, section, item, path + [str(key)])
+		elif isinstance(value, list):
+			for index, child in enumerate(value):
+				walk(child, section, item, path + [str(index)])
+		elif isinstance(value, str):
+			for url in _urls_in(value):
+				if urlsplit(url).hostname in LINK_SKIP_HOSTS:
+					continue
+				found.setdefault(url, []).append({
+					"section": section,
+					"id": item.get("id") if isinstance(item, dict) else None,
+					"title": (item.get("title") or item.get("name") or item.get("caption")) if isinstance(item, dict) else None,
+					"field": ".".join(path),
+				})
+
+	for section, value in data.items():
+		if isinstance(value, list):
+			for item in value:
+				walk(item, section, item, [])
+		else:
+			walk(value, section, None, [])
+	return found
+
+
+class LinkScanner:
+	def __init__(self, db_path, workers=LINK_SCAN_WORKERS, timeout=LINK_TIMEOUT,
+			slow_ms=LINK_SLOW_MS, cache_seconds=LINK_CACHE_SECONDS):
+		self.db_path = db_path
+		self.workers = workers
+		self.timeout = timeout
+		self.slow_ms = slow_ms
+		self.cache_seconds = cache_seconds
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=8, pool_maxsize=workers, max_retries=0)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		self.session.headers["User-Agent"] = USER_AGENT
+		# Serializes scans; held for a whole scan
+		self._scan_lock = threading.Lock()
+		# Guards _running only, so asking for a scan never waits on one
+		self._state_lock = threading.Lock()
+		self._running = False
+		self.last_scan = None
+
+	def close(self):
+		self.session.close()
+
+	def _connect(self):
+		conn = sqlite3.connect(self.db_path, timeout=10)
+		conn.row_factory = sqlite3.Row
+		return conn
+
+	def cached(self, urls):
+		conn = self._connect()
+		try:
+			rows = {}
+			urls = list(urls)
+			# Stay under SQLite's bound-parameter limit
+			for start in range(0, len(urls), 500):
+				chunk = urls[start:start + 500]
+				for row in conn.execute(
+					f"SELECT * FROM link_checks WHERE url IN ({', '.join('?' * len(chunk))})", chunk
+				):
+					rows[row["url"]] = dict(row)
+			return rows
+		finally:
+			conn.close()
+
+	def check(self, url, previous=None):
+		"""Check one URL (conditionally if ``previous`` has validators); returns a link_checks row."""
+		headers = {}
+		if previous and previous["ok"]:
+			if previous.get("etag"):
+				headers["If-None-Match"] = previous["etag"]
+			if previous.get("last_modified"):
+				headers["If-Modified-Since"] = previous["last_modified"]
+		started = time.monotonic()
+		result = {"url": url, "status": None, "ok": 0, "error": None, "etag": None,
+			"last_modified": None, "content_type": None}
+		try:
+			resp = self.session.head(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+			if resp.status_code in HEAD_UNSUPPORTED:
+				resp = self.session.get(url, headers=dict(headers, Range="bytes=0-0"), timeout=self.timeout,
+					allow_redirects=True, stream=True)
+				resp.close()
+			result["status"] = resp.status_code
+			if resp.status_code == 304 and previous:
+				result.update(ok=1, etag=previous["etag"], last_modified=previous["last_modified"],
+					content_type=previous["content_type"])
+			else:
+				result.update(
+					ok=int(resp.status_code < 400),
+					etag=resp.headers.get("ETag"),
+					last_modified=resp.headers.get("Last-Modified"),
+					content_type=resp.headers.get("Content-Type"),
+				)
+		except requests.RequestException as e:
+			result["error"] = str(e) or repr(e)
+		result["ms"] = round((time.monotonic() - started) * 1000, 1)
+		result["checked_at"] = time.time()
+		return result
+
+	def scan(self, data, force=False):
+		"""Check every URL in ``data`` (fresh OK results are reused unless ``force``); returns the report."""
+		with self._scan_lock:
+			started = time.time()
+			locations = collect(data)
+			previous = self.cached(locations)
+			due = [url for url in locations if force or not self._fresh(previous.get(url), started)]
+			with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="link-scan") as pool:
+				results = list(pool.map(lambda url: self.check(url, previous.get(url)), due))
+			self._save(results)
+			rows = dict(previous)
+			rows.update((r["url"], r) for r in results)
+			self.last_scan = {"started_at": started, "seconds": round(time.time() - started, 2),
+				"urls": len(locations), "requested": len(due)}
+			log.info("link scan finished", **self.last_scan,
+				broken=sum(1 for r in results if not r["ok"]))
+			return self.report(data, rows)
+
+	@property
+	def scanning(self):
+		return self._running
+
+	def scan_in_background(self, load, force=False):
+		"""Scan ``load()`` on a daemon thread; False if a background scan is already running."""
+		with self._state_lock:
+			if self._running:
+				return False
+			self._running = True
+
+		def run():
+			try:
+				self.scan(load(), force=force)
+			except Exception:
+				log.exception("link scan failed")
+			finally:
+				self._running = False
+
+		threading.Thread(target=run, name="link-scan", daemon=True).start()
+		return True
+
+	def _fresh(self, row, now):
+		return row is not None and row["ok"] and now - row["checked_at"] < self.cache_seconds
+
+	def _save(self, results):
+		if not results:
+			return
+		conn = self._connect()
+		try:
+			conn.executemany(
+				"INSERT OR REPLACE INTO link_checks (url, status, ok, ms, error, etag, last_modified, content_type, checked_at) "
+				"VALUES (:url, :status, :ok, :ms, :error, :etag, :last_modified, :content_type, :checked_at)",
+				results,
+			)
+			conn.commit()
+		finally:
+			conn.close()
+
+	def report(self, data, rows=None, include_ok=False):
+		"""Per-item report from cached results (``rows`` defaults to what's stored)."""
+		locations = collect(data)
+		if rows is None:
+			rows = self.cached(locations)
+		entries = []
+		counts = {"ok": 0, "broken": 0, "slow": 0, "unchecked": 0}
+		for url, places in locations.items():
+			row = rows.get(url)
+			if row is None:
+				state = "unchecked"
+			elif not row["ok"]:
+				state = "broken"
+			elif row["ms"] is not None and row["ms"] > self.slow_ms:
+				state = "slow"
+			else:
+				state = "ok"
+			counts[state] += 1
+			if state == "ok" and not include_ok:
+				continue
+			for place in places:
+				entries.append(dict(place, url=url, state=state,
+					status=row and row["status"], ms=row and row["ms"], error=row and row["error"],
+					checked_at=row and row["checked_at"]))
+		order = {"broken": 0, "slow": 1, "unchecked": 2, "ok": 3}
+		entries.sort(key=lambda e: (order[e["state"]], e["section"], str(e["id"]), e["field"]))
+		return {"summary": dict(counts, urls=len(locations)), "last_scan": self.last_scan, "items": entries}
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	parser.add_argument("--force", action="store_true", help="revalidate every URL, even recently checked ones")
+	parser.add_argument("--all", action="store_true", help="list healthy URLs too")
+	parser.add_argument("--json", action="store_true")
+	args = parser.parse_args(argv)
+
+	from content_store import ContentStore
+	from default_data import DEFAULT_DATA
+
+	base_dir = os.path.dirname(os.path.abspath(__file__))
+	db_path = os.environ.get("DB_PATH") or os.path.join(base_dir, "data.db")
+	conn = sqlite3.connect(db_path)
+	init_schema(conn.cursor())
+	conn.commit()
+	conn.close()
+
+	data = ContentStore(os.path.join(base_dir, "content.json"), DEFAULT_DATA).read()
+	scanner = LinkScanner(db_path)
+	report = scanner.scan(data, force=args.force)
+	if args.all:
+		report = scanner.report(data, include_ok=True)
+		report["last_scan"] = scanner.last_scan
+	if args.json:
+		print(json.dumps(report, indent=2))
+	else:
+		for e in report["items"]:
+			detail = e["error"] or (f"HTTP {e['status']}" if e["status"] else "")
+			ms = f"{e['ms']:.0f}ms" if e["ms"] is not None else "-"
+			print(f"{e['state']:<9} {e['section']}/{e['id']} {e['field']}: {e['url']} ({detail}, {ms})")
+		s = report["summary"]
+		print(f"{s['urls']} URLs: {s['ok']} ok, {s['slow']} slow, {s['broken']} broken "
+			f"({report['last_scan']['requested']} requested in {report['last_scan']['seconds']}s)")
+	return 1 if report["summary"]["broken"] else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,398 @@
+"""Inquiry notifications: several channels, each sending immediately or in digests.
+
+Every configured channel listed in ``NOTIFY_CHANNELS`` gets each inquiry
+(without it, only the first configured one, in the order of ``CHANNELS``, as
+before). A channel's policy is ``immediate`` (the default) or a digest::
+
+    NOTIFY_CHANNELS="telegram,twilio"
+    NOTIFY_POLICIES="twilio=digest every=300 max=20"
+
+A digest channel collects inquiries and sends them as one message when the
+oldest has waited ``every`` seconds or ``max`` are pending. Every send also
+takes a token from the channel's bucket (``NOTIFY_RATES``, same syntax as
+``RATE_LIMITS``); when an immediate channel runs out, further inquiries are
+coalesced and go out together as soon as a token is available. Outbound
+calls per channel are therefore bounded by its rate however many inquiries
+arrive; the inquiries themselves are always in the database.
+
+Each venue has its own Notifier, and pending inquiries are rows of its
+``notification_queue`` table, so they survive restarts and every worker
+adds to the same digest. Every worker runs a flush thread, but only the one
+holding the ``notification_lease`` row sends; another takes over when that
+lease has not been renewed for ``NOTIFY_LEASE_SECONDS``. A failed send keeps
+its rows and is retried after ``NOTIFY_RETRY_SECONDS``. Provider rate buckets
+live in the main database, because the credentials are shared by all venues.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from app_logging import get_logger
+from rate_limit import Limit, SqliteBuckets, parse_mapping
+
+log = get_logger("notifications")
+
+NOTIFY_CHANNELS = [c.strip() for c in os.environ.get("NOTIFY_CHANNELS", "").split(",") if c.strip()]
+NOTIFY_FLUSH_INTERVAL = float(os.environ.get("NOTIFY_FLUSH_INTERVAL", "1"))
+# Per channel; the oldest are dropped from the message text (they still count) beyond this
+NOTIFY_MAX_PENDING = int(os.environ.get("NOTIFY_MAX_PENDING", "500"))
+# A flushing worker that stops renewing its lease for this long is presumed dead
+NOTIFY_LEASE_SECONDS = float(os.environ.get("NOTIFY_LEASE_SECONDS", "30"))
+NOTIFY_RETRY_SECONDS = float(os.environ.get("NOTIFY_RETRY_SECONDS", "60"))
+# Entries a provider never accepted are dropped after this long (the inquiries stay in the database)
+NOTIFY_RETAIN_SECONDS = float(os.environ.get("NOTIFY_RETAIN_SECONDS", str(7 * 86400)))
+# WhatsApp number that receives inquiries (Twilio, WhatsApp Cloud, CallMeBot)
+ADMIN_PHONE = os.environ.get("NOTIFY_PHONE", "919978634999")
+
+# Providers' documented (or observed) limits for one recipient, with room to spare
+DEFAULT_RATES = {
+	"twilio": "30/minute burst=5",
+	"whatsapp_cloud": "30/minute burst=5",
+	"discord": "20/minute burst=5",
+	"telegram": "15/minute burst=5",
+	"callmebot": "4/minute burst=1",
+}
+# Longest message body each provider accepts
+MAX_LENGTH = {
+	"twilio": 1600,
+	"whatsapp_cloud": 4096,
+	"discord": 2000,
+	"telegram": 4096,
+	"callmebot": 1000,
+}
+
+
+def _twilio(text):
+	sid = os.environ.get("TWILIO_ACCOUNT_SID")
+	token = os.environ.get("TWILIO_AUTH_TOKEN")
+	if not (sid and token):
+		return None
+	# Default Twilio Sandbox number if not specified
+	sender = os.environ.get("TWILIO_FROM_NUMBER", "whatsapp:+14155238886")
+	url = f"https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+	form = {"From": sender, "To": f"whatsapp:+{ADMIN_PHONE}", "Body": text}
+	return "POST", url, {"data": form, "auth": (sid, token)}
+
+
+def _whatsapp_cloud(text):
+	number_id = os.environ.get("WHATSAPP_CLOUD_NUMBER_ID")
+	if not number_id:
+		return None
+	url = f"https://graph.facebook.com/v17.0/{number_id}/messages"
+	headers = {"Authorization": f"Bearer {os.environ.get('WHATSAPP_CLOUD_TOKEN')}", "Content-Type": "application/json"}
+	payload = {"messaging_product": "whatsapp", "to": ADMIN_PHONE, "type": "text", "text": {"body": text}}
+	return "POST", url, {"json": payload, "headers": headers}
+
+
+def _discord(text):
+	url = os.environ.get("DISCORD_WEBHOOK_URL")
+	if not url:
+		return None
+	return "POST", url, {"json": {"content": f"🎉 **New Inquiry**\n{text}"}}
+
+
+def _telegram(text):
+	token = os.environ.get("TELEGRAM_BOT_TOKEN")
+	if not token:
+		return None
+	url = f"https://api.telegram.org/bot{token}/sendMessage"
+	payload = {"chat_id": os.environ.get("TELEGRAM_CHAT_ID"), "text": text, "parse_mode": "Markdown"}
+	return "POST", url, {"json": payload}
+
+
+def _callmebot(text):
+	api_key = os.environ.get("WHATSAPP_BOT_API_KEY")
+	if not api_key:
+		return None
+	url = (f"https://api.callmebot.com/whatsapp.php?phone={ADMIN_PHONE}"
+		f"&text={urllib.parse.quote(text)}&apikey={api_key}")
+	return "GET", url, {}
+
+
+SCHEMA = [
+	"""
+	CREATE TABLE IF NOT EXISTS notification_queue (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		channel TEXT NOT NULL,
+		text TEXT NOT NULL,
+		inquiry_id INTEGER,
+		created_at REAL NOT NULL
+	)
+	""",
+	"CREATE INDEX IF NOT EXISTS idx_notification_queue_channel ON notification_queue (channel, id)",
+	"""
+	CREATE TABLE IF NOT EXISTS notification_lease (
+		name TEXT PRIMARY KEY,
+		owner TEXT NOT NULL,
+		expires_at REAL NOT NULL
+	) WITHOUT ROWID
+	""",
+]
+
+# channel (also its http_client name) -> build(text) -> (method, url, kwargs), or None if not configured
+CHANNELS = {
+	"twilio": _twilio,
+	"whatsapp_cloud": _whatsapp_cloud,
+	"discord": _discord,
+	"telegram": _telegram,
+	"callmebot": _callmebot,
+}
+
+
+def configured_channels(names=None):
+	"""Channels from ``names`` (default: the first configured one) that have credentials."""
+	configured = [name for name, build in CHANNELS.items() if build("") is not None]
+	if os.environ.get("FONOSTER_ACCESS_KEY_ID") and not configured:
+		# Fonoster's endpoint and payload are unverified; sends were only ever simulated
+		log.info("inquiry notification simulated (verify endpoint)", channel="fonoster")
+	if not names:
+		return configured[:1]
+	unknown = [name for name in names if name not in CHANNELS]
+	if unknown:
+		log.warning("unknown notification channels ignored", channels=unknown)
+	return [name for name in names if name in configured]
+
+
+class Policy:
+	def __init__(self, every=0, max_pending=1):
+		self.every = every
+		self.max_pending = max(1, max_pending)
+
+	@property
+	def digest(self):
+		return self.every > 0
+
+	@classmethod
+	def parse(cls, spec):
+		"""``immediate`` or ``digest every=SECONDS max=COUNT``."""
+		parts = spec.split()
+		if not parts or parts[0] == "immediate":
+			return cls()
+		if parts[0] != "digest":
+			raise ValueError(f"unknown notification policy: {spec!r}")
+		options = dict(part.partition("=")[::2] for part in parts[1:])
+		return cls(float(options.get("every", 300)), int(options.get("max", 20)))
+
+
+def digest_text(texts, skipped=0, limit=None):
+	"""One message for several inquiries, cut to ``limit`` characters at an inquiry boundary."""
+	if len(texts) == 1 and not skipped:
+		return texts[0][:limit] if limit else texts[0]
+	total = len(texts) + skipped
+	header = f"*{total} new inquiries via Website*"
+	parts = []
+	length = len(header) + 40
+	for text in texts:
+		if limit and length + len(text) + 7 > limit:
+			break
+		parts.append(text)
+		length += len(text) + 7
+	more = total - len(parts)
+	body = header + "\n\n" + "\n\n-----\n\n".join(parts)
+	if more:
+		body += f"\n\n…and {more} more (see the admin panel)"
+	return body
+
+
+def init_schema(cur):
+	for ddl in SCHEMA:
+		cur.execute(ddl)
+
+
+class Notifier:
+	def __init__(self, send, db_path, channels=None, policies=None, rates=None, rate_db_path=None):
+		"""``send(channel, method, url, kwargs)`` performs one provider call and raises if it failed."""
+		self.send = send
+		self.db_path = db_path
+		policies = policies or {}
+		rates = dict(DEFAULT_RATES, **(rates or {}))
+		names = configured_channels(channels)
+		self.policies = {name: Policy.parse(policies.get(name, "immediate")) for name in names}
+		self.limits = {name: Limit.parse(rates.get(name, "30/minute")) for name in names}
+		# Not shared: only says when this worker may try a channel again
+		self._retry_at = {}
+		self.buckets = SqliteBuckets(rate_db_path or db_path)
+		for path, init in ((db_path, init_schema), (self.buckets.db_path, self.buckets.init_schema)):
+			conn = sqlite3.connect(path)
+			init(conn.cursor())
+			conn.commit()
+			conn.close()
+		self._lock = threading.Lock()
+		# One flush at a time per process; a request never waits for another thread's provider call
+		self._flushing = threading.Lock()
+		self._stopped = threading.Event()
+		self._thread = None
+		self._pid = None
+		self._token = secrets.token_hex(4)
+
+	@classmethod
+	def from_env(cls, send, db_path, rate_db_path=None):
+		return cls(
+			send,
+			db_path,
+			channels=NOTIFY_CHANNELS,
+			policies=parse_mapping(os.environ.get("NOTIFY_POLICIES"), str),
+			rates=parse_mapping(os.environ.get("NOTIFY_RATES"), str),
+			rate_db_path=rate_db_path,
+		)
+
+	def _connect(self):
+		return sqlite3.connect(self.db_path, timeout=10)
+
+	def notify(self, text, inquiry_id=None):
+		"""Queue one inquiry's message on every channel; sent now if this worker may flush."""
+		if not self.policies:
+			return
+		now = time.time()
+		conn = self._connect()
+		try:
+			with conn:
+				conn.executemany(
+					"INSERT INTO notification_queue (channel, text, inquiry_id, created_at) VALUES (?, ?, ?, ?)",
+					[(name, text, inquiry_id, now) for name in self.policies],
+				)
+		except sqlite3.Error:
+			# The inquiry itself is saved; only its notification is lost
+			log.exception("could not queue inquiry notification", inquiry_id=inquiry_id)
+			return
+		finally:
+			conn.close()
+		self.ensure_started()
+		if not self.flush():
+			log.info("inquiry notification queued", inquiry_id=inquiry_id)
+
+	# ----- flushing (lease holder only) -----
+
+	@property
+	def _owner(self):
+		return f"{os.getpid()}:{self._token}"
+
+	def _take_lease(self, conn):
+		"""Claim or renew the flush lease; True if this worker holds it."""
+		now = time.time()
+		with conn:
+			conn.execute(
+				"INSERT OR IGNORE INTO notification_lease (name, owner, expires_at) VALUES ('flush', '', 0)"
+			)
+			cur = conn.execute(
+				"UPDATE notification_lease SET owner = ?, expires_at = ? "
+				"WHERE name = 'flush' AND (owner = ? OR expires_at < ?)",
+				(self._owner, now + NOTIFY_LEASE_SECONDS, self._owner, now),
+			)
+		return cur.rowcount == 1
+
+	def _release_lease(self, conn):
+		with conn:
+			conn.execute(
+				"UPDATE notification_lease SET expires_at = 0 WHERE name = 'flush' AND owner = ?", (self._owner,)
+			)
+
+	def _due(self, name, rows, now):
+		policy = self.policies[name]
+		if time.monotonic() < self._retry_at.get(name, 0):
+			return False
+		if not policy.digest or len(rows) >= policy.max_pending:
+			return True
+		return now - rows[0][2] >= policy.every
+
+	def _flush_channel(self, conn, name, force=False):
+		"""Send the channel's queued inquiries as one message if due and a token is available; True if sent."""
+		rows = conn.execute(
+			"SELECT id, text, created_at FROM notification_queue WHERE channel = ? ORDER BY id", (name,)
+		).fetchall()
+		if not rows or not (force or self._due(name, rows, time.time())):
+			return False
+		try:
+			allowed, retry_after = self.buckets.take(f"notify:{name}", self.limits[name])
+		except sqlite3.Error:
+			log.exception("notification rate limiter unavailable, sending", channel=name)
+			allowed, retry_after = True, 0
+		if not allowed and not force:
+			self._retry_at[name] = time.monotonic() + retry_after
+			return False
+		texts = [row[1] for row in rows[-NOTIFY_MAX_PENDING:]]
+		skipped = len(rows) - len(texts)
+		method, url, kwargs = CHANNELS[name](digest_text(texts, skipped, MAX_LENGTH.get(name)))
+		try:
+			self.send(name, method, url, kwargs)
+		except Exception:
+			# Left queued: the next attempt sends these together with anything that arrives meanwhile
+			self._retry_at[name] = time.monotonic() + NOTIFY_RETRY_SECONDS
+			log.exception("failed to send inquiry notification, will retry", channel=name, inquiries=len(rows),
+				retry_in=NOTIFY_RETRY_SECONDS)
+			return False
+		with conn:
+			conn.execute("DELETE FROM notification_queue WHERE channel = ? AND id <= ?", (name, rows[-1][0]))
+		self._retry_at.pop(name, None)
+		log.info("inquiry notification sent", channel=name, inquiries=len(rows))
+		return True
+
+	def flush(self, force=False):
+		"""Send whatever is due (everything queued if ``force``, ignoring windows and rates).
+
+		Does nothing unless this worker holds (or can take) the flush lease; returns whether anything was sent.
+		"""
+		if not self.policies or not self._flushing.acquire(blocking=False):
+			return False
+		try:
+			conn = self._connect()
+			try:
+				if not self._take_lease(conn):
+					return False
+				with conn:
+					stale = conn.execute(
+						"DELETE FROM notification_queue WHERE created_at < ?", (time.time() - NOTIFY_RETAIN_SECONDS,)
+					).rowcount
+				if stale:
+					log.warning("dropped notifications no provider accepted", entries=stale)
+				sent = False
+				for name in self.policies:
+					sent = self._flush_channel(conn, name, force) or sent
+				return sent
+			finally:
+				conn.close()
+		finally:
+			self._flushing.release()
+
+	def pending(self):
+		conn = self._connect()
+		try:
+			counts = dict(conn.execute("SELECT channel, COUNT(*) FROM notification_queue GROUP BY channel"))
+		finally:
+			conn.close()
+		return {name: counts.get(name, 0) for name in self.policies}
+
+	def _loop(self):
+		while not self._stopped.wait(NOTIFY_FLUSH_INTERVAL):
+			try:
+				self.flush()
+			except Exception:
+				log.exception("notification flush failed")
+
+	def ensure_started(self):
+		"""Start the flush thread (again after a fork); a no-op without channels or once closed."""
+		if not self.policies or self._stopped.is_set() or (
+				self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()):
+			return
+		with self._lock:
+			if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+				return
+			self._pid = os.getpid()
+			self._thread = threading.Thread(target=self._loop, name="notify-flush", daemon=True)
+			self._thread.start()
+
+	def close(self):
+		"""Stop the flush thread and hand the lease to another worker; queued entries stay queued."""
+		self._stopped.set()
+		if not self.policies:
+			return
+		conn = self._connect()
+		try:
+			self._release_lease(conn)
+		except sqlite3.Error:
+			log.exception("could not release the notification lease")
+		finally:
+			conn.close()
@@ -0,0 +1,158 @@
+"""Fractional sort keys for the ordered content collections.
+
+Every item of a collection in ``ORDERED_COLLECTIONS`` carries a ``position``:
+a string of base-62 digits read as a fraction (``"V"`` is 31/62, ``"Vk"``
+lies between ``"V"`` and ``"W"``). Plain string comparison orders them, and
+there is always a key between two others, so moving an item rewrites only
+that item's ``position``; its neighbours keep theirs.
+
+Listings are served sorted by position (``in_order``), whatever the order of
+the list in content.json. Items written by older versions have no position;
+``assign_missing`` numbers them once, in their current list order.
+"""
+import re
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_INDEX = {d: i for i, d in enumerate(DIGITS)}
+# No trailing "0": "V" and "V0" would be the same fraction
+_KEY_RE = re.compile(r"^[0-9A-Za-z]*[1-9A-Za-z]$")
+
+ORDERED_COLLECTIONS = (
+	"indoorDecorations",
+	"outdoorDecorations",
+	"indoorPlans",
+	"outdoorPlans",
+	"cakes",
+	"galleryItems",
+	"addons",
+	"reels",
+)
+
+
+def valid_key(key):
+	return isinstance(key, str) and bool(_KEY_RE.match(key))
+
+
+def _midpoint(a, b):
+	"""Key strictly between ``a`` ("" for the start) and ``b`` (None for the end)."""
+	if b is not None:
+		n = 0
+		while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+			n += 1
+		if n:
+			return b[:n] + _midpoint(a[n:], b[n:])
+	low = _INDEX[a[0]] if a else 0
+	high = _INDEX[b[0]] if b is not None else len(DIGITS)
+	if high - low > 1:
+		return DIGITS[(low + high) // 2]
+	# Adjacent digits: b's first digit alone is still above a, unless b is just that digit
+	if b is not None and len(b) > 1:
+		return b[:1]
+	return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def key_after(a):
+	"""A short key above ``a`` (the next value at ``a``'s last non-"z" digit)."""
+	if not a:
+		return DIGITS[len(DIGITS) // 2]
+	for i in range(len(a) - 1, -1, -1):
+		digit = _INDEX[a[i]]
+		if digit < len(DIGITS) - 1:
+			return a[:i] + DIGITS[digit + 1]
+	return a + DIGITS[len(DIGITS) // 2]
+
+
+def key_between(a, b):
+	"""Key strictly between ``a`` and ``b``; either may be None (start / end)."""
+	if a is not None and b is not None and a >= b:
+		raise ValueError(f"{a!r} is not below {b!r}")
+	if b is None:
+		return key_after(a)
+	return _midpoint(a or "", b)
+
+
+def spread(count):
+	"""``count`` evenly spaced keys of the shortest width that fits them."""
+	width = 1
+	while len(DIGITS) ** width <= count:
+		width += 1
+	step = len(DIGITS) ** width // (count + 1)
+	keys = []
+	for i in range(1, count + 1):
+		value, digits = i * step, []
+		for _ in range(width):
+			value, digit = divmod(value, len(DIGITS))
+			digits.append(DIGITS[digit])
+		keys.append("".join(reversed(digits)).rstrip("0"))
+	return keys
+
+
+def sort_items(items):
+	"""Items by position; ones without a valid position follow, in list order."""
+	return sorted(items, key=lambda it: (0, it["position"]) if valid_key(it.get("position")) else (1, ""))
+
+
+def in_order(data):
+	"""Shallow copy of the document with the ordered collections sorted."""
+	ordered = dict(data)
+	for name in ORDERED_COLLECTIONS:
+		items = ordered.get(name)
+		if isinstance(items, list) and all(isinstance(it, dict) for it in items):
+			ordered[name] = sort_items(items)
+	return ordered
+
+
+def _renumber(items):
+	for item, key in zip(sort_items(items), spread(len(items))):
+		item["position"] = key
+
+
+def assign_missing(data):
+	"""Give every item of an ordered collection a position (renumbering a collection that lacks some); returns the count."""
+	changed = 0
+	for name in ORDERED_COLLECTIONS:
+		items = data.get(name)
+		if not isinstance(items, list) or not all(isinstance(it, dict) for it in items):
+			continue
+		if any(not valid_key(it.get("position")) for it in items):
+			_renumber(items)
+			changed += len(items)
+	return changed
+
+
+def next_position(items):
+	"""Position for an item appended after every other one."""
+	keys = [it["position"] for it in items if isinstance(it, dict) and valid_key(it.get("position"))]
+	return key_after(max(keys, default=None))
+
+
+def move(items, item_id, before_id=None):
+	"""Give item ``item_id`` a position just before ``before_id`` (None: last); returns it.
+
+	Returns None if ``item_id`` is unknown and raises KeyError for an unknown
+	``before_id``. Only the moved item changes, unless neighbouring positions
+	are missing or duplicated (then the collection is renumbered first).
+	"""
+	by_id = {str(it.get("id")): it for it in items if isinstance(it, dict)}
+	item = by_id.get(str(item_id))
+	if item is None:
+		return None
+	if before_id is not None and str(before_id) not in by_id:
+		raise KeyError(before_id)
+	if before_id is not None and str(before_id) == str(item_id):
+		return item
+
+	def neighbours():
+		others = [it for it in sort_items(items) if it is not item]
+		if before_id is None:
+			return (others[-1].get("position") if others else None), None
+		index = next(i for i, it in enumerate(others) if str(it.get("id")) == str(before_id))
+		return (others[index - 1].get("position") if index else None), others[index].get("position")
+
+	low, high = neighbours()
+	if (low is not None and not valid_key(low)) or (high is not None and not valid_key(high)) \
+			or (low is not None and high is not None and low >= high):
+		_renumber(items)
+		low, high = neighbours()
+	item["position"] = key_between(low, high)
+	return item
@@ -0,0 +1,124 @@
+"""On-demand and sampled request profiling.
+
+Two ways a request ends up under cProfile:
+
+* on demand: an authenticated admin sends ``X-Profile: 1`` (or ``?_profile=1``);
+* sampled: with ``PROFILE_SAMPLE_RATE`` > 0, that fraction of requests is
+  profiled and kept only if it is among the ``PROFILE_SLOWEST`` slowest
+  profiled requests seen for its endpoint.
+
+Profiles are written as ``.prof`` files (load with ``pstats`` or snakeviz)
+next to a small JSON description, in a directory bounded to
+``PROFILE_RING_SIZE`` on-demand profiles plus the per-endpoint slowest set.
+With ``PROFILING`` unset no hooks are installed at all.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("profiler")
+
+PROFILING = os.environ.get("PROFILING", "").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOWEST = int(os.environ.get("PROFILE_SLOWEST", "5"))
+PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", "50"))
+
+_NAME_RE = re.compile(r"^[\w.-]+\.prof$")
+
+
+def start():
+	"""Enabled profiler, or None if another profiler is already active (e.g. a concurrent request)."""
+	profile = cProfile.Profile()
+	try:
+		profile.enable()
+	except ValueError:
+		return None
+	return profile
+
+
+class ProfileStore:
+	def __init__(self, directory, ring_size=PROFILE_RING_SIZE, slowest=PROFILE_SLOWEST):
+		self.directory = directory
+		self.ring_size = ring_size
+		self.slowest = slowest
+		self._lock = threading.Lock()
+		os.makedirs(directory, exist_ok=True)
+
+	def _meta(self):
+		entries = []
+		for filename in os.listdir(self.directory):
+			if not filename.endswith(".prof.json"):
+				continue
+			try:
+				with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+					entries.append(json.load(f))
+			except (OSError, json.JSONDecodeError):
+				continue
+		return entries
+
+	def list(self):
+		return sorted(self._meta(), key=lambda m: m["created_at"], reverse=True)
+
+	def _remove(self, name):
+		for path in (os.path.join(self.directory, name), os.path.join(self.directory, name + ".json")):
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+
+	def save(self, profile, mode, endpoint, method, path, status, ms):
+		"""Persist a finished profile; sampled ones only if among the slowest for ``endpoint``."""
+		with self._lock:
+			entries = self._meta()
+			if mode == "sampled":
+				same = sorted((m for m in entries if m["mode"] == "sampled" and m["endpoint"] == endpoint),
+					key=lambda m: m["ms"])
+				if len(same) >= self.slowest:
+					if ms <= same[0]["ms"]:
+						return None
+					for old in same[:len(same) - self.slowest + 1]:
+						self._remove(old["name"])
+			else:
+				ring = sorted((m for m in entries if m["mode"] == "on_demand"), key=lambda m: m["created_at"])
+				for old in ring[:max(0, len(ring) - self.ring_size + 1)]:
+					self._remove(old["name"])
+
+			created = time.time()
+			safe_endpoint = re.sub(r"[^\w.-]", "_", endpoint or "unknown")
+			stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(created))
+			name = f"{stamp}-{os.urandom(3).hex()}-{safe_endpoint}-{int(ms)}ms.prof"
+			profile.dump_stats(os.path.join(self.directory, name))
+			meta = {
+				"name": name,
+				"mode": mode,
+				"endpoint": endpoint,
+				"method": method,
+				"path": path,
+				"status": status,
+				"ms": round(ms, 1),
+				"created_at": created,
+			}
+			with open(os.path.join(self.directory, name + ".json"), "w", encoding="utf-8") as f:
+				json.dump(meta, f)
+		log.info("profile saved", name=name, mode=mode, endpoint=endpoint, ms=round(ms, 1))
+		return name
+
+	def path(self, name):
+		"""Absolute path of a stored profile, or None for unknown/unsafe names."""
+		if not _NAME_RE.match(name or ""):
+			return None
+		full = os.path.join(self.directory, name)
+		return full if os.path.exists(full) else None
+
+	def summary(self, name, limit=40, sort="cumulative"):
+		out = io.StringIO()
+		stats = pstats.Stats(self.path(name), stream=out)
+		stats.strip_dirs().sort_stats(sort).print_stats(limit)
+		return out.getvalue()
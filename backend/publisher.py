@@ -0,0 +1,152 @@
+"""Publish the public read API as static, content-hashed JSON files.
+
+After content writes (debounced), every public view is rendered to
+``<name>.<hash>.json`` plus ``.gz`` / ``.br`` siblings in the snapshot
+directory, then ``manifest.json`` is atomically replaced to point at them.
+Hashed files never change, so a web server can serve them with
+``Cache-Control: immutable``; only the small manifest needs revalidation.
+Files from the previous generation are kept so in-flight clients still
+resolve; older ones are removed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+from app_logging import get_logger
+
+log = get_logger("publisher")
+
+MANIFEST = "manifest.json"
+
+
+def _atomic_write(path, payload):
+	fd, tmp = tempfile.mkstemp(prefix=".publish-", dir=os.path.dirname(path))
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(payload)
+		os.replace(tmp, path)
+	except BaseException:
+		if os.path.exists(tmp):
+			os.remove(tmp)
+		raise
+
+
+class SnapshotPublisher:
+	def __init__(self, out_dir, store, render, debounce=2.0):
+		"""``render(data)`` returns {view name: JSON-serializable payload}."""
+		self.out_dir = out_dir
+		self.store = store
+		self.render = render
+		self.debounce = debounce
+		self._timer = None
+		self._timer_lock = threading.Lock()
+		os.makedirs(out_dir, exist_ok=True)
+
+	# ----- scheduling -----
+
+	def schedule(self, *args):
+		"""Debounced publish; usable directly as a ContentStore listener."""
+		with self._timer_lock:
+			if self._timer is not None:
+				self._timer.cancel()
+			self._timer = threading.Timer(self.debounce, self._publish_safely)
+			self._timer.daemon = True
+			self._timer.start()
+
+	def close(self):
+		"""Run a pending debounced publish now (before the store goes away)."""
+		with self._timer_lock:
+			timer, self._timer = self._timer, None
+		if timer is not None and not timer.finished.is_set():
+			timer.cancel()
+			timer.join()
+			self._publish_safely()
+
+	def _publish_safely(self):
+		try:
+			self.publish()
+		except Exception:
+			log.exception("snapshot publish failed")
+
+	def manifest(self):
+		try:
+			with open(os.path.join(self.out_dir, MANIFEST), encoding="utf-8") as f:
+				return json.load(f)
+		except (FileNotFoundError, json.JSONDecodeError):
+			return None
+
+	def publish_if_stale(self):
+		current = self.manifest()
+		if not current or current.get("fingerprint") != self.store.fingerprint:
+			self.schedule()
+
+	# ----- publishing -----
+
+	def _write_variant_set(self, name, payload):
+		body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+		digest = hashlib.sha256(body).hexdigest()
+		filename = f"{name}.{digest[:16]}.json"
+		path = os.path.join(self.out_dir, filename)
+		encodings = ["gzip"]
+		if not os.path.exists(path):
+			_atomic_write(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+			if brotli is not None:
+				_atomic_write(path + ".br", brotli.compress(body, quality=11))
+			# The plain file goes last: its presence means the set is complete
+			_atomic_write(path, body)
+		if brotli is not None:
+			encodings.append("br")
+		return {"path": filename, "bytes": len(body), "sha256": digest, "encodings": encodings}
+
+	def publish(self):
+		started = time.perf_counter()
+		lock_fd = os.open(os.path.join(self.out_dir, ".publish.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+		try:
+			if fcntl is not None:
+				fcntl.flock(lock_fd, fcntl.LOCK_EX)
+			fingerprint = self.store.fingerprint
+			views = self.render(self.store.read())
+			files = {name: self._write_variant_set(name, payload) for name, payload in views.items()}
+
+			previous = self.manifest() or {}
+			manifest = {
+				"fingerprint": fingerprint,
+				"generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+				"files": files,
+			}
+			_atomic_write(
+				os.path.join(self.out_dir, MANIFEST),
+				json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+			)
+			self._prune(files, previous.get("files", {}))
+		finally:
+			if fcntl is not None:
+				fcntl.flock(lock_fd, fcntl.LOCK_UN)
+			os.close(lock_fd)
+		log.info("published static snapshot", views=len(files), ms=round((time.perf_counter() - started) * 1000, 1))
+		return manifest
+
+	def _prune(self, current, previous):
+		keep = {MANIFEST, ".publish.lock"}
+		for entry in list(current.values()) + list(previous.values()):
+			keep.update({entry["path"], entry["path"] + ".gz", entry["path"] + ".br"})
+		for filename in os.listdir(self.out_dir):
+			if filename not in keep and not filename.startswith(".publish-"):
+				try:
+					os.remove(os.path.join(self.out_dir, filename))
+				except FileNotFoundError:
+					pass
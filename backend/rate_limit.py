@@ -0,0 +1,209 @@
+"""Per-client rate limiting and per-route concurrency caps.
+
+Rate limits are token buckets keyed by (endpoint, client IP). Buckets live in
+process memory by default; with ``RATE_LIMIT_BACKEND=sqlite`` they are kept
+in the ``rate_buckets`` table so every worker draws from the same bucket.
+
+Concurrency caps bound how many requests of an expensive endpoint run at
+once in this process; excess requests are turned away immediately instead
+of queueing behind slow outbound calls until the worker times out.
+
+Limits are written as ``count/period`` with period ``second``, ``minute``,
+``hour`` or a number of seconds, optionally followed by ``burst=N``:
+``RATE_LIMITS="public_inquiry=5/minute burst=3,get_bookings=60/minute"``.
+Counts must be positive; an empty spec (``get_bookings=``) turns a default
+limit off.
+"""
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app_logging import get_logger
+
+log = get_logger("rate_limit")
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+# Number of reverse proxies in front of the app (PythonAnywhere: 1). Each appends the address it saw
+# to X-Forwarded-For, so the client is the Nth entry from the right; anything left of it is what the
+# client sent and can't be trusted. 0 (default): use the socket address.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+MAX_MEMORY_BUCKETS = 10000
+
+DEFAULT_RATE_LIMITS = {
+	"public_inquiry": "5/minute burst=3",
+	"get_bookings": "60/minute",
+	"api_get_content": "120/minute",
+	"api_content_changes": "120/minute",
+	"api_search": "60/minute",
+}
+DEFAULT_CONCURRENCY = {
+	"upload_file": 2,
+	"fetch_reel": 2,
+	"public_inquiry": 4,
+}
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class Limit:
+	def __init__(self, count, period, burst=None):
+		# A zero rate would never refill (and divide by zero); leave a route out of RATE_LIMITS instead
+		if count <= 0 or period <= 0 or (burst is not None and burst < 1):
+			raise ValueError(f"rate limit needs a positive count, period and burst: {count}/{period} burst={burst}")
+		self.rate = count / period  # tokens per second
+		self.capacity = burst if burst is not None else count
+
+	@classmethod
+	def parse(cls, spec):
+		parts = spec.split()
+		count, _, period = parts[0].partition("/")
+		period = PERIODS.get(period) or float(period or 1)
+		burst = None
+		for part in parts[1:]:
+			key, _, value = part.partition("=")
+			if key == "burst":
+				burst = int(value)
+		return cls(int(count), period, burst)
+
+
+def parse_mapping(value, convert):
+	"""``"a=x,b=y"`` -> {a: convert(x), b: convert(y)}."""
+	result = {}
+	for entry in (value or "").split(","):
+		name, sep, spec = entry.partition("=")
+		if sep and name.strip():
+			result[name.strip()] = convert(spec.strip())
+	return result
+
+
+def _refill(tokens, updated, now, limit):
+	return min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+
+def _verdict(tokens, limit):
+	"""(allowed, tokens after the attempt, seconds until a token is available)."""
+	if tokens >= 1:
+		return True, tokens - 1, 0
+	return False, tokens, math.ceil((1 - tokens) / limit.rate)
+
+
+class MemoryBuckets:
+	def __init__(self, max_keys=MAX_MEMORY_BUCKETS):
+		self._buckets = OrderedDict()
+		self._lock = threading.Lock()
+		self._max_keys = max_keys
+
+	def take(self, key, limit):
+		now = time.monotonic()
+		with self._lock:
+			tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+			allowed, tokens, retry_after = _verdict(_refill(tokens, updated, now, limit), limit)
+			self._buckets[key] = (tokens, now)
+			while len(self._buckets) > self._max_keys:
+				self._buckets.popitem(last=False)
+		return allowed, retry_after
+
+
+class SqliteBuckets:
+	"""Buckets shared by all workers; one short IMMEDIATE transaction per check."""
+
+	def __init__(self, db_path):
+		self.db_path = db_path
+		self._local = threading.local()
+
+	def init_schema(self, cur):
+		cur.execute(
+			"CREATE TABLE IF NOT EXISTS rate_buckets ("
+			"key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID"
+		)
+
+	def _conn(self):
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+			self._local.conn = conn
+		return conn
+
+	def take(self, key, limit):
+		now = time.time()
+		conn = self._conn()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+			tokens, updated = row if row else (limit.capacity, now)
+			allowed, tokens, retry_after = _verdict(_refill(tokens, updated, now, limit), limit)
+			conn.execute(
+				"INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now)
+			)
+			if random.random() < 0.01:
+				# Buckets idle for an hour are full again; forget them
+				conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - 3600,))
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+		return allowed, retry_after
+
+
+class ConcurrencyCaps:
+	def __init__(self, caps):
+		self._slots = {name: threading.BoundedSemaphore(n) for name, n in caps.items() if n > 0}
+
+	def try_enter(self, endpoint):
+		"""True if a slot was taken (or the endpoint is uncapped); pair with ``leave``."""
+		slots = self._slots.get(endpoint)
+		return slots is None or slots.acquire(blocking=False)
+
+	def leave(self, endpoint):
+		slots = self._slots.get(endpoint)
+		if slots is not None:
+			slots.release()
+
+
+class RateLimiter:
+	def __init__(self, db_path, limits=None, caps=None, backend=RATE_LIMIT_BACKEND):
+		limits = dict(DEFAULT_RATE_LIMITS, **(limits or {}))
+		self.limits = {name: Limit.parse(spec) for name, spec in limits.items() if spec}
+		self.caps = ConcurrencyCaps(dict(DEFAULT_CONCURRENCY, **(caps or {})))
+		self.buckets = SqliteBuckets(db_path) if backend == "sqlite" else MemoryBuckets()
+
+	@classmethod
+	def from_env(cls, db_path):
+		return cls(
+			db_path,
+			limits=parse_mapping(os.environ.get("RATE_LIMITS"), str),
+			caps=parse_mapping(os.environ.get("CONCURRENCY_LIMITS"), int),
+		)
+
+	def init_schema(self, cur):
+		if isinstance(self.buckets, SqliteBuckets):
+			self.buckets.init_schema(cur)
+
+	@staticmethod
+	def client_ip(request):
+		if RATE_LIMIT_TRUSTED_PROXIES > 0:
+			hops = [h.strip() for h in request.headers.get("X-Forwarded-For", "").split(",") if h.strip()]
+			if len(hops) >= RATE_LIMIT_TRUSTED_PROXIES:
+				return hops[-RATE_LIMIT_TRUSTED_PROXIES]
+		return request.remote_addr or "unknown"
+
+	def check(self, endpoint, client):
+		"""Seconds to wait before retrying, or 0 if the request may proceed."""
+		limit = self.limits.get(endpoint)
+		if limit is None:
+			return 0
+		try:
+			allowed, retry_after = self.buckets.take(f"{endpoint}:{client}", limit)
+		except sqlite3.Error:
+			# A locked/unavailable limiter must not take the site down with it
+			log.exception("rate limiter unavailable, allowing request", endpoint=endpoint)
+			return 0
+		if not allowed:
+			log.warning("rate limited", endpoint=endpoint, client=client, retry_after=retry_after)
+			return max(retry_after, 1)
+		return 0
@@ -22,6 +22,10 @@ CREATE TABLE IF NOT EXISTS inquiries (
 	name VARCHAR(255),
 	email VARCHAR(255),
 	message TEXT,
+	event_date VARCHAR(32),
+	contact_number VARCHAR(64),
+	indoor_outdoor VARCHAR(32),
+	event_type VARCHAR(255),
 	created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -0,0 +1,244 @@
+"""SQLite FTS5 index over the public catalogue in content.json.
+
+Rows are kept in sync incrementally: each indexed item's text is hashed, and
+only items whose hash changed are deleted/re-inserted. ``apply_change`` is
+hooked to content writes; ``ensure_current`` reconciles lazily when the
+content fingerprint differs from the one the index was built from (another
+worker or a manual edit changed the file).
+
+A result's ``snippet`` is HTML: the stored text is escaped and only the
+matched terms are wrapped in ``<mark>``, so the frontend can insert it as
+markup without passing admin-entered text through unescaped.
+"""
+import hashlib
+import html
+import re
+import sqlite3
+from contextlib import contextmanager
+
+from app_logging import get_logger
+
+log = get_logger("search_index")
+
+# content.json key -> resource slug used in URLs
+SEARCHABLE = {
+	"indoorDecorations": "indoor-decorations",
+	"outdoorDecorations": "outdoor-decorations",
+	"indoorPlans": "indoor-plans",
+	"outdoorPlans": "outdoor-plans",
+	"cakes": "cakes",
+	"galleryItems": "gallery",
+	"addons": "addons",
+	"reels": "reels",
+}
+
+# bm25 weights, in column order: collection, item_id, title, category, description, flavor, features
+BM25_WEIGHTS = "0.0, 0.0, 10.0, 4.0, 2.0, 2.0, 1.0"
+SEARCH_MAX_LIMIT = 100
+# snippet() brackets matches with these; they are turned into <mark> after the text is escaped
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _text(value):
+	if isinstance(value, (list, tuple)):
+		return " ".join(str(v) for v in value if v is not None)
+	return "" if value is None else str(value)
+
+
+def item_fields(item):
+	return {
+		"title": _text(item.get("title") or item.get("name") or item.get("caption")),
+		"category": _text(item.get("category")),
+		"description": _text(item.get("description")),
+		"flavor": _text(item.get("flavor")),
+		"features": _text(item.get("features")),
+	}
+
+
+def _hash(fields):
+	joined = "\x1f".join(fields[k] for k in ("title", "category", "description", "flavor", "features"))
+	return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def snippet_html(text):
+	"""Escape an FTS5 snippet and turn its match brackets into ``<mark>``."""
+	return html.escape(text or "").replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def build_match(query):
+	"""Turn free text into an FTS5 query: every term must match, last one as a prefix."""
+	terms = _TERM_RE.findall(query or "")
+	if not terms:
+		return None
+	quoted = [f'"{t}"' for t in terms]
+	quoted[-1] += "*"
+	return " AND ".join(quoted)
+
+
+class SearchIndex:
+	def __init__(self, db_path):
+		self.db_path = db_path
+		self.fingerprint = None
+
+	@contextmanager
+	def _connect(self):
+		conn = sqlite3.connect(self.db_path, timeout=10)
+		conn.row_factory = sqlite3.Row
+		try:
+			with conn:
+				yield conn
+		finally:
+			conn.close()
+
+	def init_schema(self):
+		with self._connect() as conn:
+			conn.execute(
+				"""
+				CREATE VIRTUAL TABLE IF NOT EXISTS search_items USING fts5(
+					collection UNINDEXED,
+					item_id UNINDEXED,
+					title, category, description, flavor, features,
+					tokenize = 'unicode61 remove_diacritics 2',
+					prefix = '2 3'
+				)
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS search_docs (
+					collection TEXT NOT NULL,
+					item_id TEXT NOT NULL,
+					doc_hash TEXT NOT NULL,
+					fts_rowid INTEGER NOT NULL,
+					PRIMARY KEY (collection, item_id)
+				)
+				"""
+			)
+			conn.execute("CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+	# ----- maintenance -----
+
+	def _sync_collection(self, conn, collection, items, stored):
+		"""Apply the difference between ``items`` and ``stored`` {item_id: (hash, rowid)}."""
+		seen = set()
+		changed = 0
+		for item in items or []:
+			if not isinstance(item, dict) or item.get("id") is None:
+				continue
+			item_id = str(item["id"])
+			seen.add(item_id)
+			fields = item_fields(item)
+			doc_hash = _hash(fields)
+			existing = stored.get(item_id)
+			if existing and existing[0] == doc_hash:
+				continue
+			if existing:
+				conn.execute("DELETE FROM search_items WHERE rowid = ?", (existing[1],))
+			cur = conn.execute(
+				"INSERT INTO search_items (collection, item_id, title, category, description, flavor, features) "
+				"VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(collection, item_id, fields["title"], fields["category"], fields["description"],
+					fields["flavor"], fields["features"]),
+			)
+			conn.execute(
+				"INSERT OR REPLACE INTO search_docs (collection, item_id, doc_hash, fts_rowid) VALUES (?, ?, ?, ?)",
+				(collection, item_id, doc_hash, cur.lastrowid),
+			)
+			changed += 1
+		for item_id, (_, rowid) in stored.items():
+			if item_id not in seen:
+				conn.execute("DELETE FROM search_items WHERE rowid = ?", (rowid,))
+				conn.execute("DELETE FROM search_docs WHERE collection = ? AND item_id = ?", (collection, item_id))
+				changed += 1
+		return changed
+
+	def _stored(self, conn, collection):
+		rows = conn.execute(
+			"SELECT item_id, doc_hash, fts_rowid FROM search_docs WHERE collection = ?", (collection,)
+		).fetchall()
+		return {r["item_id"]: (r["doc_hash"], r["fts_rowid"]) for r in rows}
+
+	def _set_fingerprint(self, conn, fingerprint):
+		conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+		self.fingerprint = fingerprint
+
+	def apply_change(self, old, new, fingerprint):
+		"""Content write hook: only collections whose lists changed are diffed."""
+		with self._connect() as conn:
+			changed = 0
+			for collection in SEARCHABLE:
+				if old is not None and (old.get(collection) == new.get(collection)):
+					continue
+				changed += self._sync_collection(conn, collection, new.get(collection), self._stored(conn, collection))
+			self._set_fingerprint(conn, fingerprint)
+		if changed:
+			log.debug("search index updated", rows=changed)
+
+	def ensure_current(self, data, fingerprint):
+		"""Reconcile against ``data`` if the index was built from another content version."""
+		if fingerprint == self.fingerprint:
+			return
+		with self._connect() as conn:
+			row = conn.execute("SELECT value FROM search_meta WHERE key = 'fingerprint'").fetchone()
+			if row and row["value"] == fingerprint:
+				self.fingerprint = fingerprint
+				return
+			changed = 0
+			for collection in SEARCHABLE:
+				changed += self._sync_collection(conn, collection, data.get(collection), self._stored(conn, collection))
+			self._set_fingerprint(conn, fingerprint)
+		log.info("search index reconciled", rows=changed)
+
+	# ----- queries -----
+
+	def search(self, query, collections=None, limit=20, offset=0):
+		"""Ranked hits (``limit`` clamped to 1..SEARCH_MAX_LIMIT; LIMIT -1 would mean no limit in SQLite)."""
+		limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+		offset = max(0, int(offset))
+		match = build_match(query)
+		if match is None:
+			return {"results": [], "facets": {}, "total": 0}
+
+		where = "search_items MATCH ?"
+		params = [match]
+		if collections:
+			where += f" AND collection IN ({','.join('?' * len(collections))})"
+			params.extend(collections)
+
+		with self._connect() as conn:
+			rows = conn.execute(
+				f"""
+				SELECT collection, item_id,
+					bm25(search_items, {BM25_WEIGHTS}) AS score,
+					snippet(search_items, -1, ?, ?, '…', 12) AS snippet
+				FROM search_items
+				WHERE {where}
+				ORDER BY score
+				LIMIT ? OFFSET ?
+				""",
+				[_MARK_OPEN, _MARK_CLOSE] + params + [limit, offset],
+			).fetchall()
+			# Facets ignore the collection filter so the UI can show counts for every tab
+			facet_rows = conn.execute(
+				"SELECT collection, COUNT(*) AS n FROM search_items WHERE search_items MATCH ? GROUP BY collection",
+				(match,),
+			).fetchall()
+
+		facets = {SEARCHABLE.get(r["collection"], r["collection"]): r["n"] for r in facet_rows}
+		total = sum(r["n"] for r in facet_rows if not collections or r["collection"] in collections)
+		return {
+			"results": [
+				{
+					"collection": r["collection"],
+					"resource": SEARCHABLE.get(r["collection"], r["collection"]),
+					"id": r["item_id"],
+					"score": round(-r["score"], 4),
+					"snippet": snippet_html(r["snippet"]),
+				}
+				for r in rows
+			],
+			"facets": facets,
+			"total": total,
+		}
@@ -0,0 +1,183 @@
+"""Private spool directory for in-flight media transfers.
+
+Videos uploaded by admins and reels downloaded from Cobalt are written here
+before being pushed to Cloudinary. The directory is outside ``static/``, so
+it is never publicly served, and:
+
+* at most ``SPOOL_MAX_TRANSFERS`` transfers per process hold a spool file;
+* the directory's total size is capped at ``SPOOL_QUOTA_MB``, enforced while
+  the file is written (a transfer that would exceed it fails with
+  ``SpoolFull`` and its partial file is removed);
+* the file is removed when the ``transfer()`` block exits, whether it
+  succeeded, returned early or raised;
+* a janitor thread removes anything older than ``SPOOL_MAX_AGE_SECONDS``
+  (files left by a killed worker).
+
+Usage:
+    with spool.transfer(upload.filename) as spooled:
+        upload.save(spooled)        # or spooled.write(chunk) in a loop
+        spooled.close()
+        cloudinary_upload(spooled.path)
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from app_logging import get_logger
+
+log = get_logger("spool")
+
+SPOOL_QUOTA_MB = int(os.environ.get("SPOOL_QUOTA_MB", "1024"))
+SPOOL_MAX_TRANSFERS = int(os.environ.get("SPOOL_MAX_TRANSFERS", "4"))
+SPOOL_MAX_AGE_SECONDS = int(os.environ.get("SPOOL_MAX_AGE_SECONDS", "7200"))
+SPOOL_JANITOR_INTERVAL = int(os.environ.get("SPOOL_JANITOR_INTERVAL", "300"))
+# Re-measure the directory after this many bytes written to one file
+_QUOTA_CHECK_BYTES = 4 * 1024 * 1024
+_SUFFIX_RE = re.compile(r"^\.[A-Za-z0-9]{1,8}$")
+
+
+class SpoolFull(Exception):
+	"""No transfer slot or spool space left; the caller should retry later."""
+
+
+class SpoolFile:
+	"""Write side of one spooled transfer (file-like enough for ``FileStorage.save``)."""
+
+	def __init__(self, spool, path):
+		self.spool = spool
+		self.path = path
+		self.bytes = 0
+		self._unchecked = 0
+		self._file = open(path, "wb")
+
+	def write(self, chunk):
+		self._file.write(chunk)
+		self.bytes += len(chunk)
+		self._unchecked += len(chunk)
+		if self._unchecked >= _QUOTA_CHECK_BYTES:
+			self._unchecked = 0
+			self._file.flush()
+			self.spool.check_quota()
+		return len(chunk)
+
+	def seek(self, offset, whence=os.SEEK_SET):
+		return self._file.seek(offset, whence)
+
+	def truncate(self, size=None):
+		# Restarting a download (retry): only what stays in the file counts
+		size = self._file.truncate(size)
+		self.bytes = size
+		return size
+
+	def close(self):
+		if not self._file.closed:
+			self._file.close()
+			self.spool.check_quota()
+
+
+class Spool:
+	def __init__(self, directory, quota_bytes=SPOOL_QUOTA_MB * 1024 * 1024, max_transfers=SPOOL_MAX_TRANSFERS,
+			max_age=SPOOL_MAX_AGE_SECONDS):
+		self.directory = directory
+		self.quota_bytes = quota_bytes
+		self.max_age = max_age
+		self._slots = threading.BoundedSemaphore(max_transfers)
+		self._janitor = None
+		self._janitor_pid = None
+		self._janitor_lock = threading.Lock()
+		self._stopped = threading.Event()
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+
+	def usage(self):
+		total = 0
+		with os.scandir(self.directory) as entries:
+			for entry in entries:
+				try:
+					if entry.is_file(follow_symlinks=False):
+						total += entry.stat(follow_symlinks=False).st_size
+				except FileNotFoundError:
+					continue
+		return total
+
+	def check_quota(self, extra=0):
+		used = self.usage()
+		if used + extra > self.quota_bytes:
+			raise SpoolFull(f"spool quota exceeded ({used // (1024 * 1024)} of {self.quota_bytes // (1024 * 1024)} MB in use)")
+
+	@contextmanager
+	def transfer(self, filename="", expected_bytes=0):
+		"""Yield a SpoolFile; it is always deleted on exit. Raises SpoolFull when out of slots or space."""
+		# A tenant opened before a pre-fork server forked has no janitor in this worker yet
+		self.start_janitor()
+		if not self._slots.acquire(blocking=False):
+			raise SpoolFull("too many transfers in progress")
+		spooled = None
+		try:
+			self.check_quota(expected_bytes or 0)
+			suffix = os.path.splitext(filename or "")[1]
+			fd, path = tempfile.mkstemp(prefix="xfer-", suffix=suffix if _SUFFIX_RE.match(suffix) else "",
+				dir=self.directory)
+			os.close(fd)
+			spooled = SpoolFile(self, path)
+			yield spooled
+		finally:
+			if spooled is not None:
+				spooled._file.close()
+				try:
+					os.remove(spooled.path)
+				except FileNotFoundError:
+					pass
+			self._slots.release()
+
+	def reap(self, directory=None, pattern=None, max_age=None):
+		"""Remove files older than ``max_age`` (optionally only names matching ``pattern``); returns the count."""
+		directory = directory or self.directory
+		cutoff = time.time() - (self.max_age if max_age is None else max_age)
+		removed = 0
+		try:
+			entries = list(os.scandir(directory))
+		except FileNotFoundError:
+			return 0
+		for entry in entries:
+			if pattern is not None and not pattern.match(entry.name):
+				continue
+			try:
+				if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+					os.remove(entry.path)
+					removed += 1
+			except FileNotFoundError:
+				continue
+		if removed:
+			log.info("stale spool files removed", directory=directory, removed=removed)
+		return removed
+
+	def _janitor_loop(self, interval):
+		while not self._stopped.is_set():
+			try:
+				self.reap()
+			except OSError:
+				log.exception("spool janitor failed")
+			self._stopped.wait(interval)
+
+	def close(self):
+		"""Stop the janitor thread."""
+		self._stopped.set()
+
+	def start_janitor(self, interval=SPOOL_JANITOR_INTERVAL):
+		"""Start the reaper thread (again after a fork); a no-op once closed."""
+		if self._stopped.is_set() or (
+				self._janitor is not None and self._janitor_pid == os.getpid() and self._janitor.is_alive()):
+			return
+		with self._janitor_lock:
+			if self._janitor is not None and self._janitor_pid == os.getpid() and self._janitor.is_alive():
+				return
+			self._janitor_pid = os.getpid()
+			self._janitor = threading.Thread(target=self._janitor_loop, args=(interval,), name="spool-janitor",
+				daemon=True)
+			self._janitor.start()
+
+	def stats(self):
+		return {"bytes": self.usage(), "quota_bytes": self.quota_bytes}
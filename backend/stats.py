@@ -0,0 +1,152 @@
+"""Rollup tables for the admin dashboard.
+
+Triggers on ``inquiries`` and ``bookings`` keep per-day counters up to date
+on every insert/update/delete, so ``range_stats`` reads at most one row per
+day (and per type/slot) instead of scanning the source tables.
+"""
+from datetime import date, timedelta
+
+ROLLUP_TABLES = {
+	"inquiry_daily_stats": """
+		CREATE TABLE inquiry_daily_stats (
+			day TEXT NOT NULL,
+			event_type TEXT NOT NULL,
+			indoor_outdoor TEXT NOT NULL,
+			count INTEGER NOT NULL DEFAULT 0,
+			PRIMARY KEY (day, event_type, indoor_outdoor)
+		) WITHOUT ROWID
+	""",
+	"booking_daily_stats": """
+		CREATE TABLE booking_daily_stats (
+			day TEXT NOT NULL,
+			time_slot TEXT NOT NULL,
+			count INTEGER NOT NULL DEFAULT 0,
+			PRIMARY KEY (day, time_slot)
+		) WITHOUT ROWID
+	""",
+}
+
+# Inquiries are bucketed by the day they arrived, bookings by the booked date.
+_INQ_KEY = "date({r}.created_at), COALESCE({r}.event_type, ''), COALESCE({r}.indoor_outdoor, '')"
+_BOOK_KEY = "{r}.date, {r}.time_slot"
+
+_INQ_UPSERT = (
+	"INSERT INTO inquiry_daily_stats (day, event_type, indoor_outdoor, count) "
+	"VALUES (" + _INQ_KEY + ", {delta}) "
+	"ON CONFLICT (day, event_type, indoor_outdoor) DO UPDATE SET count = count + ({delta});"
+)
+_BOOK_UPSERT = (
+	"INSERT INTO booking_daily_stats (day, time_slot, count) "
+	"VALUES (" + _BOOK_KEY + ", {delta}) "
+	"ON CONFLICT (day, time_slot) DO UPDATE SET count = count + ({delta});"
+)
+
+TRIGGERS = [
+	"CREATE TRIGGER IF NOT EXISTS inquiries_stats_ai AFTER INSERT ON inquiries BEGIN "
+	+ _INQ_UPSERT.format(r="NEW", delta=1) + " END",
+	"CREATE TRIGGER IF NOT EXISTS inquiries_stats_ad AFTER DELETE ON inquiries BEGIN "
+	+ _INQ_UPSERT.format(r="OLD", delta=-1) + " END",
+	"CREATE TRIGGER IF NOT EXISTS inquiries_stats_au AFTER UPDATE OF created_at, event_type, indoor_outdoor ON inquiries BEGIN "
+	+ _INQ_UPSERT.format(r="OLD", delta=-1) + " " + _INQ_UPSERT.format(r="NEW", delta=1) + " END",
+	"CREATE TRIGGER IF NOT EXISTS bookings_stats_ai AFTER INSERT ON bookings BEGIN "
+	+ _BOOK_UPSERT.format(r="NEW", delta=1) + " END",
+	"CREATE TRIGGER IF NOT EXISTS bookings_stats_ad AFTER DELETE ON bookings BEGIN "
+	+ _BOOK_UPSERT.format(r="OLD", delta=-1) + " END",
+	"CREATE TRIGGER IF NOT EXISTS bookings_stats_au AFTER UPDATE OF date, time_slot ON bookings BEGIN "
+	+ _BOOK_UPSERT.format(r="OLD", delta=-1) + " " + _BOOK_UPSERT.format(r="NEW", delta=1) + " END",
+]
+
+BACKFILL = {
+	"inquiry_daily_stats": """
+		INSERT INTO inquiry_daily_stats (day, event_type, indoor_outdoor, count)
+		SELECT date(created_at), COALESCE(event_type, ''), COALESCE(indoor_outdoor, ''), COUNT(*)
+		FROM inquiries GROUP BY 1, 2, 3
+	""",
+	"booking_daily_stats": """
+		INSERT INTO booking_daily_stats (day, time_slot, count)
+		SELECT date, time_slot, COUNT(*) FROM bookings GROUP BY 1, 2
+	""",
+}
+
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def init_schema(cur):
+	"""Create rollups (backfilled from existing rows on first run) and their triggers."""
+	for table, ddl in ROLLUP_TABLES.items():
+		exists = cur.execute(
+			"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+		).fetchone()
+		if not exists:
+			cur.execute(ddl)
+			cur.execute(BACKFILL[table])
+	for ddl in TRIGGERS:
+		cur.execute(ddl)
+
+
+def _parse_day(value, default):
+	if not value:
+		return default
+	return date.fromisoformat(value)
+
+
+def range_stats(db, start=None, end=None):
+	"""Inquiry and booking aggregates for ``start``..``end`` (inclusive ISO dates)."""
+	end_day = _parse_day(end, date.today())
+	start_day = _parse_day(start, end_day - timedelta(days=29))
+	if start_day > end_day:
+		raise ValueError("from must not be after to")
+	bounds = (start_day.isoformat(), end_day.isoformat())
+	cur = db.cursor()
+
+	per_day = {}
+	by_type = {}
+	by_place = {}
+	total = 0
+	for row in cur.execute(
+		"SELECT day, event_type, indoor_outdoor, count FROM inquiry_daily_stats "
+		"WHERE day BETWEEN ? AND ? AND count > 0",
+		bounds,
+	):
+		day, event_type, place, n = row[0], row[1] or "unspecified", row[2] or "unspecified", row[3]
+		per_day[day] = per_day.get(day, 0) + n
+		by_type[event_type] = by_type.get(event_type, 0) + n
+		by_place[place] = by_place.get(place, 0) + n
+		total += n
+
+	by_weekday = {}
+	by_slot = {}
+	grid = {}
+	booked = 0
+	for row in cur.execute(
+		"SELECT day, time_slot, count FROM booking_daily_stats WHERE day BETWEEN ? AND ? AND count > 0",
+		bounds,
+	):
+		day, slot, n = row[0], row[1], row[2]
+		try:
+			weekday = WEEKDAYS[(date.fromisoformat(day).weekday() + 1) % 7]
+		except ValueError:
+			weekday = "unknown"
+		by_weekday[weekday] = by_weekday.get(weekday, 0) + n
+		by_slot[slot] = by_slot.get(slot, 0) + n
+		grid[(weekday, slot)] = grid.get((weekday, slot), 0) + n
+		booked += n
+
+	return {
+		"from": bounds[0],
+		"to": bounds[1],
+		"inquiries": {
+			"total": total,
+			"per_day": [{"day": d, "count": per_day[d]} for d in sorted(per_day)],
+			"by_type": by_type,
+			"by_indoor_outdoor": by_place,
+		},
+		"bookings": {
+			"total": booked,
+			"by_weekday": by_weekday,
+			"by_slot": by_slot,
+			"by_weekday_slot": [
+				{"weekday": w, "time_slot": s, "count": n} for (w, s), n in sorted(grid.items())
+			],
+		},
+	}
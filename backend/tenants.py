@@ -0,0 +1,216 @@
+"""Multi-venue tenancy: request -> tenant resolution and the set of open tenants.
+
+With ``TENANT_MODE`` unset the app serves one venue (the ``default`` tenant)
+from the usual paths, exactly as before. Otherwise every request belongs to
+a tenant listed in ``TENANTS``::
+
+    TENANT_MODE=host  TENANTS="lakeside=lakeside.example.com|www.lakeside.example.com,garden=garden.example.com"
+    TENANT_MODE=path  TENANTS="lakeside,garden"      # https://api.example.com/t/lakeside/api/content
+
+``TenantMiddleware`` resolves the tenant before Flask sees the request (in
+path mode it also moves the ``/t/<id>`` prefix into SCRIPT_NAME, so routes
+are unchanged) and answers 404 for unknown hosts or prefixes. Each tenant
+has its own directory under ``TENANTS_DIR`` holding its SQLite file,
+content.json, snapshots, spool, backups and reels; the ``default`` tenant
+keeps the legacy paths so an existing single-venue deployment becomes one of
+the venues without moving files.
+
+A tenant's resources (content store with its derived-response cache, search
+index, change feed, publisher, ...) are opened on its first request and kept
+in an LRU of at most ``TENANT_MAX_OPEN`` tenants per worker; the least
+recently used idle tenant is closed when another one has to be opened.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from app_logging import get_logger
+
+log = get_logger("tenants")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TENANT_MODE = os.environ.get("TENANT_MODE", "").lower()
+TENANTS_DIR = os.environ.get("TENANTS_DIR") or os.path.join(BASE_DIR, "tenants")
+TENANT_MAX_OPEN = int(os.environ.get("TENANT_MAX_OPEN", "16"))
+TENANT_PATH_PREFIX = "/" + os.environ.get("TENANT_PATH_PREFIX", "t").strip("/")
+DEFAULT_TENANT = "default"
+# Answered without a tenant (load balancers probe by IP, not by venue host)
+TENANT_EXEMPT_PATHS = ("/healthz", "/readyz")
+
+_ID_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+
+def parse_tenants(spec):
+	"""``"id=host|host,id2"`` -> {id: [hosts]}; raises ValueError on a malformed entry."""
+	tenants = {}
+	for entry in (spec or "").split(","):
+		entry = entry.strip()
+		if not entry:
+			continue
+		tenant_id, _, hosts = entry.partition("=")
+		tenant_id = tenant_id.strip().lower()
+		if not _ID_RE.match(tenant_id):
+			raise ValueError(f"invalid tenant id: {tenant_id!r}")
+		tenants[tenant_id] = [h.strip().lower() for h in hosts.split("|") if h.strip()]
+	return tenants
+
+
+def tenant_paths(tenant_id, default_paths):
+	"""Data locations of a tenant (``default_paths`` for the default tenant)."""
+	if tenant_id == DEFAULT_TENANT:
+		return dict(default_paths)
+	root = os.path.join(TENANTS_DIR, tenant_id)
+	return {
+		"root": root,
+		"db": os.path.join(root, "data.db"),
+		"content": os.path.join(root, "content.json"),
+		"snapshots": os.path.join(root, "static", "public"),
+		"spool": os.path.join(root, "spool"),
+		"backups": os.path.join(root, "backups"),
+		"reels": os.path.join(root, "static", "reels"),
+	}
+
+
+def _not_found(start_response, message):
+	body = json.dumps({"error": message}).encode("utf-8")
+	start_response("404 NOT FOUND", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+	return [body]
+
+
+class TenantMiddleware:
+	"""WSGI middleware setting ``environ["app.tenant"]`` (None for exempt paths)."""
+
+	def __init__(self, wsgi_app, tenants, mode=TENANT_MODE, prefix=TENANT_PATH_PREFIX):
+		self.wsgi_app = wsgi_app
+		self.mode = mode
+		self.prefix = prefix
+		self.tenants = tenants
+		self.by_host = {host: tenant_id for tenant_id, hosts in tenants.items() for host in hosts}
+
+	def __call__(self, environ, start_response):
+		path = environ.get("PATH_INFO", "")
+		if self.mode == "path":
+			parts = path[len(self.prefix):].split("/", 2) if path.startswith(self.prefix + "/") else []
+			if len(parts) >= 2 and parts[1] in self.tenants:
+				environ["app.tenant"] = parts[1]
+				environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + f"{self.prefix}/{parts[1]}"
+				environ["PATH_INFO"] = "/" + (parts[2] if len(parts) == 3 else "")
+				return self.wsgi_app(environ, start_response)
+		else:
+			host = (environ.get("HTTP_HOST") or environ.get("SERVER_NAME") or "").lower().rsplit(":", 1)[0]
+			tenant_id = self.by_host.get(host)
+			if tenant_id is not None:
+				environ["app.tenant"] = tenant_id
+				return self.wsgi_app(environ, start_response)
+		if path in TENANT_EXEMPT_PATHS:
+			environ["app.tenant"] = None
+			return self.wsgi_app(environ, start_response)
+		return _not_found(start_response, "Unknown venue")
+
+
+class Tenant:
+	"""One venue's paths plus the resources opened for it (set as attributes by the app)."""
+
+	def __init__(self, tenant_id, paths):
+		self.id = tenant_id
+		self.paths = paths
+		self.active = 0
+		self._closers = []
+		self._busy_checks = []
+
+	@property
+	def db_path(self):
+		return self.paths["db"]
+
+	def on_close(self, fn):
+		self._closers.append(fn)
+
+	def busy_while(self, check):
+		"""Keep the tenant open while ``check()`` is true (e.g. a background scan)."""
+		self._busy_checks.append(check)
+
+	def busy(self):
+		return self.active > 0 or any(check() for check in self._busy_checks)
+
+	def close(self):
+		for fn in reversed(self._closers):
+			try:
+				fn()
+			except Exception:
+				log.exception("closing tenant resource failed", tenant=self.id)
+
+
+class TenantRegistry:
+	"""LRU of open tenants; ``open_tenant(tenant_id)`` builds a Tenant on first use."""
+
+	def __init__(self, open_tenant, max_open=TENANT_MAX_OPEN):
+		self.open_tenant = open_tenant
+		self.max_open = max(1, max_open)
+		self._open = OrderedDict()
+		self._lock = threading.RLock()
+		# tenant_id -> lock held while that tenant is being opened, so two requests don't both open it;
+		# opening (schema setup, content load) runs outside self._lock and doesn't hold up other tenants
+		self._opening = {}
+
+	def _checkout(self, tenant_id):
+		tenant = self._open.get(tenant_id)
+		if tenant is not None:
+			self._open.move_to_end(tenant_id)
+			tenant.active += 1
+		return tenant
+
+	def acquire(self, tenant_id):
+		"""Open tenant for the current request; pair with ``release``."""
+		with self._lock:
+			tenant = self._checkout(tenant_id)
+			if tenant is not None:
+				return tenant
+			guard = self._opening.setdefault(tenant_id, threading.Lock())
+		with guard:
+			with self._lock:
+				# Opened by the request this one waited for
+				tenant = self._checkout(tenant_id)
+				if tenant is not None:
+					return tenant
+			try:
+				opened = self.open_tenant(tenant_id)
+			except BaseException:
+				with self._lock:
+					if self._opening.get(tenant_id) is guard:
+						del self._opening[tenant_id]
+				raise
+			with self._lock:
+				if self._opening.get(tenant_id) is guard:
+					del self._opening[tenant_id]
+				tenant = self._checkout(tenant_id)
+				if tenant is not None:
+					# A request that arrived after a failed open got there first
+					opened.close()
+					return tenant
+				self._open[tenant_id] = opened
+				opened.active += 1
+				log.info("tenant opened", tenant=tenant_id, open=len(self._open))
+				self._evict()
+				return opened
+
+	def release(self, tenant):
+		with self._lock:
+			tenant.active -= 1
+
+	def _evict(self):
+		excess = len(self._open) - self.max_open
+		if excess <= 0:
+			return
+		idle = [t for t in self._open.values() if not t.busy()][:excess]
+		for tenant in idle:
+			del self._open[tenant.id]
+			tenant.close()
+			log.info("idle tenant closed", tenant=tenant.id, open=len(self._open))
+		if len(idle) < excess:
+			log.warning("more busy tenants than TENANT_MAX_OPEN", open=len(self._open), max_open=self.max_open)
+
+	def open_tenants(self):
+		with self._lock:
+			return list(self._open.values())
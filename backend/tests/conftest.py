@@ -0,0 +1,68 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+# Backend modules import each other by name (see app.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db(tmp_path):
+	"""A data.db with the bookings/inquiries tables and their rollup and change-log triggers."""
+	import bookings
+	import change_feed
+	import stats
+
+	conn = sqlite3.connect(tmp_path / "data.db")
+	conn.row_factory = sqlite3.Row
+	cur = conn.cursor()
+	cur.execute(
+		"CREATE TABLE bookings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, "
+		"time_slot TEXT NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+	)
+	cur.execute(
+		"CREATE TABLE inquiries (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, email TEXT, message TEXT, "
+		"created_at DATETIME DEFAULT CURRENT_TIMESTAMP, event_date TEXT, contact_number TEXT, "
+		"indoor_outdoor TEXT, event_type TEXT)"
+	)
+	stats.init_schema(cur)
+	change_feed.init_schema(cur)
+	bookings.init_schema(cur)
+	conn.commit()
+	yield conn
+	conn.close()
+
+
+VENUE = "/t/venue"
+# Read at import time by the backend modules, so set before any test module imports them
+_APP_ROOT = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.update({
+	"TENANT_MODE": "path",
+	"TENANTS": "venue",
+	"TENANTS_DIR": os.path.join(_APP_ROOT, "tenants"),
+	"DB_PATH": os.path.join(_APP_ROOT, "data.db"),
+	"SNAPSHOT_PUBLISH": "0",
+	"HEALTH_PROBES": "0",
+	"RATE_LIMIT_ENABLED": "0",
+	"ADMIN_PASSWORD": "secret",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+	"""Test client for the whole app, serving one venue (``VENUE`` prefix) from a temp directory."""
+	import app
+
+	yield app.app.test_client()
+	shutil.rmtree(_APP_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def admin(client):
+	"""Authorization header of the venue's default admin."""
+	resp = client.post(f"{VENUE}/api/login", json={"username": "admin", "password": "secret"})
+	return {"Authorization": f"Bearer {resp.get_json()['token']}"}
@@ -0,0 +1,53 @@
+import json
+import logging
+import queue
+import sys
+
+from app_logging import DroppingQueueHandler, JsonFormatter, SamplingFilter, StructLogger
+
+
+def record(level=logging.INFO, msg="reel created", fields=None):
+	rec = logging.makeLogRecord({"name": "app", "levelno": level, "levelname": logging.getLevelName(level), "msg": msg})
+	rec.fields = fields
+	return rec
+
+
+def test_json_lines_carry_the_keyword_fields():
+	entry = json.loads(JsonFormatter().format(record(fields={"reel_id": 3})))
+	assert entry["msg"] == "reel created" and entry["reel_id"] == 3 and entry["level"] == "INFO"
+
+
+def test_full_queue_drops_instead_of_blocking():
+	handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+	before = DroppingQueueHandler.dropped
+	handler.handle(record())
+	handler.handle(record())
+	assert handler.queue.qsize() == 1
+	assert DroppingQueueHandler.dropped == before + 1
+
+
+def test_sampling_never_drops_warnings():
+	sampler = SamplingFilter(0.0)
+	assert not sampler.filter(record(logging.INFO))
+	assert sampler.filter(record(logging.WARNING))
+
+
+def test_record_is_rendered_before_it_leaves_the_thread():
+	handler = DroppingQueueHandler(queue.Queue())
+	rec = record(msg="%s items")
+	rec.args = (3,)
+	try:
+		raise ValueError("boom")
+	except ValueError:
+		rec.exc_info = sys.exc_info()
+	prepared = handler.prepare(rec)
+	assert prepared.msg == "3 items" and prepared.args is None
+	assert prepared.exc_info is None and "ValueError: boom" in prepared.exc_text
+
+
+def test_disabled_debug_builds_no_record(monkeypatch):
+	import app_logging
+
+	monkeypatch.setattr(app_logging, "_debug_enabled", False)
+	logger = StructLogger("quiet")
+	assert logger.debug is app_logging._noop
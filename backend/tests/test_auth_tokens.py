@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+import auth_tokens
+from auth_tokens import TokenError
+from conftest import VENUE
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def conn():
+	conn = sqlite3.connect(":memory:")
+	auth_tokens.init_schema(conn.cursor())
+	yield conn
+	conn.close()
+
+
+def test_rotation_returns_a_new_single_use_token(conn):
+	first = auth_tokens.issue(conn, SECRET, 1)
+	admin_id, second = auth_tokens.rotate(conn, SECRET, first)
+	assert admin_id == 1 and second != first
+	assert auth_tokens.rotate(conn, SECRET, second)[0] == 1
+
+
+def test_reuse_revokes_the_whole_family(conn):
+	first = auth_tokens.issue(conn, SECRET, 1)
+	_, second = auth_tokens.rotate(conn, SECRET, first)
+	with pytest.raises(TokenError, match="reused"):
+		auth_tokens.rotate(conn, SECRET, first)
+	# The legitimate holder's newer token is gone too
+	with pytest.raises(TokenError):
+		auth_tokens.rotate(conn, SECRET, second)
+
+
+@pytest.mark.parametrize("token", [None, "", 12, ["a"], {"a": 1}])
+def test_non_string_tokens_are_rejected(conn, token):
+	with pytest.raises(TokenError):
+		auth_tokens.rotate(conn, SECRET, token)
+	assert auth_tokens.revoke(conn, SECRET, token) is False
+
+
+@pytest.mark.parametrize("token", [12, ["a"], {"a": 1}])
+def test_malformed_refresh_token_is_a_client_error(client, token):
+	assert client.post(f"{VENUE}/api/token/refresh", json={"refresh_token": token}).status_code == 401
+	assert client.post(f"{VENUE}/api/token/revoke", json={"refresh_token": token}).status_code == 400
@@ -0,0 +1,97 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import backup
+from backup import BackupError, BackupManager, BackupNotFound
+from conftest import VENUE
+from content_store import ContentStore
+
+
+def make(tmp_path, **options):
+	db_path = str(tmp_path / "data.db")
+	conn = sqlite3.connect(db_path)
+	conn.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY, date TEXT)")
+	conn.executemany("INSERT INTO bookings (date) VALUES (?)", [(f"2026-01-{d:02}",) for d in range(1, 29)])
+	conn.commit()
+	conn.close()
+	store = ContentStore(str(tmp_path / "content.json"), {"cakes": [{"title": "Opera"}]})
+	store.read()
+	return db_path, store, BackupManager(db_path, store, str(tmp_path / "backups"), **options)
+
+
+def count(db_path):
+	conn = sqlite3.connect(db_path)
+	try:
+		return conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+	finally:
+		conn.close()
+
+
+def test_copy_finishes_under_a_steady_stream_of_writes(tmp_path, monkeypatch):
+	db_path, _, _ = make(tmp_path)
+	writer = sqlite3.connect(db_path)
+	monkeypatch.setattr(backup.time, "sleep", lambda seconds: (
+		writer.execute("INSERT INTO bookings (date) VALUES ('2026-02-01')"), writer.commit()))
+	copy = str(tmp_path / "copy.db")
+	# One page per step: every step is followed by a commit that restarts the copy
+	assert backup.copy_database(db_path, copy, pages=1, max_restarts=2) == "ok"
+	writer.close()
+	assert count(copy) >= 28
+
+
+def test_backup_verify_and_restore(tmp_path):
+	db_path, store, manager = make(tmp_path)
+	manifest = manager.create(label="nightly")
+	assert manager.verify(manifest["name"])["label"] == "nightly"
+	assert manifest["content_fingerprint"] == store.fingerprint
+
+	conn = sqlite3.connect(db_path)
+	conn.execute("DELETE FROM bookings")
+	conn.commit()
+	conn.close()
+	with store.edit():
+		store.write({"cakes": []})
+
+	manager.restore(manifest["name"])
+	assert count(db_path) == 28
+	assert store.read()["cakes"] == [{"title": "Opera"}]
+	# The state it replaced was kept as a safety backup
+	assert f"before restore of {manifest['name']}" in [m["label"] for m in manager.list()]
+
+
+def test_tampered_backup_is_not_restored(tmp_path):
+	db_path, _, manager = make(tmp_path)
+	name = manager.create()["name"]
+	with open(os.path.join(manager.directory, name, "content.json"), "a") as f:
+		f.write(" ")
+	with pytest.raises(BackupError, match="checksum"):
+		manager.restore(name)
+	assert len(manager.list()) == 1
+	with pytest.raises(BackupNotFound):
+		manager.verify("../" + name)
+
+
+def test_prune_keeps_the_newest_and_one_per_day(tmp_path):
+	_, _, manager = make(tmp_path, keep_last=2, keep_daily=3)
+	names = [f"202601{day:02}T{hour:02}0000Z-abcdef" for day in (1, 2, 3, 4) for hour in (8, 20)]
+	for name in names:
+		os.makedirs(os.path.join(manager.directory, name))
+		with open(os.path.join(manager.directory, name, "manifest.json"), "w") as f:
+			json.dump({"name": name}, f)
+	removed = manager.prune()
+	kept = [m["name"] for m in manager.list()]
+	assert kept == ["20260104T200000Z-abcdef", "20260104T080000Z-abcdef",
+		"20260103T200000Z-abcdef", "20260102T200000Z-abcdef"]
+	assert sorted(removed + kept) == sorted(names)
+
+
+def test_backup_endpoints(client, admin):
+	created = client.post(f"{VENUE}/admin/backups", json={"label": "manual"}, headers=admin)
+	assert created.status_code == 201
+	name = created.get_json()["name"]
+	assert name in [b["name"] for b in client.get(f"{VENUE}/admin/backups", headers=admin).get_json()["backups"]]
+	assert client.post(f"{VENUE}/admin/backups/{name}/verify", headers=admin).get_json() == {"ok": True, "name": name}
+	assert client.post(f"{VENUE}/admin/backups/20990101T000000Z-000000/verify", headers=admin).status_code == 404
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+import bookings
+from bookings import SlotTaken
+from conftest import VENUE
+
+
+def test_a_slot_is_booked_once(db):
+	first = bookings.create(db, "2026-12-01", "09:00")
+	with pytest.raises(SlotTaken):
+		bookings.create(db, "2026-12-01", "09:00")
+	assert [b["id"] for b in bookings.list_bookings(db, "2026-12-01")] == [first]
+
+
+def test_concurrent_creates_book_a_slot_once(tmp_path):
+	path = tmp_path / "race.db"
+	conn = sqlite3.connect(path)
+	conn.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, time_slot TEXT, "
+		"created_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+	bookings.init_schema(conn.cursor())
+	conn.close()
+	results = []
+
+	def book():
+		worker = sqlite3.connect(path, timeout=10)
+		try:
+			results.append(bookings.create(worker, "2026-12-01", "09:00"))
+		except SlotTaken:
+			results.append(None)
+		finally:
+			worker.close()
+
+	threads = [threading.Thread(target=book) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert len([r for r in results if r is not None]) == 1
+
+
+def test_update_moves_a_booking(db):
+	booking_id = bookings.create(db, "2026-12-01", "09:00")
+	bookings.create(db, "2026-12-01", "10:00")
+	with pytest.raises(SlotTaken):
+		bookings.update(db, booking_id, "2026-12-01", "10:00")
+	# Re-saving its own slot is not a clash
+	assert bookings.update(db, booking_id, "2026-12-01", "09:00")["time_slot"] == "09:00"
+	assert bookings.update(db, booking_id, "2026-12-02", "11:00")["date"] == "2026-12-02"
+	assert bookings.update(db, 999, "2026-12-02", "11:00") is None
+	with pytest.raises(ValueError):
+		bookings.update(db, booking_id, "02/12/2026", "11:00")
+
+
+def test_migrate_legacy_skips_taken_and_unusable_slots(db):
+	bookings.create(db, "2026-12-01", "09:00")
+	legacy = [
+		{"date": "2026-12-01", "time_slot": "09:00"},
+		{"date": "2026-12-01", "timeSlot": "10:00"},
+		{"date": "tomorrow", "time_slot": "11:00"},
+		"garbage",
+	]
+	assert bookings.migrate_legacy(db, legacy) == 1
+	assert bookings.migrate_legacy(db, legacy) == 0
+	assert [b["time_slot"] for b in bookings.list_bookings(db)] == ["09:00", "10:00"]
+
+
+def test_booking_endpoints(client, admin):
+	url = f"{VENUE}/api/bookings"
+	assert client.post(url, json={"date": "2027-04-01", "time_slot": "09:00"}).status_code == 401
+	created = client.post(url, json={"date": "2027-04-01", "time_slot": "09:00"}, headers=admin)
+	assert created.status_code == 201
+	booking_id = created.get_json()["id"]
+	assert client.post(url, json={"date": "2027-04-01", "time_slot": "09:00"}, headers=admin).status_code == 409
+	assert client.post(url, json={"date": "2027-04-01"}, headers=admin).status_code == 400
+
+	moved = client.put(f"{url}/{booking_id}", json={"date": "2027-04-02", "time_slot": "09:00"}, headers=admin)
+	assert moved.get_json()["date"] == "2027-04-02"
+	assert client.put(f"{url}/99999", json={"date": "2027-04-02", "time_slot": "10:00"}, headers=admin).status_code == 404
+	client.delete(f"{url}/{booking_id}", headers=admin)
+	assert client.get(f"{url}?date=2027-04-02").get_json() == []
@@ -0,0 +1,124 @@
+import gzip
+import io
+import json
+import sqlite3
+
+import bulk_io
+import stats
+from conftest import VENUE
+
+
+def booking_slots(db):
+	return {(r["date"], r["time_slot"]): r["count"] for r in db.execute(
+		"SELECT day AS date, time_slot, count FROM booking_daily_stats WHERE count > 0")}
+
+
+def seed(db):
+	bulk_io.import_rows(db, "bookings", enumerate([
+		{"date": "2026-11-01", "time_slot": "09:00"},
+		{"date": "2026-11-01", "time_slot": "10:00"},
+	], start=2))  # ids 1 (09:00) and 2 (10:00)
+
+
+def test_replace_import_keeps_rollup_in_step(db):
+	seed(db)
+	records = [(2, {"id": "2", "date": "2026-11-01", "time_slot": "14:00"})]
+	report = bulk_io.import_rows(db, "bookings", records, on_conflict="replace")
+
+	assert report.imported == 1
+	assert db.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 2
+	assert booking_slots(db) == {("2026-11-01", "09:00"): 1, ("2026-11-01", "14:00"): 1}
+	summary = stats.range_stats(db, "2026-11-01", "2026-11-01")["bookings"]
+	assert summary["total"] == 2
+
+
+def test_replace_import_records_an_update_in_the_change_log(db):
+	seed(db)
+	bulk_io.import_rows(db, "bookings", [(2, {"id": "2", "date": "2026-11-02", "time_slot": "09:00"})],
+		on_conflict="replace")
+	ops = [tuple(r) for r in db.execute("SELECT item_id, op FROM change_log WHERE collection = 'bookings' ORDER BY seq")]
+	assert ops[-1] == ("2", "update")
+	assert ("2", "delete") not in ops
+
+
+def test_replace_import_inserts_new_ids(db):
+	seed(db)
+	report = bulk_io.import_rows(db, "bookings", [(2, {"id": "9", "date": "2026-11-03", "time_slot": "09:00"})],
+		on_conflict="replace")
+	assert report.imported == 1
+	assert booking_slots(db)[("2026-11-03", "09:00")] == 1
+
+
+def test_replace_import_rejects_a_taken_slot(db):
+	seed(db)
+	report = bulk_io.import_rows(db, "bookings", [(2, {"id": "1", "date": "2026-11-01", "time_slot": "10:00"})],
+		on_conflict="replace")
+	assert report.rejected == 1
+	assert booking_slots(db) == {("2026-11-01", "09:00"): 1, ("2026-11-01", "10:00"): 1}
+
+
+def export_text(columns, rows, fmt, compress=False):
+	body = b"".join(bulk_io.export_stream(columns, rows, fmt, compress))
+	return (gzip.decompress(body) if compress else body).decode("utf-8")
+
+
+def test_export_round_trips_through_import(db, tmp_path):
+	seed(db)
+	for fmt in bulk_io.FORMATS:
+		columns, rows = bulk_io.iter_table(db, "bookings")
+		text = export_text(columns, rows, fmt, compress=True)
+		other = sqlite3.connect(tmp_path / f"{fmt}.db")
+		other.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY, date TEXT, time_slot TEXT, created_at TEXT)")
+		report = bulk_io.import_rows(other, "bookings", bulk_io.read_records(io.StringIO(text), fmt))
+		assert report.imported == 2 and report.rejected == 0
+		assert other.execute("SELECT id, date, time_slot FROM bookings ORDER BY id").fetchall() == [
+			(1, "2026-11-01", "09:00"), (2, "2026-11-01", "10:00")]
+		other.close()
+
+
+def test_csv_export_encodes_nested_values_as_json():
+	columns, rows = bulk_io.iter_items([{"id": 1, "tags": ["a", "b"]}, {"id": 2, "name": "x"}])
+	assert columns == ["id", "tags", "name"]
+	lines = export_text(columns, rows, "csv").splitlines()
+	assert lines == ["id,tags,name", '1,"[""a"", ""b""]",', "2,,x"]
+
+
+def test_import_rejects_bad_rows_with_line_numbers(db):
+	text = "date,time_slot\n2026-11-01,09:00\nsoon,10:00\n2026-11-02,\n2026-11-03,11:00,extra\n"
+	report = bulk_io.import_rows(db, "bookings", bulk_io.read_records(io.StringIO(text), "csv"))
+	assert report.imported == 1
+	assert [e["line"] for e in report.errors] == [3, 4, 5]
+	assert "YYYY-MM-DD" in report.errors[0]["error"]
+
+
+def test_abort_rejects_the_clashing_batch_and_ignore_skips_it(db):
+	seed(db)
+	clash = [(2, {"id": "1", "date": "2026-11-05", "time_slot": "09:00"})]
+	assert bulk_io.import_rows(db, "bookings", clash).rejected == 1
+	report = bulk_io.import_rows(db, "bookings", clash, on_conflict="ignore")
+	assert report.rejected == 0
+	assert db.execute("SELECT date FROM bookings WHERE id = 1").fetchone()[0] == "2026-11-01"
+
+
+def test_merge_items_on_conflict():
+	items = [{"id": 1, "title": "Old"}]
+	records = [(2, {"id": "1", "title": "New"}), (3, {"title": "Added", "tags": '["x"]'})]
+	report = bulk_io.merge_items(items, records)
+	assert (report.imported, report.rejected) == (1, 1)
+	assert items == [{"id": 1, "title": "Old"}, {"id": 2, "title": "Added", "tags": ["x"]}]
+	bulk_io.merge_items(items, [(2, {"id": "1", "title": "New"})], on_conflict="replace")
+	assert items[0] == {"id": 1, "title": "New"}
+
+
+def test_export_and_import_endpoints(client, admin):
+	assert client.get(f"{VENUE}/admin/export/inquiries").status_code == 401
+	assert client.get(f"{VENUE}/admin/export/nope", headers=admin).status_code == 404
+	body = "name,message\nAsha,hello\n,missing name\n"
+	resp = client.post(f"{VENUE}/admin/import/inquiries?format=csv", data=body, headers=admin)
+	assert resp.status_code == 207
+	assert resp.get_json()["imported"] == 1 and resp.get_json()["errors"][0]["line"] == 3
+
+	resp = client.get(f"{VENUE}/admin/export/inquiries?format=ndjson&gzip=1", headers=admin)
+	assert resp.headers["Content-Disposition"] == 'attachment; filename="inquiries.ndjson.gz"'
+	names = [json.loads(line)["name"] for line in gzip.decompress(resp.data).decode().splitlines()]
+	assert "Asha" in names
@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+import time
+
+import bookings
+from change_feed import ChangeFeed
+from conftest import VENUE
+
+
+def db_path(db):
+	return db.execute("PRAGMA database_list").fetchone()["file"]
+
+
+def test_booking_insert_wakes_a_waiter_and_is_returned(db):
+	path = db_path(db)
+	feed = ChangeFeed(path)
+	since = feed.latest(db)
+
+	def book():
+		time.sleep(0.3)
+		other = sqlite3.connect(path)
+		bookings.create(other, "2026-11-01", "18:00")
+		other.close()
+
+	threading.Thread(target=book).start()
+	started = time.monotonic()
+	assert feed.wait(db, since, 5)
+	assert time.monotonic() - started < 4
+	result = feed.events(db, since)
+	assert [(e["collection"], e["op"]) for e in result["events"]] == [("bookings", "insert")]
+	assert result["version"] == result["events"][-1]["version"]
+
+
+def test_inquiries_are_listed_only_for_admins(db):
+	feed = ChangeFeed(db_path(db))
+	db.execute("INSERT INTO inquiries (name) VALUES ('Asha')")
+	bookings.create(db, "2026-11-01", "18:00")
+	public = feed.events(db, 0)
+	admin = feed.events(db, 0, include_private=True)
+	assert [e["collection"] for e in public["events"]] == ["bookings"]
+	assert [e["collection"] for e in admin["events"]] == ["inquiries", "bookings"]
+	# The public cursor still moves past the hidden row
+	assert public["version"] == admin["version"]
+
+
+def test_events_are_paged(db):
+	feed = ChangeFeed(db_path(db))
+	for hour in range(10, 15):
+		bookings.create(db, "2026-11-01", f"{hour}:00")
+	first = feed.events(db, 0, limit=3)
+	assert first["more"] and len(first["events"]) == 3
+	rest = feed.events(db, first["version"], limit=3)
+	assert not rest["more"] and len(rest["events"]) == 2
+	assert feed.events(db, 10 ** 6)["resync"]
+
+
+def test_changes_endpoint(client, admin):
+	assert client.get(f"{VENUE}/api/changes").status_code == 400
+	# Catch up with whatever other tests changed
+	since, more = 0, True
+	while more:
+		page = client.get(f"{VENUE}/api/changes?since={since}", headers=admin).get_json()
+		since, more = page["version"], page["more"]
+	client.post(f"{VENUE}/api/bookings", json={"date": "2027-01-09", "time_slot": "12:00"}, headers=admin)
+	client.post(f"{VENUE}/api/inquiry", json={"name": "Asha", "contactNumber": "1", "message": "hi"})
+
+	public = client.get(f"{VENUE}/api/changes?since={since}&wait=1").get_json()
+	private = client.get(f"{VENUE}/api/changes?since={since}", headers=admin).get_json()
+	assert [(e["collection"], e["op"]) for e in public["events"]] == [("bookings", "insert")]
+	assert [e["collection"] for e in private["events"]] == ["bookings", "inquiries"]
+	only = client.get(f"{VENUE}/api/changes?since={since}&collections=inquiries", headers=admin).get_json()
+	assert [e["collection"] for e in only["events"]] == ["inquiries"]
+
+
+def test_content_delta_resolves_touched_items_against_the_current_document(db):
+	feed = ChangeFeed(db_path(db))
+	old = {"cakes": [{"id": 1, "title": "A"}, {"id": 2, "title": "B"}], "settings": {"title": "Venue"}}
+	new = {"cakes": [{"id": 1, "title": "A2"}, {"id": 3, "title": "C"}], "settings": {"title": "Lakeside"}}
+	feed.record_content_change(None, old)
+	since = feed.latest(db)
+	feed.record_content_change(old, new)
+	delta = feed.content_delta(db, since, lambda: new)
+	assert not delta["resync"] and delta["version"] == feed.latest(db)
+	cakes = delta["changes"]["cakes"]
+	assert sorted(item["id"] for item in cakes["upserted"]) == [1, 3]
+	assert cakes["deleted"] == ["2"]
+	assert delta["changes"]["settings"] == {"replace": {"title": "Lakeside"}}
+	# Nothing new: an empty delta at the same version
+	assert feed.content_delta(db, delta["version"], lambda: new)["changes"] == {}
+
+
+def test_content_delta_asks_for_a_resync_when_the_log_no_longer_covers_since(db, monkeypatch):
+	import change_feed
+
+	feed = ChangeFeed(db_path(db))
+	assert feed.content_delta(db, 10 ** 6, dict)["resync"]
+	monkeypatch.setattr(change_feed, "DELTA_MAX_CHANGES", 2)
+	feed.record_content_change(None, {"cakes": [{"id": i} for i in range(5)]})
+	assert feed.content_delta(db, 0, dict)["resync"]
+
+
+def test_content_changes_endpoint(client, admin):
+	version = int(client.get(f"{VENUE}/api/content").headers["X-Content-Version"])
+	assert client.get(f"{VENUE}/api/content/changes").status_code == 400
+	created = client.post(f"{VENUE}/api/cakes", json={"title": "Saffron"}, headers=admin).get_json()
+	delta = client.get(f"{VENUE}/api/content/changes?since={version}").get_json()
+	assert [item["id"] for item in delta["changes"]["cakes"]["upserted"]] == [created["id"]]
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+
+from content_store import ContentStore
+
+
+def test_derived_value_is_not_cached_across_a_concurrent_write(tmp_path):
+	store = ContentStore(str(tmp_path / "content.json"), {"a": 1})
+
+	def build(data):
+		if data["a"] == 1:
+			# Another writer lands while this body is being built
+			with store.edit() as edited:
+				edited["a"] = 2
+				store.write(edited)
+		return data["a"]
+
+	assert store.derived("value", build) == 1
+	assert store.derived("value", build) == 2
+
+
+def test_lock_excludes_a_process_forked_after_the_store_was_opened(tmp_path):
+	store = ContentStore(str(tmp_path / "content.json"), {"a": 1})
+	store.read()
+	held, release = os.pipe(), os.pipe()
+	pid = os.fork()
+	if pid == 0:
+		try:
+			with store.lock():
+				os.write(held[1], b"x")
+				os.read(release[0], 1)
+		finally:
+			os._exit(0)
+	try:
+		assert os.read(held[0], 1) == b"x"
+		acquired = threading.Event()
+
+		def take():
+			with store.lock():
+				acquired.set()
+
+		threading.Thread(target=take, daemon=True).start()
+		# The child holds the lock: the parent must wait for it
+		assert not acquired.wait(0.3)
+		os.write(release[1], b"x")
+		assert acquired.wait(5)
+	finally:
+		os.write(release[1], b"x")
+		os.waitpid(pid, 0)
+
+
+def test_a_write_in_one_worker_is_seen_by_another(tmp_path):
+	path = str(tmp_path / "content.json")
+	writer, reader = ContentStore(path, {"cakes": []}), ContentStore(path, {"cakes": []})
+	assert reader.read() == {"cakes": []}
+	version = reader.version
+	with writer.edit() as data:
+		data["cakes"].append({"id": 1})
+		writer.write(data)
+	assert reader.version == version + 1
+	assert reader.read() == {"cakes": [{"id": 1}]}
+
+
+def test_cached_document_is_reused_until_the_version_moves(tmp_path):
+	store = ContentStore(str(tmp_path / "content.json"), {"cakes": []})
+	first = store.read()
+	assert store.read() is first
+	assert store.derived("count", lambda data: object()) is store.derived("count", lambda data: object())
+
+
+def test_manual_edits_are_picked_up(tmp_path):
+	path = tmp_path / "content.json"
+	store = ContentStore(str(path), {"cakes": []})
+	store.read()
+	path.write_text(json.dumps({"cakes": [{"id": 7}], "extra": True}))
+	assert store.read()["cakes"] == [{"id": 7}]
+
+
+def test_missing_sections_are_seeded_from_defaults(tmp_path):
+	path = tmp_path / "content.json"
+	path.write_text(json.dumps({"cakes": [{"id": 1}]}))
+	store = ContentStore(str(path), {"cakes": [], "reels": []})
+	assert store.read() == {"cakes": [{"id": 1}], "reels": []}
+
+
+def test_listeners_get_the_old_and_new_document(tmp_path):
+	store = ContentStore(str(tmp_path / "content.json"), {"cakes": []})
+	seen = []
+	store.add_listener(lambda old, new, fingerprint: seen.append((old, new, fingerprint)))
+	with store.edit() as data:
+		data["cakes"].append({"id": 1})
+		store.write(data)
+	assert seen == [({"cakes": []}, {"cakes": [{"id": 1}]}, store.fingerprint)]
@@ -0,0 +1,45 @@
+import pytest
+
+import content_views
+from conftest import VENUE
+
+DOCUMENT = {
+	"cakes": [{"id": 1, "name": "Truffle", "flavor": "chocolate", "price": 900, "recipe": "secret"}],
+	"reels": [{"id": 1, "url": "https://example.com/r/1"}],
+	"settings": {"title": "Lakeside", "phone": "123"},
+	"bookings": [{"id": 1, "date": "2026-10-01"}],
+}
+
+
+def test_view_keeps_only_its_sections_and_fields():
+	cards = content_views.project(DOCUMENT, view="cards")
+	assert cards["cakes"] == [{"id": 1, "name": "Truffle", "flavor": "chocolate", "price": 900}]
+	assert cards["reels"] == DOCUMENT["reels"] and cards["settings"] == DOCUMENT["settings"]
+	assert "bookings" not in cards
+
+
+def test_sections_and_fields_combine_and_always_keep_the_id():
+	result = content_views.project(DOCUMENT, sections=("cakes", "settings"), fields=("name", "title"))
+	assert result == {"cakes": [{"id": 1, "name": "Truffle"}], "settings": {"title": "Lakeside"}}
+
+
+def test_full_document_leaves_out_private_sections():
+	assert set(content_views.project(DOCUMENT)) == {"cakes", "reels", "settings"}
+
+
+def test_bad_parameters_are_rejected():
+	assert content_views.parse_names("reels, cakes,,reels") == ("cakes", "reels")
+	with pytest.raises(ValueError):
+		content_views.parse_names("cakes;drop")
+	with pytest.raises(ValueError):
+		content_views.project(DOCUMENT, view="nope")
+	with pytest.raises(ValueError):
+		content_views.project(DOCUMENT, fields=tuple(f"f{i}" for i in range(content_views.MAX_FIELDS + 1)))
+
+
+def test_content_endpoint_projection(client):
+	full = client.get(f"{VENUE}/api/content").get_json()
+	assert "bookings" not in full
+	cakes = client.get(f"{VENUE}/api/content?sections=cakes&fields=name").get_json()
+	assert list(cakes) == ["cakes"] and all(set(item) <= {"id", "name"} for item in cakes["cakes"])
+	assert client.get(f"{VENUE}/api/content?view=nope").status_code == 400
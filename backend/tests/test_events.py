@@ -0,0 +1,73 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import events
+from conftest import VENUE
+
+
+@pytest.fixture
+def events_db(db):
+	db.execute(
+		"CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, description TEXT, date TEXT, "
+		"metadata TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+	)
+	rows = [
+		("Wedding", "12/05/2026", '{"type": "wedding", "guests": 120}'),
+		("Gala", "2026-05-12T18:30", '{"type": "gala", "guests": 80}'),
+		("Birthday", "May 20, 2026", '{"type": "birthday", "guests": 120}'),
+		("Undated", None, "not json"),
+	]
+	db.executemany("INSERT INTO events (title, date, metadata) VALUES (?, ?, ?)", rows)
+	events.init_schema(db.cursor())
+	db.commit()
+	return db
+
+
+def titles(result):
+	return [e["title"] for e in result["events"]]
+
+
+def test_normalize_date():
+	assert events.normalize_date("12/05/2026") == "2026-05-12"
+	assert events.normalize_date("2026-05-12 18:30") == "2026-05-12T18:30"
+	assert events.normalize_date("") is None
+	with pytest.raises(ValueError):
+		events.normalize_date("next tuesday")
+
+
+def test_migration_normalizes_existing_dates(events_db):
+	dates = [r[0] for r in events_db.execute("SELECT date FROM events ORDER BY id")]
+	assert dates == ["2026-05-12", "2026-05-12T18:30", "2026-05-20", None]
+
+
+def test_date_range_is_inclusive_and_ordered(events_db):
+	result = events.query(events_db, MultiDict({"from": "2026-05-12", "to": "12/05/2026"}))
+	assert titles(result) == ["Wedding", "Gala"]
+	assert result["total"] == 2
+
+
+def test_metadata_filters(events_db):
+	assert titles(events.query(events_db, MultiDict([("meta.type", "gala"), ("meta.type", "wedding"),
+		("sort", "date")]))) == ["Wedding", "Gala"]
+	# Keys without a generated column still filter, numbers compared as text
+	assert titles(events.query(events_db, MultiDict({"meta.guests": "120", "sort": "date"}))) == ["Wedding", "Birthday"]
+	with pytest.raises(ValueError):
+		events.query(events_db, MultiDict({"meta.bad-key')": "x"}))
+
+
+def test_pagination_and_bad_parameters(events_db):
+	page = events.query(events_db, MultiDict({"sort": "-date", "limit": "2", "offset": "1"}))
+	assert titles(page) == ["Gala", "Wedding"] and page["total"] == 4
+	for args in ({"sort": "title"}, {"limit": "0"}, {"offset": "x"}, {"from": "soon"}):
+		with pytest.raises(ValueError):
+			events.query(events_db, MultiDict(args))
+
+
+def test_events_endpoints(client, admin):
+	assert client.post(f"{VENUE}/admin/events", json={"title": "x", "date": "soon"}, headers=admin).status_code == 400
+	created = client.post(f"{VENUE}/admin/events", json={"title": "Launch", "date": "01/02/2027",
+		"metadata": {"venue": "garden"}}, headers=admin)
+	assert created.status_code == 201
+	found = client.get(f"{VENUE}/admin/events?meta.venue=garden", headers=admin).get_json()
+	assert [(e["title"], e["date"]) for e in found["events"]] == [("Launch", "2027-02-01")]
+	assert client.get(f"{VENUE}/admin/events?limit=-1", headers=admin).status_code == 400
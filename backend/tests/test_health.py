@@ -0,0 +1,57 @@
+import health
+from conftest import VENUE
+from health import HealthMonitor
+
+
+def failing():
+	raise OSError("disk gone")
+
+
+def test_not_ready_until_checked():
+	monitor = HealthMonitor({"sqlite": lambda: "ok"}, providers={})
+	assert monitor.snapshot()["ready"] is False
+	monitor.run_checks()
+	snapshot = monitor.snapshot()
+	assert snapshot["ready"] is True and snapshot["checks"]["sqlite"]["detail"] == "ok"
+
+
+def test_a_failing_local_check_is_not_ready():
+	monitor = HealthMonitor({"sqlite": lambda: "ok", "content_store": failing}, providers={})
+	monitor.run_checks()
+	snapshot = monitor.snapshot()
+	assert snapshot["ready"] is False
+	assert snapshot["checks"]["content_store"] == dict(snapshot["checks"]["content_store"], ok=False, detail="disk gone")
+
+
+def test_provider_outage_is_reported_without_failing_readiness(monkeypatch):
+	def probe(name, url):
+		if name == "cobalt":
+			raise OSError("connection refused")
+		return 200
+
+	monkeypatch.setattr(health, "_probe_provider", probe)
+	monitor = HealthMonitor({"sqlite": lambda: "ok"}, providers={"google": "g", "cobalt": "c"})
+	monitor.run_once()
+	snapshot = monitor.snapshot()
+	assert snapshot["ready"] is True
+	assert snapshot["providers"]["google"]["ok"] and snapshot["providers"]["google"]["detail"] == 200
+	assert not snapshot["providers"]["cobalt"]["ok"]
+	assert snapshot["providers"]["cobalt"]["circuit"] == "closed"
+
+
+def test_stale_results_count_as_failed(monkeypatch):
+	monitor = HealthMonitor({"sqlite": lambda: "ok"}, providers={}, stale_after=10)
+	monitor.run_checks()
+	checked = monitor.snapshot()["checks"]["sqlite"]["checked_at"]
+	monkeypatch.setattr(health.time, "time", lambda: checked + 11)
+	snapshot = monitor.snapshot()
+	assert snapshot["ready"] is False and snapshot["checks"]["sqlite"]["age"] == 11
+
+
+def test_health_endpoints(client):
+	# Bind the venue so the per-tenant checks have something to look at
+	client.get(f"{VENUE}/api/content")
+	assert client.get("/healthz").get_json()["status"] == "ok"
+	resp = client.get("/readyz")
+	assert resp.status_code == 200
+	assert set(resp.get_json()["checks"]) == {"sqlite", "content_store", "spool"}
@@ -0,0 +1,69 @@
+import pytest
+import requests
+
+from http_client import CircuitBreaker, CircuitOpenError, ProviderClient
+
+
+class Reply:
+	def __init__(self, status_code):
+		self.status_code = status_code
+
+	def close(self):
+		pass
+
+
+def client_with(statuses, **options):
+	"""A client whose session answers with ``statuses`` in turn (exceptions are raised)."""
+	client = ProviderClient("test", backoff=0, **options)
+	calls = []
+
+	def fake_request(method, url, **kwargs):
+		calls.append(method)
+		status = statuses[min(len(calls), len(statuses)) - 1]
+		if isinstance(status, Exception):
+			raise status
+		return Reply(status)
+
+	client.session.request = fake_request
+	return client, calls
+
+
+def test_breaker_opens_after_consecutive_failures_and_lets_one_trial_through():
+	breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+	breaker.record_failure()
+	breaker.before_call()
+	breaker.record_failure()
+	assert breaker.state == "half-open"
+	breaker.before_call()
+	# Only one trial call while half-open
+	with pytest.raises(CircuitOpenError):
+		breaker.before_call()
+	breaker.record_success()
+	assert breaker.state == "closed"
+
+
+def test_open_circuit_fails_without_calling_the_provider():
+	client, calls = client_with([requests.ConnectionError("down")], retries=0, failure_threshold=1, reset_timeout=60)
+	with pytest.raises(requests.ConnectionError):
+		client.get("http://provider")
+	with pytest.raises(CircuitOpenError):
+		client.get("http://provider")
+	assert calls == ["GET"]
+
+
+def test_idempotent_requests_are_retried_on_server_errors():
+	client, calls = client_with([503, 200], retries=2)
+	assert client.get("http://provider").status_code == 200
+	assert calls == ["GET", "GET"]
+
+
+def test_posts_are_not_retried_once_sent():
+	client, calls = client_with([503, 200], retries=2)
+	assert client.post("http://provider").status_code == 503
+	assert calls == ["POST"]
+
+
+def test_connect_timeouts_are_retried_for_posts():
+	client, calls = client_with([requests.ConnectTimeout("no route"), 201], retries=1)
+	assert client.post("http://provider").status_code == 201
+	assert calls == ["POST", "POST"]
@@ -0,0 +1,41 @@
+import sqlite3
+
+import idempotency
+from idempotency import IdempotencyStore
+
+
+def make_store(tmp_path, lease=60):
+	path = str(tmp_path / "data.db")
+	conn = sqlite3.connect(path)
+	idempotency.init_schema(conn.cursor())
+	conn.commit()
+	conn.close()
+	return IdempotencyStore(path, lease=lease)
+
+
+def test_running_claim_blocks_a_retry(tmp_path):
+	store = make_store(tmp_path)
+	assert store.claim("POST /api/inquiry", "k1", "h")[0] == "new"
+	assert store.claim("POST /api/inquiry", "k1", "h")[0] == "in_progress"
+
+
+def test_abandoned_claim_is_taken_over_after_the_lease(tmp_path):
+	store = make_store(tmp_path, lease=0)
+	assert store.claim("POST /api/inquiry", "k1", "h")[0] == "new"
+	# The first worker died without completing or releasing
+	assert store.claim("POST /api/inquiry", "k1", "h")[0] == "new"
+	assert store.claim("POST /api/inquiry", "k1", "other")[0] == "mismatch"
+
+
+def test_completed_claim_replays_after_the_lease(tmp_path):
+	store = make_store(tmp_path, lease=0)
+	store.claim("POST /api/inquiry", "k1", "h")
+	store.complete("POST /api/inquiry", "k1", 201, "application/json", b"{}")
+	state, stored = store.claim("POST /api/inquiry", "k1", "h")
+	assert state == "replay" and stored["status"] == 201
+
+
+def test_request_hash_depends_on_the_caller():
+	body = b'{"title": "Truffle"}'
+	assert idempotency.request_hash("POST", "/api/cakes", body, "admin:1") != \
+		idempotency.request_hash("POST", "/api/cakes", body, "anonymous")
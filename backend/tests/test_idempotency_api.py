@@ -0,0 +1,41 @@
+from conftest import VENUE
+
+
+def test_admin_response_is_not_replayed_to_an_unauthenticated_client(client, admin):
+	headers = dict(admin, **{"Idempotency-Key": "cake-1"})
+	body = {"title": "Truffle"}
+	first = client.post(f"{VENUE}/api/cakes", json=body, headers=headers)
+	assert first.status_code == 201
+	again = client.post(f"{VENUE}/api/cakes", json=body, headers=headers)
+	assert again.headers.get("Idempotent-Replayed") == "true"
+	assert again.get_json() == first.get_json()
+
+	anonymous = client.post(f"{VENUE}/api/cakes", json=body, headers={"Idempotency-Key": "cake-1"})
+	assert anonymous.status_code == 401
+	assert "Idempotent-Replayed" not in anonymous.headers
+
+
+def test_unauthenticated_request_claims_no_key(client, admin):
+	body = {"title": "Opera"}
+	assert client.post(f"{VENUE}/api/cakes", json=body, headers={"Idempotency-Key": "cake-2"}).status_code == 401
+	# Had the 401 claimed the key, the admin would get 409 or a replayed 401
+	resp = client.post(f"{VENUE}/api/cakes", json=body, headers=dict(admin, **{"Idempotency-Key": "cake-2"}))
+	assert resp.status_code == 201 and "Idempotent-Replayed" not in resp.headers
+
+
+
+def test_key_reused_with_another_payload_is_rejected(client, admin):
+	headers = dict(admin, **{"Idempotency-Key": "booking-1"})
+	first = client.post(f"{VENUE}/api/bookings", json={"date": "2027-03-01", "time_slot": "09:00"}, headers=headers)
+	assert first.status_code == 201
+	other = client.post(f"{VENUE}/api/bookings", json={"date": "2027-03-01", "time_slot": "10:00"}, headers=headers)
+	assert other.status_code == 422
+	assert len(client.get(f"{VENUE}/api/bookings?date=2027-03-01").get_json()) == 1
+
+
+def test_failed_attempt_releases_the_key(client, admin):
+	headers = dict(admin, **{"Idempotency-Key": "booking-2"})
+	bad = client.post(f"{VENUE}/api/bookings", json={"date": "someday", "time_slot": "09:00"}, headers=headers)
+	assert bad.status_code == 400
+	good = client.post(f"{VENUE}/api/bookings", json={"date": "2027-03-02", "time_slot": "09:00"}, headers=headers)
+	assert good.status_code == 201 and "Idempotent-Replayed" not in good.headers
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+import image_pipeline
+from image_pipeline import ImageError
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def jpeg(width, height, orientation=None):
+	img = Image.new("RGB", (width, height), (200, 80, 40))
+	exif = Image.Exif()
+	exif[0x0110] = "Camera"  # Model
+	if orientation:
+		exif[0x0112] = orientation
+	buf = io.BytesIO()
+	img.save(buf, "JPEG", exif=exif)
+	return buf.getvalue()
+
+
+def test_target_widths_never_upscale(monkeypatch):
+	monkeypatch.setattr(image_pipeline, "IMAGE_WIDTHS", (320, 640, 1024))
+	assert image_pipeline.target_widths(700) == [320, 640, 700]
+	assert image_pipeline.target_widths(200) == [200]
+	assert image_pipeline.target_widths(5000) == [320, 640, 1024]
+
+
+def test_variants_are_resized_upright_and_stripped(monkeypatch):
+	monkeypatch.setattr(image_pipeline, "IMAGE_WIDTHS", (320, 640))
+	# Orientation 6: stored sideways, displayed rotated 90 degrees
+	variants = [v for v in image_pipeline.build_variants(jpeg(800, 400, orientation=6)) if v["format"] == "webp"]
+	assert [(v["width"], v["height"]) for v in variants] == [(320, 640), (400, 800)]
+	for variant in variants:
+		img = Image.open(io.BytesIO(variant["data"]))
+		assert img.format == "WEBP" and img.size == (variant["width"], variant["height"])
+		assert not img.getexif()
+
+
+def test_undecodable_upload_is_rejected():
+	with pytest.raises(ImageError):
+		image_pipeline.build_variants(b"not an image")
+
+
+def test_passthrough_types_are_not_handled():
+	assert not image_pipeline.handles("image/gif")
+	assert not image_pipeline.handles("video/mp4")
+	assert image_pipeline.handles("image/jpeg")
+
+
+def test_upload_all_and_describe(monkeypatch):
+	monkeypatch.setattr(image_pipeline, "IMAGE_WIDTHS", (320, 640))
+	variants = image_pipeline.build_variants(jpeg(1000, 500))
+	uploaded = image_pipeline.upload_all(variants, lambda name, data, mime: f"https://cdn/{name}", "cake")
+	fields = image_pipeline.describe(uploaded)
+	assert fields["url"] == "https://cdn/cake-640w.webp"
+	assert (fields["width"], fields["height"]) == (640, 320)
+	assert fields["imageVariants"]["webp"] == "https://cdn/cake-320w.webp 320w, https://cdn/cake-640w.webp 640w"
+
+
+def test_failed_variant_upload_fails_the_batch(monkeypatch):
+	monkeypatch.setattr(image_pipeline, "IMAGE_WIDTHS", (320, 640))
+	variants = image_pipeline.build_variants(jpeg(1000, 500))
+
+	def upload(name, data, mime):
+		if "640w" in name:
+			raise OSError("upload failed")
+		return name
+
+	with pytest.raises(OSError):
+		image_pipeline.upload_all(variants, upload, "cake")
@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import time
+
+import requests
+
+import link_scanner
+from conftest import VENUE
+from link_scanner import LinkScanner
+
+CONTENT = {
+	"cakes": [
+		{"id": 1, "title": "Opera", "image": "https://cdn.test/opera.jpg",
+			"imageVariants": {"webp": "https://cdn.test/o-320w.webp 320w, https://cdn.test/o-640w.webp 640w"}},
+		{"id": 2, "title": "Gone", "image": "https://cdn.test/gone.jpg", "originalUrl": "https://cdn.test/src.jpg"},
+	],
+	"reels": [{"id": 3, "url": "https://www.instagram.com/reel/x", "thumbnail": "https://cdn.test/head-405.jpg"}],
+	"settings": {"logo": "https://cdn.test/opera.jpg"},
+}
+
+
+class FakeResponse:
+	def __init__(self, status, headers=None):
+		self.status_code = status
+		self.headers = headers or {}
+
+	def close(self):
+		pass
+
+
+class FakeSession:
+	"""HEAD answers by URL: 'gone' is 404, 'head-405' rejects HEAD, validators match 'v1'."""
+
+	def __init__(self):
+		self.calls = []
+		self.lock = threading.Lock()
+
+	def head(self, url, headers, **kwargs):
+		with self.lock:
+			self.calls.append(("HEAD", url, headers))
+		if "gone" in url:
+			return FakeResponse(404)
+		if "head-405" in url:
+			return FakeResponse(405)
+		if headers.get("If-None-Match") == "v1":
+			return FakeResponse(304)
+		return FakeResponse(200, {"ETag": "v1", "Content-Type": "image/jpeg"})
+
+	def get(self, url, headers, **kwargs):
+		with self.lock:
+			self.calls.append(("GET", url, headers))
+		return FakeResponse(206)
+
+
+def make(tmp_path, **options):
+	db_path = str(tmp_path / "data.db")
+	conn = sqlite3.connect(db_path)
+	link_scanner.init_schema(conn.cursor())
+	conn.close()
+	scanner = LinkScanner(db_path, **options)
+	scanner.session = FakeSession()
+	return scanner
+
+
+def test_collect_finds_media_urls_with_their_locations():
+	found = link_scanner.collect(CONTENT)
+	assert set(found) == {"https://cdn.test/opera.jpg", "https://cdn.test/o-320w.webp", "https://cdn.test/o-640w.webp",
+		"https://cdn.test/gone.jpg", "https://cdn.test/head-405.jpg"}
+	assert [p["field"] for p in found["https://cdn.test/opera.jpg"]] == ["image", "logo"]
+	assert found["https://cdn.test/o-640w.webp"][0] == {"section": "cakes", "id": 1, "title": "Opera",
+		"field": "imageVariants.webp"}
+
+
+def test_scan_reports_broken_links_per_item(tmp_path):
+	scanner = make(tmp_path)
+	report = scanner.scan(CONTENT)
+	assert report["summary"] == {"ok": 4, "broken": 1, "slow": 0, "unchecked": 0, "urls": 5}
+	assert [(e["section"], e["id"], e["status"]) for e in report["items"]] == [("cakes", 2, 404)]
+	# Hosts that reject HEAD get a one-byte ranged GET
+	ranged = [c for c in scanner.session.calls if c[0] == "GET"]
+	assert ranged == [("GET", "https://cdn.test/head-405.jpg", {"Range": "bytes=0-0"})]
+
+
+def test_fresh_results_are_reused_and_stale_ones_revalidated(tmp_path):
+	scanner = make(tmp_path)
+	scanner.scan(CONTENT)
+	scanner.session.calls.clear()
+	scanner.scan(CONTENT)
+	# Only the broken link is re-requested
+	assert [c[1] for c in scanner.session.calls] == ["https://cdn.test/gone.jpg"]
+
+	scanner.cache_seconds = 0
+	scanner.session.calls.clear()
+	report = scanner.scan(CONTENT)
+	conditional = {c[1]: c[2] for c in scanner.session.calls if c[0] == "HEAD"}
+	assert conditional["https://cdn.test/opera.jpg"] == {"If-None-Match": "v1"}
+	assert report["summary"]["ok"] == 4
+	assert scanner.cached(["https://cdn.test/opera.jpg"])["https://cdn.test/opera.jpg"]["etag"] == "v1"
+
+
+def test_errors_and_slow_links(tmp_path):
+	scanner = make(tmp_path, slow_ms=-1)
+
+	def head(url, headers, **kwargs):
+		if "gone" in url:
+			raise requests.ConnectionError("refused")
+		return FakeResponse(200)
+
+	scanner.session.head = head
+	report = scanner.scan({"cakes": CONTENT["cakes"]})
+	states = {e["url"]: (e["state"], e["error"]) for e in report["items"]}
+	assert states["https://cdn.test/gone.jpg"] == ("broken", "refused")
+	assert states["https://cdn.test/opera.jpg"] == ("slow", None)
+
+
+def test_only_one_background_scan_at_a_time(tmp_path):
+	scanner = make(tmp_path)
+	release = threading.Event()
+
+	def load():
+		release.wait(5)
+		return CONTENT
+
+	assert scanner.scan_in_background(load) is True
+	assert scanner.scan_in_background(load) is False
+	release.set()
+	for _ in range(500):
+		if not scanner.scanning:
+			break
+		time.sleep(0.01)
+	assert scanner.last_scan["urls"] == 5
+
+
+def test_link_health_endpoint(client, admin):
+	assert client.get(f"{VENUE}/admin/link-health").status_code == 401
+	report = client.get(f"{VENUE}/admin/link-health", headers=admin).get_json()
+	assert report["scanning"] is False
+	assert report["summary"]["urls"] == report["summary"]["unchecked"] + report["summary"]["ok"] \
+		+ report["summary"]["broken"] + report["summary"]["slow"]
@@ -0,0 +1,119 @@
+import pytest
+import requests
+
+import notifications
+from conftest import VENUE
+from notifications import Notifier
+
+
+@pytest.fixture(autouse=True)
+def telegram(monkeypatch):
+	monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+
+
+class Provider:
+	def __init__(self, fail=False):
+		self.fail = fail
+		self.sent = []
+
+	def __call__(self, channel, method, url, kwargs):
+		if self.fail:
+			raise OSError("provider down")
+		self.sent.append(kwargs["json"]["text"])
+
+
+def make(tmp_path, send, policy="immediate"):
+	return Notifier(send, str(tmp_path / "data.db"), channels=["telegram"], policies={"telegram": policy},
+		rates={"telegram": "100/second"})
+
+
+def test_workers_share_one_digest(tmp_path):
+	provider = Provider()
+	first, second = make(tmp_path, provider, "digest every=300 max=2"), make(tmp_path, provider, "digest every=300 max=2")
+	first.notify("inquiry one")
+	assert provider.sent == []
+	# Another worker's inquiry completes the same digest
+	second.notify("inquiry two")
+	first.flush()
+	assert len(provider.sent) == 1 and "inquiry one" in provider.sent[0] and "inquiry two" in provider.sent[0]
+	assert first.pending() == {"telegram": 0}
+
+
+def test_pending_digest_survives_a_restart(tmp_path, monkeypatch):
+	provider = Provider()
+	# The old worker is killed without releasing its lease; let that lease lapse at once
+	monkeypatch.setattr(notifications, "NOTIFY_LEASE_SECONDS", 0)
+	make(tmp_path, provider, "digest every=300 max=5").notify("before restart")
+	restarted = make(tmp_path, provider, "digest every=300 max=5")
+	assert restarted.pending() == {"telegram": 1}
+	restarted.flush(force=True)
+	assert provider.sent == ["before restart"]
+
+
+def test_only_the_lease_holder_sends(tmp_path):
+	holder_provider, other_provider = Provider(), Provider()
+	holder, other = make(tmp_path, holder_provider), make(tmp_path, other_provider)
+	holder.flush()
+	other.notify("inquiry")
+	assert other_provider.sent == [] and other.pending() == {"telegram": 1}
+	holder.flush()
+	assert holder_provider.sent == ["inquiry"]
+	# A closed holder hands the lease over
+	holder.close()
+	other.notify("next")
+	assert other_provider.sent == ["next"]
+
+
+def test_failed_send_is_kept_and_retried(tmp_path, monkeypatch):
+	monkeypatch.setattr(notifications, "NOTIFY_RETRY_SECONDS", 0)
+	provider = Provider(fail=True)
+	notifier = make(tmp_path, provider)
+	notifier.notify("inquiry")
+	assert notifier.pending() == {"telegram": 1}
+	provider.fail = False
+	assert notifier.flush()
+	assert provider.sent == ["inquiry"] and notifier.pending() == {"telegram": 0}
+
+
+def test_immediate_channel_coalesces_when_out_of_tokens(tmp_path):
+	provider = Provider()
+	notifier = Notifier(provider, str(tmp_path / "data.db"), channels=["telegram"], rates={"telegram": "1/hour"})
+	for i in range(3):
+		notifier.notify(f"inquiry {i}")
+	assert provider.sent == ["inquiry 0"]
+	assert notifier.pending() == {"telegram": 2}
+	notifier.flush(force=True)
+	assert "2 new inquiries" in provider.sent[1]
+
+
+def test_provider_error_status_keeps_the_message_queued(client, tmp_path, monkeypatch):
+	import app
+	from flask import g, request_finished
+
+	statuses = [500, 200]
+	sent = []
+
+	class Response:
+		def __init__(self, status):
+			self.status_code = status
+
+		def raise_for_status(self):
+			if self.status_code >= 400:
+				raise requests.HTTPError(f"{self.status_code} Server Error")
+
+	class Client:
+		def request(self, method, url, **kwargs):
+			sent.append(kwargs["json"]["text"])
+			return Response(statuses.pop(0))
+
+	monkeypatch.setattr(app, "get_client", lambda name: Client())
+	monkeypatch.setattr(notifications, "NOTIFY_RETRY_SECONDS", 0)
+	delivery = []
+	# The app's own delivery function: it must raise for an error status for the Notifier to retry
+	with request_finished.connected_to(lambda sender, **extra: delivery.append(g.tenant.notifier.send), app.app):
+		client.get(f"{VENUE}/api/content")
+	notifier = make(tmp_path, delivery[0])
+	notifier.notify("inquiry")
+	assert notifier.pending() == {"telegram": 1}
+	assert notifier.flush()
+	assert sent == ["inquiry", "inquiry"] and notifier.pending() == {"telegram": 0}
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import ordering
+from conftest import VENUE
+
+
+def test_key_between_is_strictly_between_and_valid():
+	rng = random.Random(7)
+	keys = [ordering.key_between(None, None)]
+	for _ in range(500):
+		index = rng.randrange(len(keys) + 1)
+		low = keys[index - 1] if index else None
+		high = keys[index] if index < len(keys) else None
+		key = ordering.key_between(low, high)
+		assert ordering.valid_key(key)
+		assert (low is None or low < key) and (high is None or key < high)
+		keys.insert(index, key)
+	assert keys == sorted(keys)
+
+
+def test_key_between_edges():
+	assert ordering.key_between("V", "W") == "VV"
+	assert ordering.key_between(None, "1") == "0V"
+	assert ordering.key_after("zz") == "zzV"
+	with pytest.raises(ValueError):
+		ordering.key_between("W", "V")
+
+
+def test_spread_is_ordered_and_unique():
+	for count in (1, 61, 62, 500):
+		keys = ordering.spread(count)
+		assert len(set(keys)) == count and keys == sorted(keys)
+		assert all(ordering.valid_key(k) for k in keys)
+
+
+def test_move_rewrites_only_the_moved_item():
+	items = [{"id": i, "position": key} for i, key in zip((1, 2, 3), ordering.spread(3))]
+	before = {it["id"]: it["position"] for it in items}
+	ordering.move(items, 3, before_id=1)
+	assert [it["id"] for it in ordering.sort_items(items)] == [3, 1, 2]
+	assert {it["id"]: it["position"] for it in items if it["id"] != 3} == {1: before[1], 2: before[2]}
+	ordering.move(items, 3)
+	assert [it["id"] for it in ordering.sort_items(items)] == [1, 2, 3]
+	assert ordering.move(items, 9) is None
+	with pytest.raises(KeyError):
+		ordering.move(items, 1, before_id=9)
+
+
+def test_move_renumbers_duplicate_neighbours():
+	items = [{"id": 1, "position": "V"}, {"id": 2, "position": "V"}, {"id": 3}]
+	ordering.move(items, 3, before_id=2)
+	assert [it["id"] for it in ordering.sort_items(items)] == [1, 3, 2]
+	assert len({it["position"] for it in items}) == 3
+
+
+def test_assign_missing_keeps_the_list_order():
+	data = {"cakes": [{"id": 2}, {"id": 1, "position": "V"}, {"id": 3}], "addons": [{"id": 1, "position": "a"}],
+		"settings": {}}
+	assert ordering.assign_missing(data) == 3
+	assert [it["id"] for it in ordering.in_order(data)["cakes"]] == [1, 2, 3]
+	assert data["addons"] == [{"id": 1, "position": "a"}]
+	assert ordering.assign_missing(data) == 0
+
+
+def test_move_endpoint(client, admin):
+	ids = [client.post(f"{VENUE}/api/addons", json={"name": n}, headers=admin).get_json()["id"] for n in ("a", "b")]
+	moved = client.post(f"{VENUE}/api/addons/{ids[1]}/move?before={ids[0]}", headers=admin)
+	assert moved.status_code == 200
+	listed = [it["id"] for it in client.get(f"{VENUE}/api/content").get_json()["addons"]]
+	assert listed.index(ids[1]) < listed.index(ids[0])
+	assert client.post(f"{VENUE}/api/addons/{ids[1]}/move?before=x", headers=admin).status_code == 400
+	assert client.post(f"{VENUE}/api/addons/99999/move", headers=admin).status_code == 404
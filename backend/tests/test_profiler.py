@@ -0,0 +1,38 @@
+import cProfile
+
+from profiler import ProfileStore
+
+
+def finished_profile():
+	profile = cProfile.Profile()
+	profile.enable()
+	sum(range(1000))
+	profile.disable()
+	return profile
+
+
+def test_sampled_profiles_keep_only_the_slowest_per_endpoint(tmp_path):
+	store = ProfileStore(str(tmp_path), slowest=2)
+	for ms in (10, 30, 20):
+		store.save(finished_profile(), "sampled", "api_content", "GET", "/api/content", 200, ms)
+	assert store.save(finished_profile(), "sampled", "api_content", "GET", "/api/content", 200, 5) is None
+	store.save(finished_profile(), "sampled", "get_bookings", "GET", "/api/bookings", 200, 1)
+
+	kept = sorted((m["endpoint"], m["ms"]) for m in store.list())
+	assert kept == [("api_content", 20), ("api_content", 30), ("get_bookings", 1)]
+
+
+def test_on_demand_profiles_are_a_ring(tmp_path):
+	store = ProfileStore(str(tmp_path), ring_size=2)
+	names = [store.save(finished_profile(), "on_demand", "api_content", "GET", "/", 200, ms) for ms in (1, 2, 3)]
+	assert {m["name"] for m in store.list()} == set(names[1:])
+	assert store.path(names[0]) is None
+	assert "function calls" in store.summary(names[2])
+
+
+def test_path_rejects_unsafe_names(tmp_path):
+	store = ProfileStore(str(tmp_path))
+	name = store.save(finished_profile(), "on_demand", "x", "GET", "/", 200, 1)
+	assert store.path(name) == str(tmp_path / name)
+	assert store.path("../" + name) is None
+	assert store.path(name + ".json") is None
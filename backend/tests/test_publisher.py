@@ -0,0 +1,54 @@
+import gzip
+import json
+import os
+
+from content_store import ContentStore
+from publisher import MANIFEST, SnapshotPublisher
+
+
+def make(tmp_path):
+	store = ContentStore(str(tmp_path / "content.json"), {"cakes": []})
+	store.read()
+	render = lambda data: {"cakes": data["cakes"], "count": len(data["cakes"])}
+	return store, SnapshotPublisher(str(tmp_path / "public"), store, render, debounce=0.01)
+
+
+def add_cake(store, title):
+	with store.edit() as data:
+		data["cakes"].append({"title": title})
+		store.write(data)
+
+
+def test_views_are_published_under_content_hashed_names(tmp_path):
+	store, publisher = make(tmp_path)
+	manifest = publisher.publish()
+	assert manifest["fingerprint"] == store.fingerprint
+	entry = manifest["files"]["cakes"]
+	path = os.path.join(publisher.out_dir, entry["path"])
+	assert entry["path"].startswith("cakes.") and json.load(open(path)) == []
+	with open(path + ".gz", "rb") as f:
+		assert gzip.decompress(f.read()) == open(path, "rb").read()
+	assert publisher.manifest() == manifest
+
+
+def test_unchanged_views_keep_their_file_and_old_generations_are_pruned(tmp_path):
+	store, publisher = make(tmp_path)
+	first = publisher.publish()["files"]
+	add_cake(store, "Truffle")
+	second = publisher.publish()["files"]
+	add_cake(store, "Opera")
+	third = publisher.publish()["files"]
+	assert first["cakes"]["path"] != second["cakes"]["path"] != third["cakes"]["path"]
+	listed = set(os.listdir(publisher.out_dir))
+	# The previous generation stays for in-flight clients, the one before is removed
+	assert second["cakes"]["path"] in listed and first["cakes"]["path"] not in listed
+	assert MANIFEST in listed
+
+
+def test_publish_if_stale_catches_up_after_a_write(tmp_path):
+	store, publisher = make(tmp_path)
+	publisher.publish()
+	add_cake(store, "Truffle")
+	publisher.publish_if_stale()
+	publisher.close()
+	assert publisher.manifest()["fingerprint"] == store.fingerprint
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from rate_limit import Limit, MemoryBuckets, RateLimiter, SqliteBuckets
+
+
+def test_parse():
+	limit = Limit.parse("5/minute burst=3")
+	assert limit.rate == 5 / 60 and limit.capacity == 3
+	assert Limit.parse("10/30").rate == 10 / 30
+
+
+@pytest.mark.parametrize("spec", ["0/minute", "-1/minute", "5/0", "5/minute burst=0"])
+def test_non_positive_limits_are_rejected(spec):
+	with pytest.raises(ValueError):
+		Limit.parse(spec)
+
+
+def test_empty_spec_turns_a_default_limit_off(tmp_path):
+	limiter = RateLimiter(str(tmp_path / "data.db"), limits={"get_bookings": ""})
+	assert "get_bookings" not in limiter.limits
+	assert all(limiter.check("get_bookings", "1.2.3.4") == 0 for _ in range(100))
+
+
+def sqlite_buckets(tmp_path):
+	buckets = SqliteBuckets(str(tmp_path / "data.db"))
+	conn = sqlite3.connect(buckets.db_path)
+	buckets.init_schema(conn.cursor())
+	conn.commit()
+	conn.close()
+	return buckets
+
+
+@pytest.mark.parametrize("make", [lambda tmp_path: MemoryBuckets(), sqlite_buckets])
+def test_burst_then_block(tmp_path, make):
+	buckets = make(tmp_path)
+	limit = Limit.parse("1/minute burst=2")
+	assert buckets.take("k", limit)[0] and buckets.take("k", limit)[0]
+	allowed, retry_after = buckets.take("k", limit)
+	assert not allowed and 0 < retry_after <= 60
+	# Other clients have their own bucket
+	assert buckets.take("other", limit)[0]
+
+
+@pytest.mark.parametrize("proxies, forwarded, expected", [
+	(0, "6.6.6.6", "10.0.0.1"),
+	(1, "6.6.6.6, 203.0.113.7", "203.0.113.7"),
+	(2, "203.0.113.7", "10.0.0.1"),
+])
+def test_client_ip_trusts_only_the_configured_proxies(monkeypatch, proxies, forwarded, expected):
+	import rate_limit
+
+	class Request:
+		headers = {"X-Forwarded-For": forwarded}
+		remote_addr = "10.0.0.1"
+
+	monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUSTED_PROXIES", proxies)
+	assert RateLimiter.client_ip(Request) == expected
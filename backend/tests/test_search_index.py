@@ -0,0 +1,80 @@
+from conftest import VENUE
+from search_index import SearchIndex
+
+
+def make_index(tmp_path, cakes):
+	index = SearchIndex(str(tmp_path / "data.db"))
+	index.init_schema()
+	index.apply_change(None, {"cakes": cakes}, "v1")
+	return index
+
+
+def test_snippet_escapes_stored_text(tmp_path):
+	index = make_index(tmp_path, [{"id": 1, "title": "Choco <img src=x onerror=alert(1)> cake & cream"}])
+	snippet = index.search("choco")["results"][0]["snippet"]
+	assert snippet == "<mark>Choco</mark> &lt;img src=x onerror=alert(1)&gt; cake &amp; cream"
+
+
+def test_limit_is_clamped(tmp_path):
+	index = make_index(tmp_path, [{"id": i, "title": f"cake {i}"} for i in range(150)])
+	assert len(index.search("cake", limit=-1)["results"]) == 1
+	assert len(index.search("cake", limit=0)["results"]) == 1
+	assert len(index.search("cake", limit=500)["results"]) == 100
+	assert len(index.search("cake", offset=-5, limit=3)["results"]) == 3
+
+
+CATALOGUE = {
+	"cakes": [
+		{"id": 1, "title": "Dark Chocolate Truffle", "flavor": "chocolate"},
+		{"id": 2, "title": "Vanilla Dream", "description": "with a chocolate drizzle"},
+	],
+	"indoorDecorations": [{"id": 1, "title": "Birthday Balloons", "description": "Chocolate theme"}],
+}
+
+
+def catalogue_index(tmp_path):
+	index = SearchIndex(str(tmp_path / "data.db"))
+	index.init_schema()
+	index.apply_change(None, CATALOGUE, "v1")
+	return index
+
+
+def test_title_matches_rank_first_and_facets_count_every_collection(tmp_path):
+	result = catalogue_index(tmp_path).search("chocolate", collections=["cakes"])
+	assert [(r["resource"], r["id"]) for r in result["results"]] == [("cakes", "1"), ("cakes", "2")]
+	assert result["facets"] == {"cakes": 2, "indoor-decorations": 1}
+	assert result["total"] == 2
+
+
+def test_last_term_matches_as_a_prefix(tmp_path):
+	index = catalogue_index(tmp_path)
+	assert [r["id"] for r in index.search("birthday ball")["results"]] == ["1"]
+	assert index.search("balloonsx")["total"] == 0
+
+
+def test_only_changed_items_are_reindexed(tmp_path):
+	index = catalogue_index(tmp_path)
+	new = dict(CATALOGUE, cakes=[CATALOGUE["cakes"][0], {"id": 3, "title": "Lemon Tart"}])
+	index.apply_change(CATALOGUE, new, "v2")
+	assert [r["id"] for r in index.search("lemon")["results"]] == ["3"]
+	assert index.search("vanilla")["total"] == 0
+	assert index.fingerprint == "v2"
+
+
+def test_stale_index_is_reconciled_from_the_document(tmp_path):
+	index = catalogue_index(tmp_path)
+	# Another worker (or a manual edit) changed content.json without this index seeing it
+	fresh = SearchIndex(index.db_path)
+	fresh.ensure_current({"cakes": [{"id": 9, "title": "Mango Mousse"}]}, "v9")
+	assert [(r["collection"], r["id"]) for r in fresh.search("mango")["results"]] == [("cakes", "9")]
+	assert fresh.search("chocolate")["total"] == 0
+
+
+def test_search_endpoint(client, admin):
+	assert client.get(f"{VENUE}/api/search").status_code == 400
+	for title in ("Pistachio Delight", "Pistachio Rose"):
+		assert client.post(f"{VENUE}/api/cakes", json={"title": title}, headers=admin).status_code == 201
+	result = client.get(f"{VENUE}/api/search?q=pistachio&limit=-1").get_json()
+	assert result["total"] == 2 and len(result["results"]) == 1
+	# Hits carry the current item so cards can be rendered directly
+	assert result["results"][0]["item"]["title"].startswith("Pistachio")
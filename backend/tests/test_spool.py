@@ -0,0 +1,77 @@
+import os
+import time
+
+import pytest
+
+import spool as spool_module
+from spool import Spool, SpoolFull
+
+
+def test_transfer_starts_the_janitor_in_a_forked_worker(tmp_path):
+	spool = Spool(str(tmp_path / "spool"))
+	spool.start_janitor()
+	parent_janitor = spool._janitor
+	# As seen from a worker forked after the tenant was opened
+	spool._janitor_pid = -1
+	with spool.transfer("clip.mp4"):
+		pass
+	assert spool._janitor is not parent_janitor and spool._janitor.is_alive()
+	spool.close()
+
+
+def test_closed_spool_starts_no_janitor(tmp_path):
+	spool = Spool(str(tmp_path / "spool"))
+	spool.close()
+	with spool.transfer("clip.mp4"):
+		pass
+	assert spool._janitor is None
+
+
+def test_spool_file_is_removed_on_success_and_on_error(tmp_path):
+	spool = Spool(str(tmp_path / "spool"))
+	with spool.transfer("clip.mp4") as spooled:
+		spooled.write(b"data")
+		spooled.close()
+		assert spooled.path.endswith(".mp4") and os.path.getsize(spooled.path) == 4
+	with pytest.raises(RuntimeError):
+		with spool.transfer("../../evil.sh;rm") as spooled:
+			assert os.path.dirname(spooled.path) == spool.directory
+			raise RuntimeError("upload failed")
+	assert os.listdir(spool.directory) == []
+	spool.close()
+
+
+def test_quota_is_enforced_while_writing(tmp_path, monkeypatch):
+	monkeypatch.setattr(spool_module, "_QUOTA_CHECK_BYTES", 10)
+	spool = Spool(str(tmp_path / "spool"), quota_bytes=25)
+	with pytest.raises(SpoolFull):
+		with spool.transfer("clip.mp4", expected_bytes=30):
+			pass
+	with pytest.raises(SpoolFull):
+		with spool.transfer("clip.mp4") as spooled:
+			for _ in range(3):
+				spooled.write(b"x" * 10)
+	assert spool.usage() == 0
+	spool.close()
+
+
+def test_transfer_slots_are_bounded(tmp_path):
+	spool = Spool(str(tmp_path / "spool"), max_transfers=1)
+	with spool.transfer("a.mp4"):
+		with pytest.raises(SpoolFull):
+			with spool.transfer("b.mp4"):
+				pass
+	with spool.transfer("c.mp4"):
+		pass
+	spool.close()
+
+
+def test_reap_removes_only_stale_files(tmp_path):
+	spool = Spool(str(tmp_path / "spool"), max_age=60)
+	old, new = (os.path.join(spool.directory, name) for name in ("xfer-old", "xfer-new"))
+	for path in (old, new):
+		open(path, "wb").close()
+	os.utime(old, (time.time() - 120, time.time() - 120))
+	assert spool.reap() == 1
+	assert os.listdir(spool.directory) == ["xfer-new"]
+	spool.close()
@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+import stats
+from conftest import VENUE
+
+
+def add_inquiry(db, created_at, event_type="Birthday", place="indoor"):
+	cur = db.execute(
+		"INSERT INTO inquiries (name, created_at, event_type, indoor_outdoor) VALUES ('x', ?, ?, ?)",
+		(created_at, event_type, place),
+	)
+	return cur.lastrowid
+
+
+def test_triggers_keep_the_rollups_in_step(db):
+	first = add_inquiry(db, "2026-10-01 10:00:00")
+	add_inquiry(db, "2026-10-01 12:00:00", "Anniversary", "outdoor")
+	add_inquiry(db, "2026-10-03 09:00:00")
+	db.execute("UPDATE inquiries SET event_type = 'Anniversary' WHERE id = ?", (first,))
+	db.execute("INSERT INTO bookings (date, time_slot) VALUES ('2026-10-04', '18:00')")  # a Sunday
+	db.execute("INSERT INTO bookings (date, time_slot) VALUES ('2026-10-05', '18:00')")
+	db.execute("DELETE FROM bookings WHERE date = '2026-10-05'")
+	db.commit()
+
+	result = stats.range_stats(db, "2026-10-01", "2026-10-31")
+	assert result["inquiries"]["total"] == 3
+	assert result["inquiries"]["per_day"] == [{"day": "2026-10-01", "count": 2}, {"day": "2026-10-03", "count": 1}]
+	assert result["inquiries"]["by_type"] == {"Anniversary": 2, "Birthday": 1}
+	assert result["inquiries"]["by_indoor_outdoor"] == {"indoor": 2, "outdoor": 1}
+	assert result["bookings"]["total"] == 1
+	assert result["bookings"]["by_weekday_slot"] == [{"weekday": "Sunday", "time_slot": "18:00", "count": 1}]
+
+
+def test_rollups_match_a_full_scan(db):
+	for day in range(1, 29):
+		add_inquiry(db, f"2026-02-{day:02d} 10:00:00", event_type=("A", "B", None)[day % 3])
+	db.commit()
+	scanned = db.execute("SELECT COUNT(*) FROM inquiries WHERE date(created_at) BETWEEN '2026-02-05' AND '2026-02-20'")
+	assert stats.range_stats(db, "2026-02-05", "2026-02-20")["inquiries"]["total"] == scanned.fetchone()[0]
+
+
+def test_existing_rows_are_backfilled_once(tmp_path):
+	conn = sqlite3.connect(tmp_path / "data.db")
+	conn.execute("CREATE TABLE inquiries (id INTEGER PRIMARY KEY, created_at TEXT, event_type TEXT, indoor_outdoor TEXT)")
+	conn.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY, date TEXT, time_slot TEXT)")
+	conn.execute("INSERT INTO inquiries (created_at, event_type) VALUES ('2026-01-02 10:00:00', 'Birthday')")
+	stats.init_schema(conn.cursor())
+	stats.init_schema(conn.cursor())
+	assert stats.range_stats(conn, "2026-01-01", "2026-01-31")["inquiries"]["total"] == 1
+
+
+def test_reversed_range_is_rejected(db):
+	with pytest.raises(ValueError):
+		stats.range_stats(db, "2026-02-01", "2026-01-01")
+
+
+def test_stats_endpoint_needs_an_admin(client, admin):
+	assert client.get(f"{VENUE}/admin/stats").status_code == 401
+	assert client.get(f"{VENUE}/admin/stats?from=2026-01-01&to=2026-01-31", headers=admin).status_code == 200
+	assert client.get(f"{VENUE}/admin/stats?from=2026-02-01&to=2026-01-01", headers=admin).status_code == 400
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from conftest import VENUE
+from tenants import Tenant, TenantMiddleware, TenantRegistry, parse_tenants
+
+
+def test_slow_open_does_not_block_other_tenants():
+	opened, slow_started, slow_done = [], threading.Event(), threading.Event()
+
+	def open_tenant(tenant_id):
+		opened.append(tenant_id)
+		if tenant_id == "slow":
+			slow_started.set()
+			assert slow_done.wait(5)
+		return Tenant(tenant_id, {})
+
+	registry = TenantRegistry(open_tenant)
+	waiters = [threading.Thread(target=registry.acquire, args=("slow",)) for _ in range(3)]
+	for t in waiters:
+		t.start()
+	assert slow_started.wait(5)
+	# Served while "slow" is still being opened
+	assert registry.acquire("fast").id == "fast"
+	slow_done.set()
+	for t in waiters:
+		t.join(5)
+	assert sorted(opened) == ["fast", "slow"]
+	assert {t.id: t.active for t in registry.open_tenants()} == {"slow": 3, "fast": 1}
+
+
+def test_failed_open_is_retried():
+	calls = []
+
+	def open_tenant(tenant_id):
+		calls.append(tenant_id)
+		if len(calls) == 1:
+			raise OSError("disk full")
+		return Tenant(tenant_id, {})
+
+	registry = TenantRegistry(open_tenant)
+	with pytest.raises(OSError):
+		registry.acquire("a")
+	assert registry.acquire("a").active == 1
+	assert registry._opening == {}
+
+
+def call(middleware, path, host="api.example.com"):
+	environ = {"PATH_INFO": path, "SCRIPT_NAME": "", "HTTP_HOST": host}
+	statuses = []
+	body = middleware(environ, lambda status, headers: statuses.append(status))
+	return environ, statuses[0] if statuses else None, body
+
+
+def app_seeing(environ, start_response):
+	return [b"app"]
+
+
+def test_parse_tenants():
+	assert parse_tenants("Lakeside=lakeside.example.com|www.lakeside.example.com, garden") == {
+		"lakeside": ["lakeside.example.com", "www.lakeside.example.com"], "garden": []}
+	with pytest.raises(ValueError):
+		parse_tenants("../etc")
+
+
+def test_path_mode_moves_the_prefix_into_script_name():
+	middleware = TenantMiddleware(app_seeing, {"lakeside": []}, mode="path", prefix="/t")
+	environ, status, body = call(middleware, "/t/lakeside/api/content")
+	assert body == [b"app"] and status is None
+	assert (environ["app.tenant"], environ["SCRIPT_NAME"], environ["PATH_INFO"]) == ("lakeside", "/t/lakeside", "/api/content")
+	assert call(middleware, "/t/lakeside")[0]["PATH_INFO"] == "/"
+
+
+def test_unknown_venue_is_404():
+	middleware = TenantMiddleware(app_seeing, {"lakeside": []}, mode="path", prefix="/t")
+	for path in ("/t/garden/api/content", "/api/content", "/tx/lakeside/api/content"):
+		environ, status, body = call(middleware, path)
+		assert status == "404 NOT FOUND" and "app.tenant" not in environ
+	environ, status, body = call(middleware, "/healthz")
+	assert body == [b"app"] and environ["app.tenant"] is None
+
+
+def test_host_mode_resolves_by_host_without_port():
+	middleware = TenantMiddleware(app_seeing, parse_tenants("lakeside=lakeside.example.com"), mode="host")
+	environ, status, _ = call(middleware, "/api/content", host="Lakeside.Example.com:8443")
+	assert environ["app.tenant"] == "lakeside" and environ["PATH_INFO"] == "/api/content"
+	assert call(middleware, "/api/content", host="evil.example.com")[1] == "404 NOT FOUND"
+
+
+def test_least_recently_used_idle_tenant_is_closed():
+	closed = []
+
+	def open_tenant(tenant_id):
+		tenant = Tenant(tenant_id, {})
+		tenant.on_close(lambda: closed.append(tenant_id))
+		return tenant
+
+	registry = TenantRegistry(open_tenant, max_open=2)
+	a = registry.acquire("a")
+	registry.release(registry.acquire("b"))
+	registry.release(registry.acquire("c"))
+	# "a" is the least recently used but still serving a request
+	assert closed == ["b"]
+	registry.release(a)
+	registry.release(registry.acquire("d"))
+	assert closed == ["b", "a"]
+	assert [t.id for t in registry.open_tenants()] == ["c", "d"]
+
+
+def test_app_serves_only_configured_venues(client):
+	assert client.get(f"{VENUE}/api/content").status_code == 200
+	assert client.get("/t/elsewhere/api/content").status_code == 404
+	assert client.get("/api/content").get_json() == {"error": "Unknown venue"}
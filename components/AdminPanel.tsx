@@ -113,6 +113,9 @@ const AdminPanel: React.FC<AdminPanelProps> = ({ isOpen, onClose, content, actio
             const { name, value } = e.target;
             if (name === 'features' || name === 'extras') {
                 setFormData({ ...formData, [name]: value.split(',').map(s => s.trim()) });
+            } else if (name === 'image') {
+                // A hand-edited URL no longer matches the uploaded variants
+                setFormData({ ...formData, image: value, imageVariants: undefined });
             } else {
                 setFormData({ ...formData, [name]: value });
             }
@@ -122,9 +125,13 @@ const AdminPanel: React.FC<AdminPanelProps> = ({ isOpen, onClose, content, actio
             if (e.target.files && e.target.files[0]) {
                 setUploading(true);
                 try {
-                    const url = await api.uploadFile(e.target.files[0]);
-                    const targetField = resource === 'reels' ? 'thumbnail' : 'image';
-                    setFormData({ ...formData, [targetField]: url });
+                    const upload = await api.uploadMedia(e.target.files[0]);
+                    if (resource === 'reels') {
+                        setFormData({ ...formData, thumbnail: upload.url });
+                    } else {
+                        // Replace (or clear) the variants so they always match the new image
+                        setFormData({ ...formData, image: upload.url, imageVariants: upload.imageVariants });
+                    }
                 } catch (error: any) {
                     alert(`Upload failed: ${error.message}`);
                 } finally {
@@ -1,6 +1,7 @@
 
 import React from 'react';
 import { Cake } from '../types';
+import ResponsiveImage from './ResponsiveImage';
 
 interface CakeSectionProps {
   cakes: Cake[];
@@ -21,7 +22,7 @@ const CakeSection: React.FC<CakeSectionProps> = ({ cakes }) => {
         {cakes.map((cake) => (
           <div key={cake.id} className="flex-none w-[280px] md:w-[300px] snap-center group flex flex-col items-center text-center p-4 cursor-pointer">
             <div className="h-[280px] w-full flex items-center justify-center mb-6 relative transition-transform duration-500 group-hover:-translate-y-2">
-              <img src={cake.image} alt={cake.name} className="max-h-full max-w-full object-contain transition-transform duration-700 group-hover:scale-105 drop-shadow-[0_35px_35px_rgba(0,0,0,0.4)]" />
+              <ResponsiveImage src={cake.image} variants={cake.imageVariants} sizes="300px" alt={cake.name} className="max-h-full max-w-full object-contain transition-transform duration-700 group-hover:scale-105 drop-shadow-[0_35px_35px_rgba(0,0,0,0.4)]" />
             </div>
             <div className="w-full">
               <h3 className="text-xl font-serif text-white mb-1">{cake.name}</h3>
@@ -2,6 +2,7 @@
 import React from 'react';
 import { Camera, ArrowUpRight } from 'lucide-react';
 import { GalleryItem } from '../types';
+import ResponsiveImage from './ResponsiveImage';
 
 interface EventGalleryProps {
     galleryItems: GalleryItem[];
@@ -29,7 +30,7 @@ const EventGallery: React.FC<EventGalleryProps> = ({ galleryItems, onViewMore })
       <div className="grid grid-cols-1 md:grid-cols-3 gap-6 auto-rows-auto">
         {galleryItems.map((item) => (
           <div key={item.id} className={`group relative rounded-[2.5rem] overflow-hidden bg-zinc-900 border border-white/5 hover:border-white/10 transition-all duration-500 ${item.className}`}>
-            <img src={item.image} alt={item.title} className="absolute inset-0 w-full h-full object-cover transition-transform duration-1000 ease-out group-hover:scale-105 opacity-80 group-hover:opacity-100" />
+            <ResponsiveImage src={item.image} variants={item.imageVariants} sizes="(min-width: 768px) 66vw, 100vw" alt={item.title} className="absolute inset-0 w-full h-full object-cover transition-transform duration-1000 ease-out group-hover:scale-105 opacity-80 group-hover:opacity-100" />
             <div className="absolute inset-0 bg-gradient-to-t from-black via-black/20 to-transparent opacity-90 group-hover:opacity-70 transition-opacity duration-500" />
             <div className="absolute inset-0 p-8 flex flex-col justify-end translate-y-4 group-hover:translate-y-0 transition-transform duration-500">
               <div className="flex justify-between items-end opacity-0 group-hover:opacity-100 transition-opacity duration-500 delay-100">
@@ -2,6 +2,7 @@
 import React, { useRef, useEffect, useState, useLayoutEffect } from 'react';
 import { ArrowRight, ChevronLeft, ChevronRight } from 'lucide-react';
 import { Service } from '../types';
+import ResponsiveImage from './ResponsiveImage';
 
 interface EventSliderProps {
   services: Service[];
@@ -107,7 +108,7 @@ const EventSlider: React.FC<EventSliderProps> = ({ services, onCardClick }) => {
               className="flex-none snap-start group/card relative aspect-[3/4] rounded-[2rem] overflow-hidden cursor-pointer border border-white/5 hover:border-white/20 transition-all duration-700 hover:shadow-2xl bg-zinc-900"
               style={{ width: `${cardWidth}px` }}
             >
-              <div className="absolute inset-0 bg-zinc-900"><img src={service.image} alt={service.title} className="w-full h-full object-cover transition-transform duration-1000 group-hover/card:scale-110 opacity-70 group-hover/card:opacity-60" /></div>
+              <div className="absolute inset-0 bg-zinc-900"><ResponsiveImage src={service.image} variants={service.imageVariants} sizes={`${cardWidth}px`} alt={service.title} className="w-full h-full object-cover transition-transform duration-1000 group-hover/card:scale-110 opacity-70 group-hover/card:opacity-60" /></div>
               <div className="absolute inset-0 bg-gradient-to-t from-black via-black/50 to-transparent opacity-90 group-hover/card:opacity-100 transition-opacity duration-500" />
               <div className="absolute inset-0 p-8 flex flex-col justify-between z-10">
                 <div className="flex justify-between items-start"><span className="bg-white/10 backdrop-blur-md border border-white/10 px-4 py-1.5 rounded-full text-[10px] font-bold uppercase tracking-wider text-white shadow-lg">{service.category}</span></div>
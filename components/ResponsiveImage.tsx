@@ -0,0 +1,24 @@
+import React from 'react';
+import { ImageVariants } from '../types';
+
+interface ResponsiveImageProps extends React.ImgHTMLAttributes<HTMLImageElement> {
+  src: string;
+  variants?: ImageVariants;
+  sizes?: string;
+}
+
+// Uploads processed by the backend carry AVIF/WebP srcsets; older items fall back to the plain image
+const ResponsiveImage: React.FC<ResponsiveImageProps> = ({ src, variants, sizes = '100vw', loading = 'lazy', ...imgProps }) => {
+  if (!variants) {
+    return <img src={src} loading={loading} {...imgProps} />;
+  }
+  return (
+    <picture>
+      {variants.avif && <source type="image/avif" srcSet={variants.avif} sizes={sizes} />}
+      {variants.webp && <source type="image/webp" srcSet={variants.webp} sizes={sizes} />}
+      <img src={src} loading={loading} {...imgProps} />
+    </picture>
+  );
+};
+
+export default ResponsiveImage;
@@ -1,5 +1,5 @@
 
-import { ContentResponse, LoginResponse } from '../types';
+import { ContentResponse, LoginResponse, UploadResponse } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
 console.log("API URL:", API_BASE_URL); // Debug log
@@ -15,7 +15,52 @@ const getHeaders = () => {
     return headers;
 };
 
+const saveSession = (session: LoginResponse) => {
+    sessionStorage.setItem('admin_token', session.token);
+    if (session.refresh_token) sessionStorage.setItem('admin_refresh_token', session.refresh_token);
+};
+
+// Concurrent 401s share one refresh: refresh tokens are single-use
+let refreshing: Promise<boolean> | null = null;
+
+const refreshSession = (): Promise<boolean> => {
+    const refreshToken = sessionStorage.getItem('admin_refresh_token');
+    if (!refreshToken) return Promise.resolve(false);
+    if (!refreshing) {
+        refreshing = fetch(`${API_BASE_URL}/token/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: refreshToken })
+        })
+            .then(async (response) => {
+                if (!response.ok) return false;
+                saveSession(await response.json());
+                return true;
+            })
+            .catch(() => false)
+            .finally(() => { refreshing = null; });
+    }
+    return refreshing;
+};
+
+// Admin request: on 401 (expired access token) refresh the session once and retry
+const authFetch = async (url: string, init: RequestInit = {}, multipart = false) => {
+    const withHeaders = (): RequestInit => {
+        const headers = getHeaders();
+        // Let the browser set Content-Type with the multipart boundary
+        if (multipart) delete headers['Content-Type'];
+        return { ...init, headers };
+    };
+    const response = await fetch(url, withHeaders());
+    if (response.status === 401 && await refreshSession()) {
+        return fetch(url, withHeaders());
+    }
+    return response;
+};
+
 export const api = {
+    saveSession,
+
     login: async (password: string): Promise<LoginResponse> => {
         const response = await fetch(`${API_BASE_URL}/login`, {
             method: 'POST',
@@ -35,9 +80,8 @@ export const api = {
     // Generic CRUD operations
     // resource examples: 'indoor-decorations', 'outdoor-plans', 'cakes'
     createItem: async (resource: string, data: any) => {
-        const response = await fetch(`${API_BASE_URL}/${resource}`, {
+        const response = await authFetch(`${API_BASE_URL}/${resource}`, {
             method: 'POST',
-            headers: getHeaders(),
             body: JSON.stringify(data)
         });
         if (!response.ok) {
@@ -49,9 +93,8 @@ export const api = {
     },
 
     updateItem: async (resource: string, id: number, data: any) => {
-        const response = await fetch(`${API_BASE_URL}/${resource}/${id}`, {
+        const response = await authFetch(`${API_BASE_URL}/${resource}/${id}`, {
             method: 'PUT',
-            headers: getHeaders(),
             body: JSON.stringify(data)
         });
         if (!response.ok) {
@@ -63,9 +106,8 @@ export const api = {
     },
 
     deleteItem: async (resource: string, id: number) => {
-        const response = await fetch(`${API_BASE_URL}/${resource}/${id}`, {
-            method: 'DELETE',
-            headers: getHeaders()
+        const response = await authFetch(`${API_BASE_URL}/${resource}/${id}`, {
+            method: 'DELETE'
         });
         if (!response.ok) {
             const text = await response.text().catch(() => 'no body');
@@ -84,19 +126,34 @@ export const api = {
         return true;
     },
 
+    // Drag-and-drop reorder: place item `id` before `beforeId` (or last); only that item's position changes
+    moveItem: async (resource: string, id: number, beforeId?: number) => {
+        const query = beforeId !== undefined ? `?before=${beforeId}` : '';
+        const response = await authFetch(`${API_BASE_URL}/${resource}/${id}/move${query}`, {
+            method: 'POST'
+        });
+        if (!response.ok) {
+            const text = await response.text().catch(() => 'no body');
+            console.error('moveItem error', { resource, id, beforeId, status: response.status, body: text });
+            throw new Error(`Failed to move ${resource} item: ${response.status}`);
+        }
+        return response.json();
+    },
+
     uploadFile: async (file: File): Promise<string> => {
+        const data = await api.uploadMedia(file);
+        return data.url;
+    },
+
+    // Images come back with responsive variants (imageVariants) when the backend can process them
+    uploadMedia: async (file: File): Promise<UploadResponse> => {
         const formData = new FormData();
         formData.append('file', file);
 
-        const headers = getHeaders();
-        // Remove Content-Type to let browser set it with boundary for multipart
-        delete headers['Content-Type'];
-
-        const response = await fetch(`${API_BASE_URL}/upload`, {
+        const response = await authFetch(`${API_BASE_URL}/upload`, {
             method: 'POST',
-            headers: headers,
             body: formData
-        });
+        }, true);
 
         if (!response.ok) {
             const errorText = await response.text();
@@ -109,18 +166,12 @@ export const api = {
             }
             throw new Error(errorMessage);
         }
-        const data = await response.json();
-        return data.url;
+        return response.json();
     },
 
     fetchReel: async (url: string) => {
-        const token = sessionStorage.getItem('admin_token');
-        const res = await fetch(`${API_BASE_URL}/fetch-reel`, {
+        const res = await authFetch(`${API_BASE_URL}/fetch-reel`, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Authorization': `Bearer ${token}`
-            },
             body: JSON.stringify({ url })
         });
         if (!res.ok) throw new Error('Fetch reel failed');
@@ -138,9 +189,8 @@ export const api = {
     },
 
     updateSettings: async (settings: any) => {
-        const response = await fetch(`${API_BASE_URL}/settings`, {
+        const response = await authFetch(`${API_BASE_URL}/settings`, {
             method: 'POST',
-            headers: getHeaders(),
             body: JSON.stringify(settings)
         });
         if (!response.ok) throw new Error('Failed to update settings');
@@ -152,13 +202,12 @@ export const api = {
         const response = await fetch(url);
         if (!response.ok) throw new Error('Failed to fetch bookings');
         const data = await response.json();
-        return data.bookings || [];
+        return Array.isArray(data) ? data : (data.bookings || []);
     },
 
     createBooking: async (date: string, time_slot: string) => {
-        const response = await fetch(`${API_BASE_URL}/bookings`, {
+        const response = await authFetch(`${API_BASE_URL}/bookings`, {
             method: 'POST',
-            headers: getHeaders(),
             body: JSON.stringify({ date, time_slot })
         });
         if (!response.ok) {
@@ -169,9 +218,8 @@ export const api = {
     },
 
     deleteBooking: async (id: number) => {
-        const response = await fetch(`${API_BASE_URL}/bookings/${id}`, {
-            method: 'DELETE',
-            headers: getHeaders()
+        const response = await authFetch(`${API_BASE_URL}/bookings/${id}`, {
+            method: 'DELETE'
         });
         if (!response.ok) throw new Error('Failed to delete booking');
         return response.json();
@@ -27,17 +27,26 @@ export interface EventDetails {
 export type ServiceMode = 'INDOOR' | 'OUTDOOR';
 
 // Data structures for editable content
+
+// Responsive variants of an uploaded image: format -> srcset ("url 320w, url 640w, ...")
+export interface ImageVariants {
+    webp?: string;
+    avif?: string;
+}
 export interface Service {
     id: number;
+    position?: string; // Sort key; lists come back in this order
     title: string;
     category: string;
     description: string;
     image: string;
     setups?: SetupImage[];
+    imageVariants?: ImageVariants;
 }
 
 export interface Plan {
     id: number; // Added ID for DB
+    position?: string; // Sort key; lists come back in this order
     name: string;
     price: string;
     description: string;
@@ -45,22 +54,27 @@ export interface Plan {
     features: string[];
     extras: string[];
     image?: string;
+    imageVariants?: ImageVariants;
 }
 
 export interface Cake {
     id: number;
+    position?: string; // Sort key; lists come back in this order
     name: string;
     price: string;
     flavor: string;
     image: string;
+    imageVariants?: ImageVariants;
 }
 
 export interface GalleryItem {
     id: number;
+    position?: string; // Sort key; lists come back in this order
     title: string;
     category: string;
     image: string;
     className: string;
+    imageVariants?: ImageVariants;
 }
 
 export interface SetupImage {
@@ -72,6 +86,7 @@ export interface SetupImage {
 
 export interface RealReel {
     id: number;
+    position?: string; // Sort key; lists come back in this order
     embedUrl: string;
     thumbnail: string;
     caption: string;
@@ -80,6 +95,7 @@ export interface RealReel {
 
 export interface AddOn {
     id: number;
+    position?: string; // Sort key; lists come back in this order
     name: string;
     price: string;
     type: 'checkbox' | 'quantity';
@@ -107,6 +123,15 @@ export interface ContentResponse {
     };
 }
 
+export interface UploadResponse {
+    url: string;
+    width?: number;
+    height?: number;
+    imageVariants?: ImageVariants;
+}
+
 export interface LoginResponse {
     token: string;
+    refresh_token?: string;
+    expires_in?: number;
 }